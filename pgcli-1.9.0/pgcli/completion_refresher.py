@@ -1,18 +1,38 @@
+import logging
 import threading
 import os
 from collections import OrderedDict
 
+import psycopg2
+
 from .pgcompleter import PGCompleter
 from .pgexecute import PGExecute
+from .metadata_cache import (MetadataCache, CatalogRecorder,
+                             CatalogSnapshot, CatalogPrefetch)
+
+_logger = logging.getLogger(__name__)
 
 
 class CompletionRefresher(object):
 
     refreshers = OrderedDict()
 
+    # The catalog queries made by the refreshers, in the order they're run
+    # in when they run concurrently
+    catalog_queries = (
+        'search_path', 'schemata', 'tables', 'table_columns', 'foreignkeys',
+        'views', 'view_columns', 'datatypes', 'databases', 'functions')
+
+    # When the catalog queries run concurrently, the completions from these
+    # refreshers are handed to the callbacks before the others have
+    # completed
+    early_refreshers = ('schemata', 'tables', 'views')
+
     def __init__(self):
         self._completer_thread = None
         self._restart_refresh = threading.Event()
+        # Paths of the metadata caches already used in this session
+        self._loaded_caches = set()
 
     def refresh(self, executor, special, callbacks, history=None,
       settings=None):
@@ -47,8 +67,6 @@ class CompletionRefresher(object):
     def _bg_refresh(self, pgexecute, special, callbacks, history=None,
       settings=None):
         settings = settings or {}
-        completer = PGCompleter(smart_completion=True, pgspecial=special,
-            settings=settings)
 
         if settings.get('single_connection'):
             executor = pgexecute
@@ -63,11 +81,110 @@ class CompletionRefresher(object):
         if callable(callbacks):
             callbacks = [callbacks]
 
+        cache_dir = settings.get('metadata_cache_dir')
+        cache = cache_dir and MetadataCache.for_executor(cache_dir, executor)
+        cached = cache and cache.load()
+        if cached:
+            cached_fingerprint, catalog = cached
+            snapshot = CatalogSnapshot(catalog, executor)
+            loaded = cache.path in self._loaded_caches
+            if not loaded:
+                # Make the cached metadata available right away, then check
+                # whether it is still current
+                self._loaded_caches.add(cache.path)
+                completer = self._populate_completer(
+                    special, settings, snapshot, history)
+                for callback in callbacks:
+                    callback(completer)
+            fingerprint = self._fingerprint(executor)
+            if (fingerprint == cached_fingerprint and
+                    not self._restart_refresh.is_set()):
+                if loaded:
+                    completer = self._populate_completer(
+                        special, settings, snapshot, history)
+                    for callback in callbacks:
+                        callback(completer)
+                return
+            self._restart_refresh.clear()
+        else:
+            fingerprint = cache and self._fingerprint(executor)
+
+        prefetch = None
+        extra_executors = []
+        connections = settings.get('refresh_connections', 1)
+        if connections > 1 and not settings.get('single_connection'):
+            extra_executors = self._connections(executor, connections - 1)
+            executor = prefetch = CatalogPrefetch(
+                [executor] + extra_executors, self.catalog_queries)
+        try:
+            if fingerprint:
+                executor = CatalogRecorder(executor)
+            completer = self._populate_completer(
+                special, settings, executor, history, callbacks, prefetch)
+            if fingerprint:
+                cache.save(fingerprint, executor.catalog)
+        finally:
+            # Not kept for the next refresh, which may be a long time away
+            for extra_executor in extra_executors:
+                extra_executor.conn.close()
+
+        for callback in callbacks:
+            callback(completer)
+
+    def _connections(self, executor, count):
+        """Returns up to `count` new connections to the database of
+        `executor`."""
+        e = executor
+        executors = []
+        while len(executors) < count:
+            try:
+                executors.append(PGExecute(
+                    e.dbname, e.user, e.password, e.host, e.port, e.dsn,
+                    **e.extra_args))
+            except psycopg2.Error as err:
+                _logger.error('Error opening a completion refresh '
+                              'connection: %r', err)
+                break
+        return executors
+
+    def _fingerprint(self, executor):
+        try:
+            return executor.catalog_fingerprint()
+        except psycopg2.Error as e:
+            _logger.error('Error reading the catalog fingerprint: %r', e)
+            return None
+
+    def _populate_completer(self, special, settings, executor, history,
+                            callbacks=(), prefetch=None):
+        """Returns a new PGCompleter populated from `executor`.
+
+        If the catalog queries run concurrently, through the CatalogPrefetch
+        `prefetch`, the callbacks are passed a completer as soon as the early
+        refreshers are done.
+        """
+        completer = PGCompleter(smart_completion=True, pgspecial=special,
+            settings=settings)
+        early = bool(callbacks) and prefetch is not None
+
         while 1:
-            for refresher in self.refreshers.values():
+            for name, refresher in self.refreshers.items():
                 refresher(completer, executor)
                 if self._restart_refresh.is_set():
                     self._restart_refresh.clear()
+                    if prefetch is not None:
+                        prefetch.restart()
+                    break
+                if (early and name == self.early_refreshers[-1] and
+                        not prefetch.done()):
+                    # Hand out the relations while the other queries are
+                    # still running, then start over on a new completer
+                    # from the results at hand
+                    early = False
+                    self._load_history(completer, history)
+                    for callback in callbacks:
+                        callback(completer)
+                    completer = PGCompleter(smart_completion=True,
+                        pgspecial=special, settings=settings)
                     break
             else:
                 # Break out of while loop if the for loop finishes natually
@@ -78,14 +195,47 @@ class CompletionRefresher(object):
             # break statement.
             continue
 
-        # Load history into pgcompleter so it can learn user preferences
+        self._load_history(completer, history)
+        return completer
+
+    def _load_history(self, completer, history):
+        # Load the keyword counts kept from earlier sessions, or history into
+        # pgcompleter so it can learn user preferences
+        prioritizer = completer.prioritizer
+        if (prioritizer.keyword_counts_file and
+                prioritizer.load_keyword_counts()):
+            return
         n_recent = 100
         if history:
             for recent in history[-n_recent:]:
                 completer.extend_query_history(recent, is_init=True)
+        if prioritizer.keyword_counts_file:
+            prioritizer.save_keyword_counts()
 
-        for callback in callbacks:
-            callback(completer)
+
+def refresh_relations(completer, executor, relations):
+    """Updates the tables and views in relations, and the tables inheriting
+    from them, in completer, as after CREATE, ALTER or DROP statements.
+
+    relations - (schema_name, rel_name) tuples, with schema_name None for
+                relations in the search path.
+    """
+    found = executor.relation_oids(relations)
+    oids = [oid for oid, schema, relname in found]
+    tables = list(executor.tables(oids))
+    table_columns = list(executor.table_columns(oids))
+    views = list(executor.views(oids))
+    view_columns = list(executor.view_columns(oids))
+    foreignkeys = list(executor.foreignkeys(oids))
+
+    completer.remove_relations(
+        list(relations) + [(schema, relname) for oid, schema, relname in found])
+    completer.extend_relations(tables, kind='tables')
+    completer.extend_columns(table_columns, kind='tables')
+    completer.extend_relations(views, kind='views')
+    completer.extend_columns(view_columns, kind='views')
+    # The foreign keys from or to the relations were removed at both ends
+    completer.extend_foreignkeys(foreignkeys)
 
 
 def refresher(name, refreshers=CompletionRefresher.refreshers):
@@ -66,3 +66,19 @@ def get_casing_file(config):
     if casing_file == 'default':
         casing_file = config_location() + 'casing'
     return casing_file
+
+
+def get_history_file(config):
+    history_file = config['main']['history_file']
+    if history_file == 'default':
+        history_file = config_location() + 'history'
+    return expanduser(history_file)
+
+
+def get_metadata_cache_dir(config):
+    metadata_cache_dir = config['main']['metadata_cache_dir']
+    if metadata_cache_dir == 'default':
+        metadata_cache_dir = config_location() + 'metadata'
+    elif metadata_cache_dir.lower() in ('', 'off'):
+        metadata_cache_dir = None
+    return metadata_cache_dir
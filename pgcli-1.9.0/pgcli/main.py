@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 from __future__ import print_function
 
+import errno
 import os
 import re
 import sys
@@ -8,6 +9,7 @@ import traceback
 import logging
 import threading
 import shutil
+import subprocess
 import functools
 import humanize
 import datetime as dt
@@ -43,11 +45,14 @@ import pgspecial as special
 from .pgcompleter import PGCompleter
 from .pgtoolbar import create_toolbar_tokens_func
 from .pgstyle import style_factory
-from .pgexecute import PGExecute
+from .pgexecute import PGExecute, ServerCursor, start_timing, stop_timing
 from .pgbuffer import PGBuffer
-from .completion_refresher import CompletionRefresher
-from .config import (get_casing_file,
-    load_config, config_location, ensure_dir_exists, get_config)
+from .timing import CommandTiming
+from .packages.parseutils.ddl import ddl_relations
+from .completion_refresher import CompletionRefresher, refresh_relations
+from .config import (get_casing_file, get_history_file,
+    get_metadata_cache_dir, load_config, config_location, ensure_dir_exists,
+    get_config)
 from .key_bindings import pgcli_bindings
 from .encodingutils import utf8tounicode
 from .encodingutils import text_type
@@ -78,8 +83,12 @@ MetaQuery = namedtuple(
         'db_changed',       # True if any subquery changed the database
         'path_changed',     # True if any subquery changed the search path
         'mutated',          # True if any subquery executed insert/update/delete
+        'changed_relations',  # (schema, name) of the tables and views changed
+                              # by create/alter/drop, or None if the changes
+                              # aren't limited to them
     ])
-MetaQuery.__new__.__defaults__ = ('', False, 0, False, False, False, False)
+MetaQuery.__new__.__defaults__ = ('', False, 0, False, False, False, False,
+                                  None)
 
 OutputSettings = namedtuple(
     'OutputSettings',
@@ -147,6 +156,10 @@ class PGCli(object):
             self.row_limit = row_limit
         else:
             self.row_limit = c['main'].as_int('row_limit')
+        self.fetch_count = c['main'].as_int('fetch_count')
+        self.timing_breakdown = c['main'].as_bool('timing_breakdown')
+        self.timing_log_file = c['main'].get('timing_log_file') or None
+        self.command_timing = None
 
         self.min_num_menu_lines = c['main'].as_int('min_num_menu_lines')
         self.multiline_continuation_char = c['main']['multiline_continuation_char']
@@ -176,12 +189,16 @@ class PGCli(object):
         keyword_casing = c['main']['keyword_casing']
         self.settings = {
             'casing_file': get_casing_file(c),
+            'metadata_cache_dir': get_metadata_cache_dir(c),
+            'keyword_counts_file': get_history_file(c) + '.keywords',
+            'refresh_connections': c['main'].as_int('refresh_connections'),
             'generate_casing_file': c['main'].as_bool('generate_casing_file'),
             'generate_aliases': c['main'].as_bool('generate_aliases'),
             'asterisk_column_order': c['main']['asterisk_column_order'],
             'qualify_columns': c['main']['qualify_columns'],
             'case_column_headers': c['main'].as_bool('case_column_headers'),
             'search_path_filter': c['main'].as_bool('search_path_filter'),
+            'max_completions': c['main'].as_int('max_completions'),
             'single_connection': single_connection,
             'less_chatty': less_chatty,
             'keyword_casing': keyword_casing,
@@ -455,6 +472,13 @@ class PGCli(object):
     def execute_command(self, text, query):
         logger = self.logger
 
+        timing = None
+        if self.timing_breakdown or self.timing_log_file:
+            timing = CommandTiming(self.pgexecute.conn)
+            start_timing(timing.timer)
+        self.command_timing = timing
+
+        output = []
         try:
             output, query = self._evaluate_command(text)
         except KeyboardInterrupt:
@@ -473,27 +497,58 @@ class PGCli(object):
             logger.error("traceback: %r", traceback.format_exc())
             click.secho(str(e), err=True, fg='red')
         else:
+            if timing is not None:
+                timing.start_display()
             try:
                 if self.output_file and not text.startswith(('\\o ', '\\? ')):
                     try:
                         with open(self.output_file, 'a', encoding='utf-8') as f:
                             click.echo(text, file=f)
-                            click.echo('\n'.join(output), file=f)
+                            if isinstance(output, list):
+                                click.echo('\n'.join(output), file=f)
+                            else:
+                                for line in output:
+                                    click.echo(line, file=f)
                             click.echo('', file=f)  # extra newline
                     except IOError as e:
                         click.secho(str(e), err=True, fg='red')
-                else:
+                elif isinstance(output, list):
                     self.echo_via_pager('\n'.join(output))
+                else:
+                    self.echo_lines_via_pager(output)
             except KeyboardInterrupt:
                 pass
+            except psycopg2.extensions.QueryCanceledError:
+                # The rows of a query are read as they're shown
+                logger.debug("cancelled query, sql: %r", text)
+                click.secho("cancelled query", err=True, fg='red')
+            except OperationalError as e:
+                logger.error("sql: %r, error: %r", text, e)
+                logger.error("traceback: %r", traceback.format_exc())
+                self._handle_server_closed_connection()
+            except psycopg2.DatabaseError as e:
+                logger.error("sql: %r, error: %r", text, e)
+                logger.error("traceback: %r", traceback.format_exc())
+                click.secho(str(e), err=True, fg='red')
+
+            if timing is not None:
+                stop_timing()
+                timing.end_display()
+                self.report_timing(text, timing)
 
             if self.pgspecial.timing_enabled:
                 # Only add humanized time display if > 1 second
                 if query.total_time > 1:
-                    print('Time: %0.03fs (%s)' % (query.total_time,
-                          humanize.time.naturaldelta(query.total_time)))
+                    line = 'Time: %0.03fs (%s)' % (
+                        query.total_time,
+                        humanize.time.naturaldelta(query.total_time))
                 else:
-                    print('Time: %0.03fs' % query.total_time)
+                    line = 'Time: %0.03fs' % query.total_time
+                if not isinstance(output, list):
+                    # Reading rows as they're shown, with a pager, lasts as
+                    # long as it's open, so that isn't counted
+                    line += ', not counting the rows read as they were shown'
+                print(line)
 
             # Check if we need to update completions, in order of most
             # to least drastic changes
@@ -502,7 +557,10 @@ class PGCli(object):
                     self.completer.reset_completions()
                 self.refresh_completions(persist_priorities='keywords')
             elif query.meta_changed:
-                self.refresh_completions(persist_priorities='all')
+                if query.changed_relations is None:
+                    self.refresh_completions(persist_priorities='all')
+                elif query.changed_relations:
+                    self.refresh_relations(query.changed_relations)
             elif query.path_changed:
                 logger.debug('Refreshing search path')
                 with self._completer_lock:
@@ -510,15 +568,23 @@ class PGCli(object):
                         self.pgexecute.search_path())
                 logger.debug('Search path: %r',
                              self.completer.search_path)
+        finally:
+            stop_timing()
         return query
 
+    def report_timing(self, text, timing):
+        """Shows the timing breakdown of the command text if it's on, and
+        logs it to the timing log file if there's one."""
+        if self.timing_breakdown:
+            for line in timing.lines():
+                print(line)
+        if self.timing_log_file:
+            timing.log(self.timing_log_file, text)
+
     def run_cli(self):
         logger = self.logger
 
-        history_file = self.config['main']['history_file']
-        if history_file == 'default':
-            history_file = config_location() + 'history'
-        history = FileHistory(os.path.expanduser(history_file))
+        history = FileHistory(get_history_file(self.config))
         self.refresh_completions(history=history,
                                  persist_priorities='none')
 
@@ -652,6 +718,11 @@ class PGCli(object):
 
     def _should_show_limit_prompt(self, status, cur):
         """returns True if limit prompt should be shown, False otherwise."""
+        if isinstance(cur, ServerCursor):
+            # Its rows are counted as they're read, so enough of them are
+            # read ahead to tell
+            return (self.row_limit > 0 and
+                    cur.read_ahead(self.row_limit) > self.row_limit)
         if not is_select(status):
             return False
         return self.row_limit > 0 and cur and cur.rowcount > self.row_limit
@@ -667,19 +738,24 @@ class PGCli(object):
 
         all_success = True
         meta_changed = False  # CREATE, ALTER, DROP, etc
+        changed_relations = []  # Tables and views changed by them
         mutated = False  # INSERT, DELETE, etc
         db_changed = False
         path_changed = False
         output = []
         total = 0
+        timing = self.command_timing
 
         # Run the query.
         start = time()
         on_error_resume = self.on_error == 'RESUME'
         res = self.pgexecute.run(text, self.pgspecial,
-                                 exception_formatter, on_error_resume)
+                                 exception_formatter, on_error_resume,
+                                 fetch_count=self.fetch_count)
 
         for title, cur, headers, status, sql, success in res:
+            if timing is not None:
+                statement_timing = timing.add_statement(sql)
             logger.debug("headers: %r", headers)
             logger.debug("rows: %r", cur)
             logger.debug("status: %r", status)
@@ -709,9 +785,25 @@ class PGCli(object):
                     else lambda x: x
                 )
             )
-            formatted = format_output(title, cur, headers, status, settings)
+            format_lines = functools.partial(
+                format_output, title, cur, headers, status, settings)
+            if timing is None:
+                formatted = format_lines()
+            elif isinstance(cur, ServerCursor):
+                # Formatted batch by batch, as the lines are shown
+                formatted = timing.measure(statement_timing, format_lines(),
+                                           cur)
+            else:
+                formatted = timing.measure_format(statement_timing,
+                                                  format_lines, cur)
 
-            output.extend(formatted)
+            if isinstance(cur, ServerCursor):
+                # The rows are read as they're shown. Being a single query, no
+                # statement follows.
+                output = itertools.chain(output, formatted)
+            else:
+                output.extend(formatted)
+            # Only until the first rows of a server-side cursor
             total = time() - start
 
             # Keep track of whether any of the queries are mutating or changing
@@ -719,13 +811,20 @@ class PGCli(object):
             if success:
                 mutated = mutated or is_mutating(status)
                 db_changed = db_changed or has_change_db_cmd(sql)
-                meta_changed = meta_changed or has_meta_cmd(sql)
+                if has_meta_cmd(sql):
+                    meta_changed = True
+                    relations = ddl_relations(sql)
+                    if relations is None or changed_relations is None:
+                        changed_relations = None
+                    else:
+                        changed_relations.extend(relations)
                 path_changed = path_changed or has_change_path_cmd(sql)
             else:
                 all_success = False
 
         meta_query = MetaQuery(text, all_success, total, meta_changed,
-                               db_changed, path_changed, mutated)
+                               db_changed, path_changed, mutated,
+                               changed_relations)
 
         return output, meta_query
 
@@ -757,6 +856,28 @@ class PGCli(object):
         return [(None, None, None,
                 'Auto-completion refresh started in the background.')]
 
+    def refresh_relations(self, relations):
+        """Update the completions for the tables and views changed by DDL
+        statements, falling back to a full refresh if that fails.
+
+        :param relations: (schema, name) tuples, with schema None for
+                          unqualified names
+        """
+        if self.completion_refresher.is_refreshing():
+            # The refresh under way may not see the changes
+            self.refresh_completions(persist_priorities='all')
+            return
+
+        try:
+            # This uses the connection the statements ran on, which sees
+            # them even inside a transaction
+            with self._completer_lock:
+                refresh_relations(self.completer, self.pgexecute, relations)
+        except psycopg2.Error as e:
+            self.logger.error('Error refreshing relations %r: %r',
+                              relations, e)
+            self.refresh_completions(persist_priorities='all')
+
     def _on_completions_refreshed(self, new_completer, persist_priorities):
         self._swap_completer_objects(new_completer, persist_priorities)
 
@@ -829,6 +950,34 @@ class PGCli(object):
         else:
             click.echo_via_pager(text, color)
 
+    def echo_lines_via_pager(self, lines):
+        """Shows lines as they're produced, piping them to the pager if it's
+        on. Stops reading them if the pager is quit."""
+        if (self.pgspecial.pager_config == PAGER_OFF or
+                not sys.stdout.isatty()):
+            for line in lines:
+                click.echo(line)
+            return
+
+        cmd = os.environ.get('PAGER') or (
+            'more' if sys.platform.startswith('win') else 'less')
+        encoding = getattr(sys.stdout, 'encoding', None) or 'utf-8'
+        pager = subprocess.Popen(cmd, shell=True, stdin=subprocess.PIPE)
+        try:
+            for line in lines:
+                pager.stdin.write((line + '\n').encode(encoding, 'replace'))
+                pager.stdin.flush()
+        except (IOError, OSError) as e:
+            # The pager was quit
+            if e.errno not in (errno.EPIPE, errno.EINVAL):
+                raise
+        finally:
+            try:
+                pager.stdin.close()
+            except (IOError, OSError):
+                pass
+            pager.wait()
+
 @click.command()
 # Default host is '' so psycopg2 can default to either localhost or unix socket
 @click.option('-h', '--host', default='', envvar='PGHOST',
@@ -1028,6 +1177,18 @@ def exception_formatter(e):
     return click.style(utf8tounicode(str(e)), fg='red')
 
 
+class RecordTitle(object):
+    """The title of the records in vertical output, numbered from `offset`
+    + 1 when the rows are formatted in batches."""
+
+    def __init__(self, offset=0, title='RECORD {n}'):
+        self.offset = offset
+        self.title = title
+
+    def format(self, n):
+        return self.title.format(n=self.offset + n)
+
+
 def format_output(title, cur, headers, status, settings):
     output = []
     expanded = (settings.expanded or settings.table_format == 'vertical')
@@ -1068,10 +1229,48 @@ def format_output(title, cur, headers, status, settings):
     if not settings.floatfmt:
         output_kwargs['preprocessors'] = (align_decimals, )
 
+    def format_lines(rows, headers, **kwargs):
+        formatted = formatter.format_output(
+            rows, headers, **dict(output_kwargs, **kwargs))
+        if isinstance(formatted, (text_type)):
+            formatted = iter(formatted.splitlines())
+        return formatted
+
+    def format_batches(cur, headers):
+        # Each batch is formatted as it's read. Whether the output is too wide
+        # is decided from the first one.
+        vertical = expanded
+        offset = 0
+        for batch in cur.batches():
+            if vertical:
+                formatted = format_lines(
+                    batch, headers, format_name='vertical',
+                    sep_title=RecordTitle(offset))
+            else:
+                formatted = format_lines(batch, headers,
+                                         format_name=table_format)
+                if offset and table_format in ('csv', 'tsv'):
+                    # Only the first batch has the header line
+                    next(formatted, None)
+                elif not offset and max_width and headers:
+                    first_line = next(formatted, '')
+                    formatted = itertools.chain([first_line], formatted)
+                    if len(first_line) > max_width:
+                        vertical = True
+                        formatted = format_lines(
+                            batch, headers, format_name='vertical')
+            for line in formatted:
+                yield line
+            offset += len(batch)
+        yield cur.statusmessage
+
     if title:  # Only print the title if it's not None.
         output.append(title)
 
-    if cur:
+    if isinstance(cur, ServerCursor):
+        headers = [case_function(utf8tounicode(x)) for x in headers]
+        output = itertools.chain(output, format_batches(cur, headers))
+    elif cur:
         headers = [case_function(utf8tounicode(x)) for x in headers]
         if max_width is not None:
             cur = list(cur)
@@ -0,0 +1,215 @@
+import errno
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+
+from .packages.parseutils.meta import FunctionMetadata, ForeignKey
+from .encodingutils import text_type
+
+_logger = logging.getLogger(__name__)
+
+# The PGExecute methods querying the catalog for completion metadata, with
+# functions turning the rows of their JSON encoded results back into what
+# they return
+catalog_methods = {
+    'search_path': None,
+    'schemata': None,
+    'tables': tuple,
+    'table_columns': tuple,
+    'foreignkeys': lambda row: ForeignKey(*row),
+    'views': tuple,
+    'view_columns': tuple,
+    'datatypes': tuple,
+    'databases': None,
+    'functions': lambda row: FunctionMetadata(*row),
+}
+
+
+def _encode_function(f):
+    # The FunctionMetadata constructor arguments
+    return [
+        f.schema_name, f.func_name, f.arg_names, f.arg_types, f.arg_modes,
+        f.return_type, f.is_aggregate, f.is_window, f.is_set_returning,
+        ', '.join(f.arg_defaults) or None
+    ]
+
+
+def _encode(method, rows):
+    if method == 'functions':
+        return [_encode_function(f) for f in rows]
+    return rows
+
+
+def _decode(method, rows):
+    decode_row = catalog_methods[method]
+    if decode_row is None:
+        return rows
+    return [decode_row(row) for row in rows]
+
+
+class CatalogRecorder(object):
+    """Wraps a PGExecute object, keeping the results of the catalog queries
+    made through it in `catalog`."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.catalog = {}
+
+    def __getattr__(self, name):
+        method = getattr(self.executor, name)
+        if name not in catalog_methods:
+            return method
+
+        def record():
+            rows = list(method())
+            self.catalog[name] = rows
+            return rows
+        return record
+
+
+class CatalogSnapshot(object):
+    """Stands in for a PGExecute object, answering the catalog queries from
+    recorded results. Anything else is passed on to `executor`."""
+
+    def __init__(self, catalog, executor=None):
+        self.catalog = catalog
+        self.executor = executor
+
+    def __getattr__(self, name):
+        if name in self.catalog:
+            return lambda: list(self.catalog[name])
+        return getattr(self.executor, name)
+
+
+class CatalogPrefetch(object):
+    """Stands in for a PGExecute object, running the catalog queries in
+    `methods` ahead of time, spread over the connections of `executors`.
+
+    Each query is started as soon as one of the connections is free, in the
+    order given, and asking for its result waits until it has arrived.
+    Anything else is passed on to the first executor.
+    """
+
+    def __init__(self, executors, methods):
+        self.executor = executors[0]
+        self._executors = executors
+        self._methods = methods
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.restart()
+
+    def restart(self):
+        """Discards the results, running all the queries again."""
+        with self._lock:
+            self._generation += 1
+            self._pending = list(reversed(self._methods))
+            self._results = {}
+            self._errors = {}
+            self._ready = dict(
+                (method, threading.Event()) for method in self._methods)
+        for executor in self._executors:
+            thread = threading.Thread(
+                target=self._run, args=(executor, self._generation),
+                name='completion_prefetch')
+            thread.setDaemon(True)
+            thread.start()
+
+    def _run(self, executor, generation):
+        while True:
+            with self._lock:
+                if generation != self._generation or not self._pending:
+                    return
+                method = self._pending.pop()
+                results, errors = self._results, self._errors
+                ready = self._ready[method]
+            try:
+                results[method] = list(getattr(executor, method)())
+            except Exception as e:
+                errors[method] = e
+            ready.set()
+
+    def done(self):
+        """Returns whether all the results have arrived."""
+        return all(ready.is_set() for ready in self._ready.values())
+
+    def __getattr__(self, name):
+        if name not in self._methods:
+            return getattr(self.executor, name)
+
+        def result():
+            with self._lock:
+                results, errors = self._results, self._errors
+                ready = self._ready[name]
+            ready.wait()
+            if name in errors:
+                raise errors[name]
+            return list(results[name])
+        return result
+
+
+class MetadataCache(object):
+    """The completion metadata of one database, stored on disk along with the
+    catalog fingerprint it was read at."""
+
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def for_executor(cls, directory, executor):
+        """Returns the cache for the database `executor` is connected to."""
+        key = '\n'.join(text_type(part) for part in (
+            executor.host, executor.port, executor.user, executor.dbname))
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json'
+        return cls(os.path.join(os.path.expanduser(directory), name))
+
+    def load(self):
+        """Returns a (fingerprint, catalog) tuple, or None if nothing usable
+        is cached."""
+        try:
+            with io.open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.version:
+                return None
+            catalog = dict(
+                (method, _decode(method, rows))
+                for method, rows in data['catalog'].items()
+                if method in catalog_methods)
+            return data['fingerprint'], catalog
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                _logger.error('Error reading metadata cache %r: %r',
+                              self.path, e)
+        except (ValueError, KeyError, TypeError) as e:
+            _logger.error('Invalid metadata cache %r: %r', self.path, e)
+        return None
+
+    def save(self, fingerprint, catalog):
+        """Stores the catalog query results in `catalog`, read at
+        `fingerprint`."""
+        data = {
+            'version': self.version,
+            'fingerprint': fingerprint,
+            'catalog': dict(
+                (method, _encode(method, rows))
+                for method, rows in catalog.items()),
+        }
+        tmp_path = self.path + '.tmp'
+        try:
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with io.open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text_type(json.dumps(data)))
+            try:
+                os.rename(tmp_path, self.path)
+            except OSError:
+                # os.rename doesn't replace files on Windows
+                os.remove(self.path)
+                os.rename(tmp_path, self.path)
+        except (IOError, OSError) as e:
+            _logger.error('Error writing metadata cache %r: %r', self.path, e)
@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import chain, islice
+
+
+class NameIndex(object):
+    """Index of names, used to narrow the candidates passed to
+    PGCompleter.find_matches.
+
+    Names are indexed by their lowercased form, both in sorted order (for
+    the prefix matching of strict mode) and by the characters they contain.
+    Fuzzy mode matches the input as a subsequence of a name, so only names
+    containing every character of the input can match.
+    """
+
+    def __init__(self, names=()):
+        # lowercased name -> names
+        self._names = defaultdict(set)
+        # character -> lowercased names containing it
+        self._chars = defaultdict(set)
+        # sorted lowercased names, rebuilt on the first prefix lookup after
+        # the index changed
+        self._sorted = None
+        self.update(names)
+
+    def __len__(self):
+        return sum(len(names) for names in self._names.values())
+
+    def __iter__(self):
+        return chain.from_iterable(self._names.values())
+
+    def __contains__(self, name):
+        return name in self._names.get(name.lower(), ())
+
+    def add(self, name):
+        key = name.lower()
+        names = self._names[key]
+        if not names:
+            for c in set(key):
+                self._chars[c].add(key)
+            self._sorted = None
+        names.add(name)
+
+    def update(self, names):
+        for name in names:
+            self.add(name)
+
+    def discard(self, name):
+        key = name.lower()
+        names = self._names.get(key)
+        if not names:
+            return
+        names.discard(name)
+        if names:
+            return
+        del self._names[key]
+        for c in set(key):
+            keys = self._chars[c]
+            keys.discard(key)
+            if not keys:
+                del self._chars[c]
+        self._sorted = None
+
+    def clear(self):
+        self._names.clear()
+        self._chars.clear()
+        self._sorted = None
+
+    def containing(self, text):
+        """Returns the set of names containing every character of text,
+        ignoring case."""
+        if not text:
+            return set(self)
+        postings = [self._chars.get(c) for c in set(text.lower())]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        keys = postings[0].intersection(*postings[1:])
+        return set(chain.from_iterable(self._names[k] for k in keys))
+
+    def startingwith(self, text):
+        """Returns the set of names starting with text, ignoring case."""
+        if not text:
+            return set(self)
+        if self._sorted is None:
+            self._sorted = sorted(self._names)
+        text = text.lower()
+        start = bisect_left(self._sorted, text)
+        names = set()
+        for key in islice(self._sorted, start, None):
+            if not key.startswith(text):
+                break
+            names.update(self._names[key])
+        return names
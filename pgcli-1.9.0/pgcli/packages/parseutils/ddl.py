@@ -0,0 +1,156 @@
+from __future__ import unicode_literals
+import sqlparse
+from sqlparse.tokens import Comment, Keyword, Punctuation
+
+# Words that can come between CREATE and TABLE or VIEW
+_create_modifiers = ('OR', 'REPLACE', 'RECURSIVE', 'MATERIALIZED')
+# Tables that aren't in a schema of their own, and which the completions
+# don't cover
+_temporary = ('TEMP', 'TEMPORARY', 'GLOBAL', 'LOCAL')
+
+
+def _words(sql):
+    """Returns the words of the first statement in sql, skipping whitespace
+    and comments, with keywords uppercased."""
+    parsed = sqlparse.parse(sql)
+    if not parsed:
+        return []
+    words = []
+    for token in parsed[0].flatten():
+        if token.is_whitespace or token.ttype in Comment:
+            continue
+        if token.ttype in Keyword:
+            # Keywords can be grouped, e.g. 'create or replace'
+            words.extend(token.value.upper().split())
+        else:
+            words.append(token.value)
+    return words
+
+
+def _identifier(word):
+    """Returns the name an identifier refers to, or None if word isn't
+    one."""
+    if len(word) > 1 and word[0] == word[-1] == '"':
+        return word[1:-1].replace('""', '"')
+    if word[0].isalpha() or word[0] == '_':
+        return word.lower()
+    return None
+
+
+class _Words(object):
+    def __init__(self, words):
+        self.words = words
+        self.pos = 0
+
+    def peek(self, offset=0):
+        try:
+            return self.words[self.pos + offset]
+        except IndexError:
+            return None
+
+    def skip(self, *words):
+        """Skips the next words as long as they are in words."""
+        while self.peek() is not None and self.peek().upper() in words:
+            self.pos += 1
+
+    def accept(self, *words):
+        """Skips the next words if they are words, returning whether they
+        were."""
+        following = self.words[self.pos:self.pos + len(words)]
+        if [w.upper() for w in following] != list(words):
+            return False
+        self.pos += len(words)
+        return True
+
+    def relation(self):
+        """Returns the (schema, name) tuple of the relation name that
+        follows, or None."""
+        word = self.peek()
+        name = word and _identifier(word)
+        if name is None:
+            return None
+        self.pos += 1
+        if self.peek() != '.':
+            return None, name
+        word = self.peek(1)
+        qualified = word and _identifier(word)
+        if qualified is None:
+            return None
+        self.pos += 2
+        return name, qualified
+
+
+def ddl_relations(sql):
+    """Returns the tables and views the DDL statement sql creates, alters
+    or drops, as (schema, name) tuples, with schema None for unqualified
+    names.
+
+    Returns None if the statement may change other metadata, or isn't
+    understood.
+    """
+    words = _Words(_words(sql))
+    verb = (words.peek() or '').upper()
+    words.pos = 1
+
+    if verb == 'CREATE':
+        if words.accept('INDEX') or words.accept('UNIQUE', 'INDEX'):
+            # Indexes aren't completed
+            return []
+        words.skip(*_create_modifiers)
+        if words.peek() is None or words.peek().upper() in _temporary:
+            return None
+        words.skip('UNLOGGED')
+        if not (words.accept('TABLE') or words.accept('VIEW')):
+            return None
+        words.accept('IF', 'NOT', 'EXISTS')
+        relation = words.relation()
+        return relation and [relation]
+
+    if verb == 'ALTER':
+        if not (words.accept('TABLE') or words.accept('VIEW') or
+                words.accept('MATERIALIZED', 'VIEW')):
+            return None
+        if 'CASCADE' in words.words:
+            # Dropping a column or constraint with CASCADE also drops the
+            # views depending on it
+            return None
+        words.accept('IF', 'EXISTS')
+        words.accept('ONLY')
+        relation = words.relation()
+        if relation is None:
+            return None
+        schema, name = relation
+        words.accept('*')
+        if words.accept('RENAME', 'TO'):
+            renamed = words.peek() and _identifier(words.peek())
+            return renamed and [relation, (schema, renamed)]
+        if words.accept('SET', 'SCHEMA'):
+            moved = words.peek() and _identifier(words.peek())
+            return moved and [relation, (moved, name)]
+        return [relation]
+
+    if verb == 'DROP':
+        if words.accept('INDEX'):
+            return None if 'CASCADE' in words.words else []
+        # Dropping a partitioned table also drops its partitions, which
+        # can't be looked up anymore once they're gone
+        if not (words.accept('VIEW') or
+                words.accept('MATERIALIZED', 'VIEW')):
+            return None
+        words.accept('IF', 'EXISTS')
+        relations = []
+        while True:
+            relation = words.relation()
+            if relation is None:
+                return None
+            relations.append(relation)
+            if words.peek() != ',':
+                break
+            words.pos += 1
+        words.accept('RESTRICT')
+        if words.peek() not in (None, ';'):
+            # CASCADE also drops the objects depending on the relations
+            return None
+        return relations
+
+    return None
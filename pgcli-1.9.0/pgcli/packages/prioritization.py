@@ -1,32 +1,71 @@
+import errno
+import io
+import json
+import logging
+import os
 import re
 import sqlparse
 from sqlparse.tokens import Name
 from collections import defaultdict
 from .pgliterals.main import get_literals
 
+_logger = logging.getLogger(__name__)
 
-white_space_regex = re.compile('\\s+', re.MULTILINE)
+word_regex = re.compile(r'\w+', re.UNICODE)
 
 
-def _compile_regex(keyword):
-    # Surround the keyword with word boundaries and replace interior whitespace
-    # with whitespace wildcards
-    pattern = '\\b' + white_space_regex.sub(r'\\s+', keyword) + '\\b'
-    return re.compile(pattern, re.MULTILINE | re.IGNORECASE)
+def _keyword_tree(keywords):
+    # Keywords by their first word, lowercased, as (following words, keyword)
+    # tuples
+    tree = defaultdict(list)
+    for keyword in keywords:
+        words = keyword.lower().split()
+        tree[words[0]].append((words[1:], keyword))
+    return tree
 
 
 keywords = get_literals('keywords')
-keyword_regexs = dict((kw, _compile_regex(kw)) for kw in keywords)
+keyword_tree = _keyword_tree(keywords)
+
+
+def _matches_words(text, words, i, following):
+    # Whether the words after words[i] are following, separated by whitespace
+    for n, word in enumerate(following, i + 1):
+        if n >= len(words) or words[n].group().lower() != word:
+            return False
+        gap = text[words[n - 1].end():words[n].start()]
+        if not gap.isspace():
+            return False
+    return True
+
+
+def scan_keywords(text):
+    """Yields the keywords in text, in a single pass over its words. Keywords
+    made of several words match with any whitespace between them."""
+    words = list(word_regex.finditer(text))
+    for i, word in enumerate(words):
+        for following, keyword in keyword_tree.get(word.group().lower(), ()):
+            if _matches_words(text, words, i, following):
+                yield keyword
 
 
 class PrevalenceCounter(object):
-    def __init__(self):
+    # Once the keyword counts file has this many lines, it's rewritten with
+    # their sums
+    max_file_lines = 1000
+
+    def __init__(self, keyword_counts_file=None):
         self.keyword_counts = defaultdict(int)
         self.name_counts = defaultdict(int)
+        # The keyword counts are kept in this file, as lines of JSON objects
+        # with the counts they add up
+        self.keyword_counts_file = keyword_counts_file
 
     def update(self, text):
-        self.update_keywords(text)
+        counts = self.update_keywords(text)
         self.update_names(text)
+        if counts and self.keyword_counts_file:
+            self._append_keyword_counts(counts)
 
     def update_names(self, text):
         for parsed in sqlparse.parse(text):
@@ -38,14 +77,109 @@ class PrevalenceCounter(object):
         self.name_counts = defaultdict(int)
 
     def update_keywords(self, text):
-        # Count keywords. Can't rely for sqlparse for this, because it's
-        # database agnostic
-        for keyword, regex in keyword_regexs.items():
-            for _ in regex.finditer(text):
-                self.keyword_counts[keyword] += 1
+        """Counts the keywords in text, returning the counts added."""
+        # Can't rely for sqlparse for this, because it's database agnostic
+        counts = defaultdict(int)
+        for keyword in scan_keywords(text):
+            counts[keyword] += 1
+        for keyword, count in counts.items():
+            self.keyword_counts[keyword] += count
+        return counts
 
     def keyword_count(self, keyword):
         return self.keyword_counts[keyword]
 
     def name_count(self, name):
         return self.name_counts[name]
+
+    def load_keyword_counts(self):
+        """Adds the keyword counts from the keyword counts file, returning
+        False if it couldn't be read."""
+        try:
+            counts, lines = _read_keyword_counts(self.keyword_counts_file)
+        except (IOError, OSError) as e:
+            if getattr(e, 'errno', None) != errno.ENOENT:
+                _logger.error('Error reading keyword counts %r: %r',
+                              self.keyword_counts_file, e)
+            return False
+        except (ValueError, AttributeError, TypeError) as e:
+            _logger.error('Invalid keyword counts %r: %r',
+                          self.keyword_counts_file, e)
+            return False
+
+        for keyword, count in counts.items():
+            self.keyword_counts[keyword] += count
+        if lines > self.max_file_lines:
+            self.compact_keyword_counts()
+        return True
+
+    def compact_keyword_counts(self):
+        """Replaces the lines of the keyword counts file with their sums.
+
+        The file is moved aside to be summed, so that the counts other pgcli
+        instances append meanwhile go to a new file, which the sums are then
+        appended to.
+        """
+        path = self.keyword_counts_file
+        aside = '{0}.{1}.compact'.format(path, os.getpid())
+        try:
+            os.rename(path, aside)
+        except OSError as e:
+            # Another instance may be compacting it
+            if e.errno != errno.ENOENT:
+                _logger.error('Error compacting keyword counts %r: %r',
+                              path, e)
+            return
+        try:
+            counts, _ = _read_keyword_counts(aside)
+        except (IOError, OSError, ValueError, AttributeError, TypeError) as e:
+            _logger.error('Error compacting keyword counts %r: %r', path, e)
+            return
+        self._append_keyword_counts(counts)
+        try:
+            os.remove(aside)
+        except OSError as e:
+            _logger.error('Error removing keyword counts %r: %r', aside, e)
+
+    def save_keyword_counts(self):
+        """Writes all the keyword counts to the keyword counts file."""
+        path = self.keyword_counts_file
+        tmp_path = path + '.tmp'
+        try:
+            with io.open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(_json_line(self.keyword_counts))
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # os.rename doesn't replace files on Windows
+                os.remove(path)
+                os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            _logger.error('Error writing keyword counts %r: %r', path, e)
+
+    def _append_keyword_counts(self, counts):
+        try:
+            with io.open(self.keyword_counts_file, 'a', encoding='utf-8') as f:
+                f.write(_json_line(counts))
+        except (IOError, OSError) as e:
+            _logger.error('Error writing keyword counts %r: %r',
+                          self.keyword_counts_file, e)
+
+
+def _read_keyword_counts(path):
+    """Returns the sums of the keyword counts in the file at path, and its
+    number of lines."""
+    counts = defaultdict(int)
+    lines = 0
+    with io.open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            lines += 1
+            for keyword, count in json.loads(line).items():
+                counts[keyword] += count
+    return counts, lines
+
+
+def _json_line(counts):
+    return u'{0}\n'.format(json.dumps(dict(counts), sort_keys=True))
@@ -1,9 +1,10 @@
 from __future__ import print_function, unicode_literals
+import heapq
 import logging
 import re
 from itertools import count, repeat, chain
 import operator
-from collections import namedtuple, defaultdict, OrderedDict
+from collections import namedtuple, defaultdict, OrderedDict, Counter
 from pgspecial.namedqueries import NamedQueries
 from prompt_toolkit.completion import Completer, Completion
 from prompt_toolkit.contrib.completers import PathCompleter
@@ -16,6 +17,8 @@ from .packages.parseutils.utils import last_word
 from .packages.parseutils.tables import TableReference
 from .packages.pgliterals.main import get_literals
 from .packages.prioritization import PrevalenceCounter
+from .packages.nameindex import NameIndex
+from .encodingutils import text_type
 from .config import load_config, config_location
 
 _logger = logging.getLogger(__name__)
@@ -52,6 +55,68 @@ arg_default_type_strip_regex = re.compile(r'::[\w\.]+(\[\])?$')
 
 normalize_ref = lambda ref: ref if ref[0] == '"' else '"' + ref.lower() +  '"'
 
+# Characters that continue the identifier being typed
+identifier_chars_regex = re.compile(r'^[\w$]+$', re.UNICODE)
+
+
+def _mentions(obj, word):
+    """Whether `word` is one of the names in the (nested) tuple `obj`."""
+    if isinstance(obj, text_type):
+        return obj.lower() == word
+    if isinstance(obj, (tuple, list)):
+        return any(_mentions(o, word) for o in obj)
+    return False
+
+
+class CompletionSession(object):
+    """The completions computed for a buffer, kept so that they can be
+    narrowed down while the user keeps typing the same word.
+
+    As long as the word only grows, every match is one of the previous
+    matches (fuzzy matches are subsequence matches, strict ones prefix
+    matches), and the suggestions don't change.
+    """
+
+    def __init__(self, document, word_before_cursor, suggestions):
+        self.text_before_cursor = document.text_before_cursor
+        self.text_after_cursor = document.text_after_cursor
+        self.word = word_before_cursor
+        self.suggestions = suggestions
+        # Lowercased texts of all the completions found, before
+        # max_completions was applied
+        self.matches = None
+        # {kind: names of the dbmetadata objects that can match the word}
+        self.names = {}
+        # The session narrowed down, while computing these completions
+        self.previous = None
+
+    def is_continued_by(self, document, word_before_cursor):
+        """Whether `document` only adds to the end of the word that was
+        completed."""
+        word = self.word
+        if (not word or self.matches is None
+                or word[0] == '\\' or not identifier_chars_regex.match(word[-1])
+                or document.text_after_cursor != self.text_after_cursor
+                or not word_before_cursor.startswith(word)
+                or not document.text_before_cursor.startswith(
+                    self.text_before_cursor)):
+            return False
+        added = word_before_cursor[len(word):]
+        if not added or not identifier_chars_regex.match(added):
+            return False
+        # pg_ objects are hidden until the word starts with pg_
+        if word_before_cursor.startswith('pg_') != word.startswith('pg_'):
+            return False
+        # The word is parsed as part of the statement too, e.g. as a table
+        # name or alias, or a keyword, so suggestions depending on it
+        # would go stale
+        word = word.lower().strip('"')
+        if word.upper() in PGCompleter.keywords or any(
+                _mentions(s, word) for s in self.suggestions):
+            return False
+        return True
+
+
 def generate_alias(tbl):
     """ Generate a table alias, consisting of all upper-case letters in
     the table name, or, if there are no upper-case letters, the first letter +
@@ -75,8 +140,9 @@ class PGCompleter(Completer):
         super(PGCompleter, self).__init__()
         self.smart_completion = smart_completion
         self.pgspecial = pgspecial
-        self.prioritizer = PrevalenceCounter()
         settings = settings or {}
+        self.prioritizer = PrevalenceCounter(
+            settings.get('keyword_counts_file'))
         self.signature_arg_style = settings.get(
             'signature_arg_style', '{arg_name} {arg_type}'
         )
@@ -101,6 +167,9 @@ class PGCompleter(Completer):
             'qualify_columns', 'if_more_than_one_table')
         self.asterisk_column_order = settings.get(
             'asterisk_column_order', 'table_order')
+        # Only the best max_completions matches are returned; 0 or None
+        # returns all of them
+        self.max_completions = settings.get('max_completions')
 
         keyword_casing = settings.get('keyword_casing', 'upper').lower()
         if keyword_casing not in ('upper', 'lower', 'auto'):
@@ -115,6 +184,12 @@ class PGCompleter(Completer):
         self.casing = {}
 
         self.all_completions = set(self.keywords + self.functions)
+        self._reset_name_indexes()
+        # How many relations have a column of each name
+        self._column_counts = Counter()
+
+        self._completion_session = None
+        self._active_session = None
 
     def escape_name(self, name):
         if name and ((not self.name_pattern.match(name))
@@ -137,12 +212,26 @@ class PGCompleter(Completer):
     def escaped_names(self, names):
         return [self.escape_name(name) for name in names]
 
+    def _reset_name_indexes(self):
+        # Names of the objects in dbmetadata, by kind, for narrowing fuzzy
+        # matching, and all_completions, for the prefix matching done when
+        # smart completion is off
+        self._name_indexes = dict(
+            (kind, NameIndex()) for kind in self.dbmetadata)
+        self._completion_index = NameIndex(self.all_completions)
+
+    def _add_completions(self, words):
+        self.all_completions.update(words)
+        self._completion_index.update(words)
+        # The completions found so far may be incomplete now
+        self._completion_session = None
+
     def extend_database_names(self, databases):
         self.databases.extend(databases)
 
     def extend_keywords(self, additional_keywords):
         self.keywords.extend(additional_keywords)
-        self.all_completions.update(additional_keywords)
+        self._add_completions(additional_keywords)
 
     def extend_schemata(self, schemata):
 
@@ -157,7 +246,7 @@ class PGCompleter(Completer):
             for schema in schemata:
                 metadata[schema] = {}
 
-        self.all_completions.update(schemata)
+        self._add_completions(schemata)
 
     def extend_casing(self, words):
         """ extend casing data
@@ -166,6 +255,7 @@ class PGCompleter(Completer):
         """
         # casing should be a dict {lowercasename:PreferredCasingName}
         self.casing = dict((word.lower(), word) for word in words)
+        self._completion_session = None
 
     def extend_relations(self, data, kind):
         """extend metadata for tables or views.
@@ -182,13 +272,16 @@ class PGCompleter(Completer):
         # dbmetadata['tables']['schema_name']['table_name'] should be an
         # OrderedDict {column_name:ColumnMetaData}.
         metadata = self.dbmetadata[kind]
+        index = self._name_indexes[kind]
         for schema, relname in data:
             try:
                 metadata[schema][relname] = OrderedDict()
             except KeyError:
                 _logger.error('%r %r listed in unrecognized schema %r',
                               kind, relname, schema)
-            self.all_completions.add(relname)
+            else:
+                index.add(relname)
+        self._add_completions(relname for schema, relname in data)
 
     def extend_columns(self, column_data, kind):
         """extend column metadata.
@@ -201,6 +294,7 @@ class PGCompleter(Completer):
 
         """
         metadata = self.dbmetadata[kind]
+        colnames = set()
         for schema, relname, colname, datatype, has_default, default in column_data:
             (schema, relname, colname) = self.escaped_names(
                 [schema, relname, colname])
@@ -211,7 +305,66 @@ class PGCompleter(Completer):
                 default=default
             )
             metadata[schema][relname][colname] = column
-            self.all_completions.add(colname)
+            colnames.add(colname)
+            self._column_counts[colname] += 1
+        self._add_completions(colnames)
+
+    def remove_relations(self, relations):
+        """remove tables and views, with their columns, and the foreign keys
+        from or to them.
+
+        :param relations: list of (schema_name, rel_name) tuples, with
+            schema_name None for relations in any schema of the search path
+
+        :return:
+
+        """
+        removed = set()
+        names = set()
+        linked = set()
+        for schema, relname in relations:
+            relname = self.escape_name(relname)
+            schemas = (self.search_path if schema is None
+                       else [self.escape_name(schema)])
+            for schema in schemas:
+                for kind in ('tables', 'views'):
+                    columns = self.dbmetadata[kind].get(schema, {}).pop(
+                        relname, None)
+                    if columns is None:
+                        continue
+                    removed.add((schema, relname))
+                    names.add(relname)
+                    for column in columns.values():
+                        self._column_counts[column.name] -= 1
+                        names.add(column.name)
+                        for fk in column.foreignkeys:
+                            linked.add((fk.parentschema, fk.parenttable))
+                            linked.add((fk.childschema, fk.childtable))
+                    if not any(relname in rels
+                               for rels in self.dbmetadata[kind].values()):
+                        self._name_indexes[kind].discard(relname)
+
+        # Drop the foreign keys to the removed relations from the ones left
+        tables = self.dbmetadata['tables']
+        for schema, relname in linked - removed:
+            for column in tables.get(schema, {}).get(relname, {}).values():
+                column.foreignkeys[:] = [
+                    fk for fk in column.foreignkeys
+                    if (fk.parentschema, fk.parenttable) not in removed and
+                    (fk.childschema, fk.childtable) not in removed]
+
+        for name in names:
+            if not self._is_completed_name(name):
+                self.all_completions.discard(name)
+                self._completion_index.discard(name)
+        self._completion_session = None
+
+    def _is_completed_name(self, name):
+        # Whether name is still the name of something in all_completions
+        return (name in self.keywords or name in self.functions or
+                name in self.dbmetadata['tables'] or
+                self._column_counts[name] > 0 or
+                any(name in index for index in self._name_indexes.values()))
 
     def extend_functions(self, func_data):
 
@@ -220,6 +373,7 @@ class PGCompleter(Completer):
         # dbmetadata['schema_name']['functions']['function_name'] should return
         # the function metadata namedtuple for the corresponding function
         metadata = self.dbmetadata['functions']
+        index = self._name_indexes['functions']
 
         for f in func_data:
             schema, func = self.escaped_names([f.schema_name, f.func_name])
@@ -229,7 +383,8 @@ class PGCompleter(Completer):
             else:
                 metadata[schema][func] = [f]
 
-            self.all_completions.add(func)
+            index.add(func)
+            self._add_completions([func])
 
         self._refresh_arg_list_cache()
 
@@ -275,11 +430,13 @@ class PGCompleter(Completer):
         # metadata, such as composite type field names. Currently, we're not
         # storing any metadata beyond typename, so just store None
         meta = self.dbmetadata['datatypes']
+        index = self._name_indexes['datatypes']
 
         for t in type_data:
             schema, type_name = self.escaped_names(t)
             meta[schema][type_name] = None
-            self.all_completions.add(type_name)
+            index.add(type_name)
+            self._add_completions([type_name])
 
     def extend_query_history(self, text, is_init=False):
         if is_init:
@@ -299,6 +456,39 @@ class PGCompleter(Completer):
         self.dbmetadata = {'tables': {}, 'views': {}, 'functions': {},
                            'datatypes': {}}
         self.all_completions = set(self.keywords + self.functions)
+        self._reset_name_indexes()
+        self._column_counts = Counter()
+        self._completion_session = None
+
+    def _match_text(self, word_before_cursor):
+        # The part of the input find_matches matches against
+        text = last_word(word_before_cursor, include='most_punctuations')
+        text = text.lower()
+        return text[1:] if text[:1] == '"' else text
+
+    def _names_matching(self, kind, word_before_cursor):
+        """Returns the names of `kind` objects that can fuzzy match the
+        input, or None if there is no input to narrow them by.
+
+        :param kind: one of the dbmetadata keys, e.g. 'tables'
+
+        """
+        text = self._match_text(word_before_cursor)
+        if not text:
+            return None
+        session = self._active_session
+        previous = session and session.previous
+        names = previous and previous.names.get(kind)
+        if names is None:
+            names = self._name_indexes[kind].containing(text)
+        else:
+            # Keep the names the text is (still) a subsequence of
+            pat = re.compile('.*?'.join(map(re.escape, text)))
+            names = set(name for name in names
+                        if pat.search(self.unescape_name(name.lower())))
+        if session:
+            session.names[kind] = names
+        return names
 
     def find_matches(self, text, collection, mode='fuzzy', meta=None):
         """Find completion matches for the given text.
@@ -334,6 +524,12 @@ class PGCompleter(Completer):
             # Completion.position value is correct
             text = text[1:]
 
+        # While the user keeps typing the same word, only what matched before
+        # can match
+        session = self._active_session
+        previous = session and session.previous
+        narrowed_to = previous and previous.matches
+
         if mode == 'fuzzy':
             fuzzy = True
             priority_func = self.prioritizer.name_count
@@ -372,6 +568,10 @@ class PGCompleter(Completer):
 
         matches = []
         for cand in collection:
+            if narrowed_to is not None and self.case(
+                    cand[0] if isinstance(cand, _Candidate) else cand
+            ).lower() not in narrowed_to:
+                continue
             if isinstance(cand, _Candidate):
                 item, prio, display_meta, synonyms, prio2, display = cand
                 if display_meta is None:
@@ -433,26 +633,51 @@ class PGCompleter(Completer):
         # If smart_completion is off then match any word that starts with
         # 'word_before_cursor'.
         if not smart_completion:
-            matches = self.find_matches(word_before_cursor, self.all_completions,
+            words = self._completion_index.startingwith(
+                self._match_text(word_before_cursor))
+            matches = self.find_matches(word_before_cursor, words,
                                         mode='strict')
             completions = [m.completion for m in matches]
             return sorted(completions, key=operator.attrgetter('text'))
 
-        matches = []
-        suggestions = suggest_type(document.text, document.text_before_cursor)
-
-        for suggestion in suggestions:
-            suggestion_type = type(suggestion)
-            _logger.debug('Suggestion type: %r', suggestion_type)
-
-            # Map suggestion type to method
-            # e.g. 'table' -> self.get_table_matches
-            matcher = self.suggestion_matchers[suggestion_type]
-            matches.extend(matcher(self, suggestion, word_before_cursor))
+        # Narrow down the previous completions if the user is still typing
+        # the same word, otherwise start over
+        previous = self._completion_session
+        if previous and previous.is_continued_by(document, word_before_cursor):
+            suggestions = previous.suggestions
+        else:
+            previous = None
+            suggestions = suggest_type(document.text,
+                                       document.text_before_cursor)
+        session = CompletionSession(document, word_before_cursor, suggestions)
+        session.previous = previous
 
-        # Sort matches so highest priorities are first
-        matches = sorted(matches, key=operator.attrgetter('priority'),
-                         reverse=True)
+        matches = []
+        self._active_session = session
+        try:
+            for suggestion in suggestions:
+                suggestion_type = type(suggestion)
+                _logger.debug('Suggestion type: %r', suggestion_type)
+
+                # Map suggestion type to method
+                # e.g. 'table' -> self.get_table_matches
+                matcher = self.suggestion_matchers[suggestion_type]
+                matches.extend(matcher(self, suggestion, word_before_cursor))
+        finally:
+            self._active_session = None
+
+        session.previous = None
+        session.matches = set(m.completion.text.lower() for m in matches)
+        self._completion_session = session
+
+        # Sort matches so highest priorities are first, keeping only the
+        # best ones if there are too many
+        priority = operator.attrgetter('priority')
+        if self.max_completions and len(matches) > self.max_completions:
+            matches = heapq.nlargest(self.max_completions, matches,
+                                     key=priority)
+        else:
+            matches = sorted(matches, key=priority, reverse=True)
 
         return [m.completion for m in matches]
 
@@ -650,9 +875,10 @@ class PGCompleter(Completer):
         }.get(suggestion.usage, 'call')
         # Function overloading means we way have multiple functions of the same
         # name at this point, so keep unique names only
+        names = self._names_matching('functions', word_before_cursor)
         funcs = set(
             self._make_cand(f, alias, suggestion, arg_mode)
-            for f in self.populate_functions(suggestion.schema, filt)
+            for f in self.populate_functions(suggestion.schema, filt, names)
         )
 
         matches = self.find_matches(word_before_cursor, funcs, meta='function')
@@ -767,7 +993,9 @@ class PGCompleter(Completer):
         return Candidate(item, synonyms=synonyms, prio2=prio2, display=display)
 
     def get_table_matches(self, suggestion, word_before_cursor, alias=False):
-        tables = self.populate_schema_objects(suggestion.schema, 'tables')
+        names = self._names_matching('tables', word_before_cursor)
+        tables = self.populate_schema_objects(
+            suggestion.schema, 'tables', names)
         tables.extend(SchemaObject(tbl.name) for tbl in suggestion.local_tables)
 
         # Unless we're sure the user really wants them, don't suggest the
@@ -780,7 +1008,8 @@ class PGCompleter(Completer):
 
 
     def get_view_matches(self, suggestion, word_before_cursor, alias=False):
-        views = self.populate_schema_objects(suggestion.schema, 'views')
+        names = self._names_matching('views', word_before_cursor)
+        views = self.populate_schema_objects(suggestion.schema, 'views', names)
 
         if not suggestion.schema and (
                 not word_before_cursor.startswith('pg_')):
@@ -838,7 +1067,9 @@ class PGCompleter(Completer):
 
     def get_datatype_matches(self, suggestion, word_before_cursor):
         # suggest custom datatypes
-        types = self.populate_schema_objects(suggestion.schema, 'datatypes')
+        names = self._names_matching('datatypes', word_before_cursor)
+        types = self.populate_schema_objects(
+            suggestion.schema, 'datatypes', names)
         types = [self._make_cand(t, False, suggestion) for t in types]
         matches = self.find_matches(word_before_cursor, types, meta='datatype')
 
@@ -932,10 +1163,20 @@ class PGCompleter(Completer):
     def _maybe_schema(self, schema, parent):
         return None if parent or schema in self.search_path else schema
 
-    def populate_schema_objects(self, schema, obj_type):
+    def _narrow(self, objects, names):
+        """Returns the keys of `objects` that are in `names`, or all of them
+        if `names` is None."""
+        if names is None:
+            return objects.keys()
+        if len(names) < len(objects):
+            return [name for name in names if name in objects]
+        return [name for name in objects if name in names]
+
+    def populate_schema_objects(self, schema, obj_type, names=None):
         """Returns a list of SchemaObjects representing tables or views.
 
         :param schema is the schema qualification input by the user (if any)
+        :param names is a set of object names to limit the result to (if any)
 
         """
 
@@ -945,15 +1186,17 @@ class PGCompleter(Completer):
                 schema=(self._maybe_schema(schema=sch, parent=schema))
             )
             for sch in self._get_schemas(obj_type, schema)
-            for obj in self.dbmetadata[obj_type][sch].keys()
+            for obj in self._narrow(self.dbmetadata[obj_type][sch], names)
         ]
 
-    def populate_functions(self, schema, filter_func):
+    def populate_functions(self, schema, filter_func, names=None):
         """Returns a list of function SchemaObjects.
 
         :param filter_func is a function that accepts a FunctionMetadata
         namedtuple and returns a boolean indicating whether that
         function should be kept or discarded
+        :param names is a set of function names to limit the result to (if
+        any)
 
         """
 
@@ -967,7 +1210,7 @@ class PGCompleter(Completer):
                 meta=meta
             )
             for sch in self._get_schemas('functions', schema)
-            for (func, metas) in self.dbmetadata['functions'][sch].items()
-            for meta in metas
+            for func in self._narrow(self.dbmetadata['functions'][sch], names)
+            for meta in self.dbmetadata['functions'][sch][func]
             if filter_func(meta)
         ]
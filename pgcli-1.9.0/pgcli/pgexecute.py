@@ -1,5 +1,6 @@
 import traceback
 import logging
+import re
 import psycopg2
 import psycopg2.extras
 import psycopg2.errorcodes
@@ -7,6 +8,8 @@ import psycopg2.extensions as ext
 import sqlparse
 import pgspecial as special
 import select
+import threading
+from time import time
 from psycopg2.extensions import POLL_OK, POLL_READ, POLL_WRITE
 from .packages.parseutils.meta import FunctionMetadata, ForeignKey
 from .encodingutils import unicode2utf8, PY2, utf8tounicode
@@ -29,19 +32,61 @@ ext.register_type(ext.new_type((17,), 'BYTEA_TEXT', psycopg2.STRING))
 # TODO: Get default timeout from pgclirc?
 _WAIT_SELECT_TIMEOUT = 1
 
+# Statements a server-side cursor can be declared for
+_query_regex = re.compile(r'^\(*\s*(select|values|table)\b', re.IGNORECASE)
+_into_regex = re.compile(r'\binto\b', re.IGNORECASE)
+
+
+class QueryTimer(object):
+    """Splits the time spent waiting for the results of queries on `conn`,
+    while it's being recorded, into the time until the first of the response
+    arrived (server) and the time receiving the rest of it (transfer)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.server = 0.0
+        self.transfer = 0.0
+
+    def take(self):
+        """Returns the (server, transfer) times recorded since the last
+        call."""
+        times = self.server, self.transfer
+        self.server = self.transfer = 0.0
+        return times
+
+
+_timing = threading.local()
+
+
+def start_timing(timer):
+    """Makes `timer` record the queries run from the current thread."""
+    _timing.timer = timer
+
+
+def stop_timing():
+    _timing.timer = None
+
 
 def _wait_select(conn):
     """
         copy-pasted from psycopg2.extras.wait_select
         the default implementation doesn't define a timeout in the select calls
     """
+    timer = getattr(_timing, 'timer', None)
+    if timer is not None and timer.conn is not conn:
+        timer = None
+    start = time()
+    first_read = None
     while 1:
         try:
             state = conn.poll()
             if state == POLL_OK:
                 break
             elif state == POLL_READ:
-                select.select([conn.fileno()], [], [], _WAIT_SELECT_TIMEOUT)
+                readable, _, _ = select.select(
+                    [conn.fileno()], [], [], _WAIT_SELECT_TIMEOUT)
+                if readable and first_read is None:
+                    first_read = time()
             elif state == POLL_WRITE:
                 select.select([], [conn.fileno()], [], _WAIT_SELECT_TIMEOUT)
             else:
@@ -50,6 +95,11 @@ def _wait_select(conn):
             conn.cancel()
             # the loop will be broken by a server error
             continue
+    if timer is not None:
+        end = time()
+        first_read = first_read or end
+        timer.server += first_read - start
+        timer.transfer += end - first_read
 
 
 # When running a query, make pressing CTRL+C raise a KeyboardInterrupt
@@ -58,6 +108,109 @@ def _wait_select(conn):
 ext.set_wait_callback(_wait_select)
 
 
+def is_query(sql):
+    """Returns true if the rows of sql can be read from a server-side cursor.
+    SELECT INTO creates a table, so it can't be."""
+    return bool(_query_regex.match(sql) and not _into_regex.search(sql))
+
+
+class ServerCursor(object):
+    """The rows of a query, read in batches from a server-side cursor, so
+    that only one batch is held in memory at a time, unless more are read
+    ahead.
+
+    The cursor is opened in a transaction of its own if none is in progress,
+    and closed once all the rows have been read, or when reading them stops
+    early.
+    """
+
+    name = 'pgcli_rows'
+
+    def __init__(self, conn, sql, fetch_count):
+        self.conn = conn
+        self.fetch_count = fetch_count
+        self.description = None
+        self.rowcount = -1
+        # Like that of a client-side cursor once all the rows have been read
+        self.statusmessage = None
+        self.closed = False
+        self._own_transaction = (conn.get_transaction_status() ==
+                                 ext.TRANSACTION_STATUS_IDLE)
+        try:
+            with conn.cursor() as cur:
+                if self._own_transaction:
+                    cur.execute('BEGIN')
+                cur.execute('DECLARE {0} NO SCROLL CURSOR FOR {1}'.format(
+                    self.name, sql))
+            # Read the first batch right away, for the description
+            self._batches = [self._fetch()]
+        except BaseException:
+            self.close()
+            raise
+
+    def _fetch(self):
+        with self.conn.cursor() as cur:
+            cur.execute('FETCH FORWARD %s FROM {0}'.format(self.name),
+                        [self.fetch_count])
+            self.description = cur.description
+            return cur.fetchall()
+
+    def read_ahead(self, count):
+        """Reads batches before they're yielded until more than count rows
+        have been read, or all of them. Returns the number of rows read."""
+        read = sum(len(batch) for batch in self._batches)
+        while (read <= count and self._batches and
+               len(self._batches[-1]) == self.fetch_count):
+            batch = self._fetch()
+            if not batch:
+                break
+            self._batches.append(batch)
+            read += len(batch)
+        return read
+
+    def batches(self):
+        """Yields the rows in lists of up to fetch_count rows. The first
+        list is empty if there are no rows."""
+        count = 0
+        try:
+            while self._batches:
+                batch = self._batches.pop(0)
+                count += len(batch)
+                yield batch
+                if not self._batches and len(batch) == self.fetch_count:
+                    batch = self._fetch()
+                    if batch:
+                        self._batches.append(batch)
+            self.rowcount = count
+            self.statusmessage = 'SELECT {0}'.format(count)
+        finally:
+            self.close()
+
+    def __iter__(self):
+        for batch in self.batches():
+            for row in batch:
+                yield row
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._batches = []
+        if self.conn.closed:
+            return
+        status = self.conn.get_transaction_status()
+        try:
+            with self.conn.cursor() as cur:
+                if self._own_transaction:
+                    cur.execute('ROLLBACK'
+                                if status == ext.TRANSACTION_STATUS_INERROR
+                                else 'COMMIT')
+                elif status == ext.TRANSACTION_STATUS_INTRANS:
+                    cur.execute('CLOSE {0}'.format(self.name))
+        except psycopg2.Error as e:
+            _logger.error('Error closing the server-side cursor: %r', e)
+
+
 def register_date_typecasters(connection):
     """
     Casts date and timestamp values to string, resolves issues with out of
@@ -139,8 +292,36 @@ class PGExecute(object):
                 LEFT JOIN pg_catalog.pg_namespace n
                     ON n.oid = c.relnamespace
         WHERE   c.relkind = ANY(%s)
+                AND (%s::oid[] IS NULL OR c.oid = ANY(%s::oid[]))
         ORDER BY 1,2;'''
 
+    relation_oids_query = '''
+        WITH RECURSIVE relations AS (
+            SELECT  c.oid
+            FROM    pg_catalog.pg_class c
+                    INNER JOIN pg_catalog.pg_namespace n
+                        ON n.oid = c.relnamespace
+                    INNER JOIN (
+                        SELECT  (%(schemas)s::text[])[i] AS nspname,
+                                (%(names)s::text[])[i] AS relname
+                        FROM    generate_subscripts(%(names)s::text[], 1) i
+                    ) r ON r.relname = c.relname
+            WHERE   n.nspname = r.nspname
+                    OR r.nspname IS NULL
+                        AND n.nspname = ANY(current_schemas(true))
+            UNION
+            SELECT  i.inhrelid
+            FROM    pg_catalog.pg_inherits i
+                    INNER JOIN relations r
+                        ON i.inhparent = r.oid
+        )
+        SELECT  r.oid, n.nspname, c.relname
+        FROM    relations r
+                INNER JOIN pg_catalog.pg_class c
+                    ON c.oid = r.oid
+                INNER JOIN pg_catalog.pg_namespace n
+                    ON n.oid = c.relnamespace'''
+
     databases_query = '''
         SELECT d.datname
         FROM pg_catalog.pg_database d
@@ -156,6 +337,28 @@ class PGExecute(object):
         FROM pg_catalog.pg_database d
         ORDER BY 1'''
 
+    # Changes whenever objects are created, altered or dropped: any of these
+    # modifies or deletes rows of the catalogs listed here. The search path
+    # is included as it decides which objects are visible unqualified.
+    catalog_fingerprint_query = '''
+        SELECT md5(array_to_string(ARRAY[
+            current_schemas(true)::text,
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_namespace),
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_class),
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_attribute),
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_constraint),
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_proc),
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_type),
+            (SELECT count(*) || ':' || coalesce(max(xmin::text::bigint), 0)
+             FROM pg_catalog.pg_database)
+        ], ','))'''
+
     socket_directory_query = '''
         SELECT setting
         FROM pg_settings
@@ -170,6 +373,7 @@ class PGExecute(object):
         self.port = port
         self.dsn = dsn
         self.extra_args = {k: unicode2utf8(v) for k, v in kwargs.items()}
+        self.server_cursor = None
         self.connect()
 
     def connect(self, database=None, user=None, password=None, host=None,
@@ -272,7 +476,7 @@ class PGExecute(object):
 
 
     def run(self, statement, pgspecial=None, exception_formatter=None,
-            on_error_resume=False):
+            on_error_resume=False, fetch_count=0):
         """Execute the sql in the database and return the results.
 
         :param statement: A string containing one or more sql statements
@@ -284,18 +488,30 @@ class PGExecute(object):
         :param on_error_resume: Bool. If true, queries following an exception
                (assuming exception_formatter has been supplied) continue to
                execute.
+        :param fetch_count: Int. If set, and the statement is a single query,
+               its rows are returned as a ServerCursor reading them in batches
+               of this many rows, instead of all at once.
 
         :return: Generator yielding tuples containing
                  (title, rows, headers, status, query, success)
         """
 
+        # The rows of a previous query may not have all been read
+        if self.server_cursor:
+            self.server_cursor.close()
+            self.server_cursor = None
+
         # Remove spaces and EOL
         statement = statement.strip()
         if not statement:  # Empty string
             yield (None, None, None, None, statement, False)
 
         # Split the sql into separate queries and run each one.
-        for sql in sqlparse.split(statement):
+        statements = sqlparse.split(statement)
+        # Only the rows of a single query are read as they're shown, since the
+        # statements following it would run in its transaction
+        stream = fetch_count and len(statements) == 1
+        for sql in statements:
             # Remove spaces, eol and semi-colons.
             sql = sql.rstrip(';')
 
@@ -316,7 +532,11 @@ class PGExecute(object):
                         pass
 
                 # Not a special command, so execute as normal sql
-                yield self.execute_normal_sql(sql) + (sql, True)
+                if stream and is_query(sql):
+                    yield self.execute_streaming_sql(sql, fetch_count) + (
+                        sql, True)
+                else:
+                    yield self.execute_normal_sql(sql) + (sql, True)
             except psycopg2.DatabaseError as e:
                 _logger.error("sql: %r, error: %r", sql, e)
                 _logger.error("traceback: %r", traceback.format_exc())
@@ -368,6 +588,21 @@ class PGExecute(object):
             _logger.debug('No rows in result.')
             return title, None, None, cur.statusmessage
 
+    def execute_streaming_sql(self, split_sql, fetch_count):
+        """Returns tuple (title, rows, headers, status), with rows a
+        ServerCursor. The status is only known once the rows have been read,
+        as the cursor's statusmessage."""
+        _logger.debug('Streaming sql statement. sql: %r', split_sql)
+        cur = self.server_cursor = ServerCursor(self.conn, split_sql,
+                                                fetch_count)
+
+        title = ''
+        while len(self.conn.notices) > 0:
+            title = utf8tounicode(self.conn.notices.pop()) + title
+
+        headers = [x[0] for x in cur.description]
+        return title, cur, headers, None
+
     def search_path(self):
         """Returns the current search path as a list of schema names"""
 
@@ -392,43 +627,61 @@ class PGExecute(object):
             cur.execute(self.schemata_query)
             return [x[0] for x in cur.fetchall()]
 
-    def _relations(self, kinds=('r', 'v', 'm')):
+    def _relations(self, kinds=('r', 'v', 'm'), oids=None):
         """Get table or view name metadata
 
         :param kinds: list of postgres relkind filters:
                 'r' - table
                 'v' - view
                 'm' - materialized view
+        :param oids: only list the relations with these oids
         :return: (schema_name, rel_name) tuples
         """
 
         with self.conn.cursor() as cur:
-            sql = cur.mogrify(self.tables_query, [kinds])
+            sql = cur.mogrify(self.tables_query, [kinds, oids, oids])
             _logger.debug('Tables Query. sql: %r', sql)
             cur.execute(sql)
             for row in cur:
                 yield row
 
-    def tables(self):
+    def tables(self, oids=None):
         """Yields (schema_name, table_name) tuples"""
-        for row in self._relations(kinds=['r']):
+        for row in self._relations(kinds=['r'], oids=oids):
             yield row
 
-    def views(self):
+    def views(self, oids=None):
         """Yields (schema_name, view_name) tuples.
 
             Includes both views and and materialized views
         """
-        for row in self._relations(kinds=['v', 'm']):
+        for row in self._relations(kinds=['v', 'm'], oids=oids):
             yield row
 
-    def _columns(self, kinds=('r', 'v', 'm')):
+    def relation_oids(self, relations):
+        """Looks up relations and the tables inheriting from them
+
+        :param relations: (schema_name, rel_name) tuples, with schema_name
+                None for relations in the search path
+        :return: (oid, schema_name, rel_name) tuples
+        """
+        schemas = [schema for schema, name in relations]
+        names = [name for schema, name in relations]
+        with self.conn.cursor() as cur:
+            sql = cur.mogrify(self.relation_oids_query,
+                              {'schemas': schemas, 'names': names})
+            _logger.debug('Relation oids Query. sql: %r', sql)
+            cur.execute(sql)
+            return cur.fetchall()
+
+    def _columns(self, kinds=('r', 'v', 'm'), oids=None):
         """Get column metadata for tables and views
 
         :param kinds: kinds: list of postgres relkind filters:
                 'r' - table
                 'v' - view
                 'm' - materialized view
+        :param oids: only list the columns of the relations with these oids
         :return: list of (schema_name, relation_name, column_name, column_type) tuples
         """
 
@@ -449,6 +702,7 @@ class PGExecute(object):
                             ON def.adrelid = att.attrelid
                             AND def.adnum = att.attnum
                 WHERE   cls.relkind = ANY(%s)
+                        AND (%s::oid[] IS NULL OR cls.oid = ANY(%s::oid[]))
                         AND NOT att.attisdropped
                         AND att.attnum  > 0
                 ORDER BY 1, 2, att.attnum'''
@@ -468,23 +722,24 @@ class PGExecute(object):
                         INNER JOIN pg_catalog.pg_type typ
                             ON typ.oid = att.atttypid
                 WHERE   cls.relkind = ANY(%s)
+                        AND (%s::oid[] IS NULL OR cls.oid = ANY(%s::oid[]))
                         AND NOT att.attisdropped
                         AND att.attnum  > 0
                 ORDER BY 1, 2, att.attnum'''
 
         with self.conn.cursor() as cur:
-            sql = cur.mogrify(columns_query, [kinds])
+            sql = cur.mogrify(columns_query, [kinds, oids, oids])
             _logger.debug('Columns Query. sql: %r', sql)
             cur.execute(sql)
             for row in cur:
                 yield row
 
-    def table_columns(self):
-        for row in self._columns(kinds=['r']):
+    def table_columns(self, oids=None):
+        for row in self._columns(kinds=['r'], oids=oids):
             yield row
 
-    def view_columns(self):
-        for row in self._columns(kinds=['v', 'm']):
+    def view_columns(self, oids=None):
+        for row in self._columns(kinds=['v', 'm'], oids=oids):
             yield row
 
     def databases(self):
@@ -501,6 +756,15 @@ class PGExecute(object):
             headers = [x[0] for x in cur.description]
             return cur.fetchall(), headers, cur.statusmessage
 
+    def catalog_fingerprint(self):
+        """Returns a string that changes whenever the metadata used for
+        completions may have changed"""
+        with self.conn.cursor() as cur:
+            _logger.debug('Catalog fingerprint Query. sql: %r',
+                          self.catalog_fingerprint_query)
+            cur.execute(self.catalog_fingerprint_query)
+            return cur.fetchone()[0]
+
     def get_socket_directory(self):
         with self.conn.cursor() as cur:
             _logger.debug('Socket directory Query. sql: %r',
@@ -509,8 +773,12 @@ class PGExecute(object):
             result = cur.fetchone()
             return result[0] if result else ''
 
-    def foreignkeys(self):
-        """Yields ForeignKey named tuples"""
+    def foreignkeys(self, oids=None):
+        """Yields ForeignKey named tuples
+
+        :param oids: only list the foreign keys from or to the relations with
+                     these oids
+        """
 
         if self.conn.server_version < 90000:
             return
@@ -542,8 +810,12 @@ class PGExecute(object):
                 JOIN pg_catalog.pg_namespace  s_p ON s_p.oid = t_p.relnamespace
                 JOIN pg_catalog.pg_class      t_c ON t_c.oid = fk.conrelid
                 JOIN pg_catalog.pg_namespace  s_c ON s_c.oid = t_c.relnamespace
-                WHERE fk.contype = 'f';
+                WHERE fk.contype = 'f'
+                      AND (%s::oid[] IS NULL
+                           OR fk.conrelid = ANY(%s::oid[])
+                           OR fk.confrelid = ANY(%s::oid[]));
                 '''
+            query = cur.mogrify(query, [oids, oids, oids])
             _logger.debug('Functions Query. sql: %r', query)
             cur.execute(query)
             for row in cur:
@@ -0,0 +1,145 @@
+from __future__ import unicode_literals
+import datetime as dt
+import io
+import json
+import logging
+import os
+from time import time
+
+from .pgexecute import QueryTimer
+
+_logger = logging.getLogger(__name__)
+
+
+class StatementTiming(object):
+    """The time a statement spent in each phase, in seconds: server (until the
+    first of its results arrived), transfer (receiving the rest of them) and
+    format (formatting them for display), with its row count and the size
+    of its output in bytes."""
+
+    def __init__(self, sql, server=0.0, transfer=0.0):
+        self.sql = sql
+        self.server = server
+        self.transfer = transfer
+        self.format = 0.0
+        self.rows = None
+        self.bytes = 0
+
+    @property
+    def total(self):
+        return self.server + self.transfer + self.format
+
+    def as_dict(self):
+        return {'sql': self.sql, 'server': self.server,
+                'transfer': self.transfer, 'format': self.format,
+                'rows': self.rows, 'bytes': self.bytes}
+
+
+class CommandTiming(object):
+    """Breaks down the time taken by the statements of a command, and the time
+    its output took to display.
+
+    The server and transfer times are recorded by the timer, which has to be
+    started on the thread running the statements.
+    """
+
+    def __init__(self, conn):
+        self.timer = QueryTimer(conn)
+        self.statements = []
+        self.display = 0.0
+        self._display_start = None
+        self._measured = 0.0
+
+    def add_statement(self, sql):
+        """Starts the timing of a statement, which takes the server and
+        transfer times recorded since the previous one."""
+        timing = StatementTiming(sql, *self.timer.take())
+        self.statements.append(timing)
+        return timing
+
+    def measure_format(self, timing, format_lines, cur):
+        """Returns the lines of format_lines() as a list, adding the time it
+        took to the format time of the statement."""
+        start = time()
+        try:
+            lines = list(format_lines())
+        finally:
+            self._add_format_time(timing, time() - start)
+        for line in lines:
+            timing.bytes += len(line.encode('utf-8')) + 1
+        self._set_rows(timing, cur)
+        return lines
+
+    def measure(self, timing, lines, cur):
+        """Yields lines, adding the time spent producing them to the format
+        time of the statement. This is for lines formatted as they're shown,
+        like those of server-side cursors: the time spent meanwhile reading
+        rows from the server goes to its server and transfer times."""
+        lines = iter(lines)
+        while True:
+            start = time()
+            try:
+                line = next(lines)
+            except StopIteration:
+                break
+            finally:
+                self._add_format_time(timing, time() - start)
+            timing.bytes += len(line.encode('utf-8')) + 1
+            yield line
+        self._set_rows(timing, cur)
+
+    def _add_format_time(self, timing, elapsed):
+        server, transfer = self.timer.take()
+        timing.server += server
+        timing.transfer += transfer
+        timing.format += elapsed - server - transfer
+
+    def _set_rows(self, timing, cur):
+        if isinstance(cur, list):
+            # Special commands return their rows as lists
+            timing.rows = len(cur)
+        elif getattr(cur, 'rowcount', -1) >= 0:
+            timing.rows = cur.rowcount
+
+    def start_display(self):
+        self._display_start = time()
+        self._measured = sum(s.total for s in self.statements)
+
+    def end_display(self):
+        """Sets the display time, leaving out the time the statements spent
+        producing their output as it was shown."""
+        elapsed = time() - self._display_start
+        measured = sum(s.total for s in self.statements) - self._measured
+        self.display = max(elapsed - measured, 0.0)
+
+    def lines(self):
+        """Returns the lines reporting the timings."""
+        lines = []
+        for n, timing in enumerate(self.statements, 1):
+            parts = ['server %0.03fs' % timing.server,
+                     'transfer %0.03fs' % timing.transfer,
+                     'format %0.03fs' % timing.format]
+            if timing.rows is not None:
+                parts.append('%d rows' % timing.rows)
+            parts.append('%d bytes' % timing.bytes)
+            label = 'Statement %d' % n if len(self.statements) > 1 else (
+                'Statement')
+            lines.append('%s: %s' % (label, ', '.join(parts)))
+        lines.append('Display: %0.03fs' % self.display)
+        return lines
+
+    def log(self, path, text):
+        """Appends the timings of the command text to the file at path, as a
+        line of JSON."""
+        record = {
+            'time': dt.datetime.now().isoformat(),
+            'command': text,
+            'statements': [s.as_dict() for s in self.statements],
+            'display': self.display,
+        }
+        path = os.path.expanduser(path)
+        try:
+            with io.open(path, 'a', encoding='utf-8') as f:
+                f.write('{0}\n'.format(json.dumps(record, sort_keys=True)))
+        except (IOError, OSError) as e:
+            _logger.error('Error writing timings %r: %r', path, e)
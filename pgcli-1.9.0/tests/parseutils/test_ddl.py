@@ -0,0 +1,45 @@
+import pytest
+from pgcli.packages.parseutils.ddl import ddl_relations
+
+
+@pytest.mark.parametrize('sql, relations', [
+    ('CREATE TABLE foo (x int)', [(None, 'foo')]),
+    ('create table if not exists s.Foo (x int)', [('s', 'foo')]),
+    ('CREATE UNLOGGED TABLE "S"."Foo Bar" AS SELECT 1',
+        [('S', 'Foo Bar')]),
+    ('CREATE OR REPLACE VIEW v AS SELECT 1', [(None, 'v')]),
+    ('CREATE MATERIALIZED VIEW s.v AS SELECT 1', [('s', 'v')]),
+    ('CREATE RECURSIVE VIEW v (n) AS SELECT 1', [(None, 'v')]),
+    ('ALTER TABLE foo ADD COLUMN y int', [(None, 'foo')]),
+    ('ALTER TABLE IF EXISTS ONLY s.foo DROP COLUMN y', [('s', 'foo')]),
+    ('ALTER TABLE s.foo RENAME TO bar', [('s', 'foo'), ('s', 'bar')]),
+    ('ALTER VIEW v SET SCHEMA s', [(None, 'v'), ('s', 'v')]),
+    ('ALTER MATERIALIZED VIEW v RENAME COLUMN a TO b', [(None, 'v')]),
+    ('DROP VIEW v', [(None, 'v')]),
+    ('DROP VIEW IF EXISTS v, s.w RESTRICT;',
+        [(None, 'v'), ('s', 'w')]),
+    ('DROP MATERIALIZED VIEW "V"', [(None, 'V')]),
+    ('CREATE UNIQUE INDEX ON foo (x)', []),
+    ('DROP INDEX foo_x_idx', []),
+])
+def test_ddl_relations(sql, relations):
+    assert ddl_relations(sql) == relations
+
+
+@pytest.mark.parametrize('sql', [
+    'CREATE TEMP TABLE foo (x int)',
+    'CREATE SCHEMA s',
+    'CREATE FUNCTION f() RETURNS int AS $$ SELECT 1 $$ LANGUAGE sql',
+    'ALTER TYPE t ADD VALUE \'x\'',
+    'ALTER TABLE t DROP COLUMN c CASCADE',
+    'ALTER TABLE t DROP CONSTRAINT t_pkey CASCADE',
+    'DROP TABLE foo',
+    'DROP TABLE foo CASCADE',
+    'DROP VIEW v CASCADE',
+    'DROP INDEX foo_x_idx CASCADE',
+    'COMMIT',
+    'ROLLBACK',
+    'CREATE TABLE (x int)',
+])
+def test_ddl_relations_not_understood(sql):
+    assert ddl_relations(sql) is None
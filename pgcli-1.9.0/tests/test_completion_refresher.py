@@ -88,3 +88,150 @@ def test_refresh_with_callbacks(refresher):
         refresher.refresh(pgexecute, special, callbacks)
         time.sleep(1)  # Wait for the thread to work.
         assert (callbacks[0].call_count == 1)
+
+
+class CatalogExecutor(object):
+    """Answers the catalog queries made by the refreshers."""
+
+    host, port, user, dbname = 'localhost', 5432, 'user', 'db'
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.queries = []
+
+    def catalog_fingerprint(self):
+        return self.fingerprint
+
+    def __getattr__(self, name):
+        from pgcli.packages.parseutils.meta import FunctionMetadata
+        results = {
+            'search_path': ['public'],
+            'schemata': ['public'],
+            'tables': [('public', 'users')],
+            'table_columns': [('public', 'users', 'id', 'int', False, None)],
+            'foreignkeys': [],
+            'views': [],
+            'view_columns': [],
+            'datatypes': [('public', 'mood')],
+            'databases': ['db'],
+            'functions': [FunctionMetadata(
+                'public', 'func', ['x'], ['int'], None, 'int', False, False,
+                False, '1')],
+        }
+
+        def query():
+            self.queries.append(name)
+            return iter(results[name])
+        return query
+
+
+def test_refresh_uses_metadata_cache(refresher, tmpdir):
+    from pgcli.completion_refresher import CompletionRefresher
+    settings = {'single_connection': True, 'metadata_cache_dir': str(tmpdir)}
+
+    # Nothing cached yet
+    executor = CatalogExecutor('1')
+    callbacks = [Mock()]
+    refresher._bg_refresh(executor, None, callbacks, None, settings)
+    assert callbacks[0].call_count == 1
+    assert 'tables' in executor.queries
+    assert len(tmpdir.listdir()) == 1
+
+    # Unchanged database
+    executor = CatalogExecutor('1')
+    callbacks = [Mock()]
+    CompletionRefresher()._bg_refresh(executor, None, callbacks, None,
+                                      settings)
+    assert callbacks[0].call_count == 1
+    assert executor.queries == []
+    completer = callbacks[0].call_args[0][0]
+    assert 'users' in completer.dbmetadata['tables']['public']
+    assert completer.dbmetadata['functions']['public']['func'] == list(
+        CatalogExecutor('1').functions())
+    assert completer.search_path == ['public']
+
+    # Changed database: the cache is used until the refresh completes
+    executor = CatalogExecutor('2')
+    callbacks = [Mock()]
+    CompletionRefresher()._bg_refresh(executor, None, callbacks, None,
+                                      settings)
+    assert callbacks[0].call_count == 2
+    assert 'tables' in executor.queries
+
+
+def test_concurrent_refresh_hands_out_relations_early(refresher):
+    import threading
+    from pgcli.metadata_cache import CatalogPrefetch
+
+    class SlowFunctionsExecutor(CatalogExecutor):
+        functions_loaded = threading.Event()
+
+        def functions(self):
+            self.functions_loaded.wait()
+            return CatalogExecutor.__getattr__(self, 'functions')()
+
+    executors = [SlowFunctionsExecutor('1'), SlowFunctionsExecutor('1')]
+    catalog = CatalogPrefetch(executors, refresher.catalog_queries)
+    completers = []
+
+    def callback(completer):
+        completers.append(completer)
+        SlowFunctionsExecutor.functions_loaded.set()
+
+    completer = refresher._populate_completer(None, {}, catalog, None,
+                                              [callback], catalog)
+    assert len(completers) == 1
+    assert 'users' in completers[0].dbmetadata['tables']['public']
+    assert 'func' not in completers[0].dbmetadata['functions']['public']
+    assert 'users' in completer.dbmetadata['tables']['public']
+    assert 'func' in completer.dbmetadata['functions']['public']
+    assert sorted(executors[0].queries + executors[1].queries) == sorted(
+        refresher.catalog_queries)
+
+
+def test_concurrent_refresh_closes_its_connections(refresher):
+    executors = []
+
+    def pgexecute_class(*args, **kwargs):
+        executor = CatalogExecutor('1')
+        executor.conn = Mock()
+        executors.append(executor)
+        return executor
+
+    pgexecute = Mock()
+    pgexecute.extra_args = {}
+    settings = {'refresh_connections': 3}
+    with patch('pgcli.completion_refresher.PGExecute', pgexecute_class):
+        refresher._bg_refresh(pgexecute, None, [Mock()], None, settings)
+    # The refresh's own connection, and the two extra ones
+    assert [executor.conn.close.call_count for executor in executors] == [
+        0, 1, 1]
+
+
+def test_refresh_relations():
+    from pgcli.completion_refresher import refresh_relations
+    from pgcli.pgcompleter import PGCompleter
+    completer = PGCompleter()
+    completer.extend_schemata(['public'])
+    completer.set_search_path(['public'])
+    completer.extend_relations([('public', 'users'), ('public', 'old')],
+                               kind='tables')
+    completer.extend_columns([('public', 'users', 'name', 'text', False, None),
+                              ('public', 'old', 'gone', 'text', False, None)],
+                             kind='tables')
+
+    executor = Mock()
+    executor.relation_oids.return_value = [(1, 'public', 'users')]
+    executor.tables.return_value = [('public', 'users')]
+    executor.table_columns.return_value = [
+        ('public', 'users', 'id', 'int', False, None)]
+    executor.views.return_value = []
+    executor.view_columns.return_value = []
+    executor.foreignkeys.return_value = []
+    refresh_relations(completer, executor, [(None, 'users'), (None, 'old')])
+
+    executor.tables.assert_called_with([1])
+    tables = completer.dbmetadata['tables']['public']
+    assert list(tables) == ['users']
+    assert list(tables['users']) == ['id']
+    assert 'gone' not in completer.all_completions
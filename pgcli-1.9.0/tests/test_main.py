@@ -145,6 +145,124 @@ def test_format_output_auto_expand():
     assert '\n'.join(expanded_results) == '\n'.join(expanded)
 
 
+class FetchingConnection(object):
+    """Serves rows to a ServerCursor, keeping the statements run."""
+
+    closed = False
+
+    def __init__(self, rows):
+        from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+        self.rows = rows
+        self.statements = []
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def cursor(self):
+        return FetchingCursor(self)
+
+
+class FetchingCursor(object):
+    description = [('head1',), ('head2',)]
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql, params=None):
+        from psycopg2.extensions import (TRANSACTION_STATUS_IDLE,
+                                         TRANSACTION_STATUS_INTRANS)
+        self.conn.statements.append(sql.split()[0])
+        if sql == 'BEGIN':
+            self.conn.status = TRANSACTION_STATUS_INTRANS
+        elif sql == 'COMMIT':
+            self.conn.status = TRANSACTION_STATUS_IDLE
+        elif sql.startswith('FETCH'):
+            self.batch = self.conn.rows[:params[0]]
+            del self.conn.rows[:params[0]]
+
+    def fetchall(self):
+        return self.batch
+
+
+def test_format_output_from_server_cursor():
+    from pgcli.pgexecute import ServerCursor
+    conn = FetchingConnection([('abc', 'def'), ('ghi', 'jkl'), ('mno', 'p')])
+    cur = ServerCursor(conn, 'select * from t', 2)
+    assert conn.statements == ['BEGIN', 'DECLARE', 'FETCH']
+
+    settings = OutputSettings(table_format='psql', dcmlfmt='d', floatfmt='g')
+    results = format_output('Title', cur, ['head1', 'head2'], None, settings)
+    # Nothing is read before the output is
+    assert conn.statements == ['BEGIN', 'DECLARE', 'FETCH']
+    assert list(results) == [
+        'Title',
+        '+---------+---------+',
+        '| head1   | head2   |',
+        '|---------+---------|',
+        '| abc     | def     |',
+        '| ghi     | jkl     |',
+        '+---------+---------+',
+        '+---------+---------+',
+        '| head1   | head2   |',
+        '|---------+---------|',
+        '| mno     | p       |',
+        '+---------+---------+',
+        'SELECT 3'
+    ]
+    assert conn.statements == ['BEGIN', 'DECLARE', 'FETCH', 'FETCH', 'COMMIT']
+
+
+def test_format_output_from_server_cursor_auto_expand():
+    from pgcli.pgexecute import ServerCursor
+    conn = FetchingConnection([('abc', 'def'), ('ghi', 'jkl'), ('mno', 'p')])
+    cur = ServerCursor(conn, 'select * from t', 2)
+    settings = OutputSettings(table_format='psql', dcmlfmt='d', floatfmt='g',
+                              max_width=1)
+    results = format_output(None, cur, ['head1', 'head2'], None, settings)
+    assert '\n'.join(results) == '\n'.join([
+        '-[ RECORD 1 ]-------------------------',
+        'head1 | abc',
+        'head2 | def',
+        '-[ RECORD 2 ]-------------------------',
+        'head1 | ghi',
+        'head2 | jkl',
+        '-[ RECORD 3 ]-------------------------',
+        'head1 | mno',
+        'head2 | p',
+        'SELECT 3'
+    ])
+
+
+def test_server_cursor_closed_when_reading_stops():
+    from pgcli.pgexecute import ServerCursor
+    conn = FetchingConnection([('abc', 'def')] * 5)
+    cur = ServerCursor(conn, 'select * from t', 2)
+    batches = cur.batches()
+    next(batches)
+    batches.close()
+    assert conn.statements[-1] == 'COMMIT'
+    assert cur.closed
+
+
+def test_server_cursor_read_ahead():
+    from pgcli.pgexecute import ServerCursor
+    conn = FetchingConnection([('abc', 'def')] * 5)
+    cur = ServerCursor(conn, 'select * from t', 2)
+    assert cur.read_ahead(2) == 4
+    assert cur.read_ahead(10) == 5
+    assert conn.statements == ['BEGIN', 'DECLARE', 'FETCH', 'FETCH', 'FETCH']
+    # The rows read ahead are still all shown
+    assert [len(batch) for batch in cur.batches()] == [2, 2, 1]
+    assert cur.rowcount == 5
+
+
 @dbtest
 def test_i_works(tmpdir, executor):
     sqlfile = tmpdir.join("test.sql")
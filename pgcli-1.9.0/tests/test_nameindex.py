@@ -0,0 +1,32 @@
+from __future__ import unicode_literals
+from pgcli.packages.nameindex import NameIndex
+
+
+def test_containing_requires_every_character():
+    index = NameIndex(['users', '"Users"', 'orders', 'user_emails'])
+    assert index.containing('usr') == set(['users', '"Users"', 'user_emails'])
+    assert index.containing('ue') == set(['users', '"Users"', 'user_emails'])
+    assert index.containing('ml') == set(['user_emails'])
+    assert index.containing('x') == set()
+    assert len(index.containing('')) == 4
+
+
+def test_startingwith():
+    index = NameIndex(['SELECT', 'SET', 'set_config', 'SESSION', 'users'])
+    assert index.startingwith('se') == set(
+        ['SELECT', 'SET', 'set_config', 'SESSION'])
+    assert index.startingwith('SET') == set(['SET', 'set_config'])
+    assert index.startingwith('z') == set()
+    index.add('setof')
+    assert index.startingwith('set') == set(['SET', 'set_config', 'setof'])
+
+
+def test_discard():
+    index = NameIndex(['foo', 'FOO', 'bar'])
+    index.discard('foo')
+    assert index.containing('f') == set(['FOO'])
+    index.discard('FOO')
+    index.discard('missing')
+    assert index.containing('f') == set()
+    assert index.startingwith('') == set(['bar'])
+    assert len(index) == 1
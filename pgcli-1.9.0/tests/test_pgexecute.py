@@ -44,6 +44,17 @@ def test_bools_are_treated_as_strings(executor):
         SELECT 1""")
 
 
+@dbtest
+def test_catalog_fingerprint(executor):
+    fingerprint = executor.catalog_fingerprint()
+    assert executor.catalog_fingerprint() == fingerprint
+    run(executor, "create table a(x text)")
+    assert executor.catalog_fingerprint() != fingerprint
+    fingerprint = executor.catalog_fingerprint()
+    run(executor, "alter table a add column y text")
+    assert executor.catalog_fingerprint() != fingerprint
+
+
 @dbtest
 def test_schemata_table_views_and_columns_query(executor):
     run(executor, "create table a(x text, y text)")
@@ -79,6 +90,30 @@ def test_schemata_table_views_and_columns_query(executor):
         ('public', 'd', 'e', 'integer', False, None)])
 
 
+@dbtest
+def test_relation_queries_by_oid(executor):
+    run(executor, "create table a(x int PRIMARY KEY)")
+    run(executor, "create schema schema1")
+    run(executor, "create table schema1.a(y text)")
+    run(executor, "create table b(z int REFERENCES a) inherits (schema1.a)")
+    run(executor, "create view v as select 1 as e")
+
+    found = executor.relation_oids([(None, 'a'), ('schema1', 'a'),
+                                    (None, 'v'), (None, 'missing')])
+    assert set((schema, name) for oid, schema, name in found) == set([
+        ('public', 'a'), ('schema1', 'a'), ('public', 'b'), ('public', 'v')])
+
+    oids = [oid for oid, schema, name in found if name != 'b']
+    assert set(executor.tables(oids)) == set([
+        ('public', 'a'), ('schema1', 'a')])
+    assert set(executor.views(oids)) == set([('public', 'v')])
+    assert set(executor.table_columns(oids)) == set([
+        ('public', 'a', 'x', 'integer', False, None),
+        ('schema1', 'a', 'y', 'text', False, None)])
+    assert [fk.childtable for fk in executor.foreignkeys(oids)] == ['b']
+    assert list(executor.tables([])) == []
+
+
 @dbtest
 def test_foreign_key_query(executor):
     run(executor, "create schema schema1")
@@ -186,6 +221,31 @@ def test_multiple_queries_same_line(executor):
     assert "bar" in result[9]
 
 
+@dbtest
+def test_query_rows_read_in_batches(executor):
+    from pgcli.pgexecute import ServerCursor
+    [(title, rows, headers, status, sql, success)] = executor.run(
+        'select x from generate_series(1, 5) x', fetch_count=2)
+    assert isinstance(rows, ServerCursor)
+    assert headers == ['x']
+    assert [list(batch) for batch in rows.batches()] == [
+        [(1,), (2,)], [(3,), (4,)], [(5,)]]
+    assert rows.statusmessage == 'SELECT 5'
+    # The cursor's transaction has ended
+    assert (executor.conn.get_transaction_status() ==
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+
+@dbtest
+def test_rows_read_at_once_unless_single_query(executor):
+    results = executor.run('select 1; select 2', fetch_count=2)
+    assert all(isinstance(rows, psycopg2.extensions.cursor)
+               for title, rows, headers, status, sql, success in results)
+    [(title, rows, headers, status, sql, success)] = executor.run(
+        'create table t as select 1', fetch_count=2)
+    assert rows is None
+
+
 @dbtest
 def test_multiple_queries_with_special_command_same_line(executor, pgspecial):
     result = run(executor, "select 'foo'; \d", pgspecial=pgspecial)
@@ -18,3 +18,61 @@ def test_prevalence_counter():
     names = ['foo', 'bar', 'baz']
     name_counts = [counter.name_count(x) for x in names]
     assert name_counts == [3, 2, 2]
+
+
+def test_keywords_split_over_lines():
+    counter = PrevalenceCounter()
+    counter.update_keywords('REFRESH MATERIALIZED\n  VIEW foo; order, by')
+    assert counter.keyword_count('REFRESH MATERIALIZED VIEW') == 1
+    assert counter.keyword_count('MATERIALIZED VIEW') == 1
+    assert counter.keyword_count('ORDER BY') == 0
+
+
+def test_keyword_counts_file(tmpdir):
+    path = str(tmpdir.join('history.keywords'))
+    counter = PrevalenceCounter(path)
+    assert not counter.load_keyword_counts()
+    counter.update('SELECT * FROM foo')
+    counter.update('select bar from foo order by bar')
+
+    counter = PrevalenceCounter(path)
+    assert counter.load_keyword_counts()
+    assert counter.keyword_count('SELECT') == 2
+    assert counter.keyword_count('ORDER BY') == 1
+    assert counter.name_count('foo') == 0
+
+
+def test_keyword_counts_file_compacted(tmpdir):
+    path = tmpdir.join('history.keywords')
+    counter = PrevalenceCounter(str(path))
+    counter.max_file_lines = 2
+    for _ in range(3):
+        counter.update('SELECT 1')
+    assert len(path.readlines()) == 3
+
+    counter = PrevalenceCounter(str(path))
+    counter.max_file_lines = 2
+    counter.load_keyword_counts()
+    assert counter.keyword_count('SELECT') == 3
+    assert len(path.readlines()) == 1
+    counter.load_keyword_counts()
+    assert counter.keyword_count('SELECT') == 6
+
+
+def test_keyword_counts_appended_before_compacting_kept(tmpdir):
+    path = tmpdir.join('history.keywords')
+    counter = PrevalenceCounter(str(path))
+    for _ in range(3):
+        counter.update('SELECT 1')
+
+    loaded = PrevalenceCounter(str(path))
+    loaded.load_keyword_counts()
+    # Appended by another instance after the file was read
+    counter.update('SELECT 2')
+    loaded.compact_keyword_counts()
+    assert len(path.readlines()) == 1
+    assert tmpdir.listdir() == [path]
+
+    counter = PrevalenceCounter(str(path))
+    counter.load_keyword_counts()
+    assert counter.keyword_count('SELECT') == 4
@@ -1,4 +1,5 @@
 from pgcli.main import PGCli
+from pgcli.pgexecute import ServerCursor
 from mock import Mock
 import pytest
 
@@ -81,3 +82,15 @@ def test_row_limit_on_non_select(over_default):
     cli = PGCli(row_limit=0)
     result = cli._should_show_limit_prompt(stmt, over_default)
     assert result is False
+
+
+def test_row_limit_on_server_cursor(DEFAULT):
+    cli = PGCli()
+    # The status is only known once its rows have been read
+    cur = Mock(spec=ServerCursor)
+    cur.read_ahead.return_value = DEFAULT + 1
+    assert cli._should_show_limit_prompt(None, cur) is True
+    cur.read_ahead.assert_called_with(DEFAULT)
+
+    cur.read_ahead.return_value = DEFAULT
+    assert cli._should_show_limit_prompt(None, cur) is False
@@ -611,3 +611,26 @@ def test_set_schema(completer):
         schema(u"'Custom'"),
         schema(u"'custom'"),
         schema(u"'public'")])
+
+
+def test_remove_relations():
+    completer = testdata.get_completer()
+    completer.remove_relations([('blog', 'entries'), (None, 'orders')])
+    tables = completer.dbmetadata['tables']
+    assert 'entries' not in tables['blog']
+    assert 'orders' not in tables['public']
+    assert [fk.parenttable for fk in
+            tables['blog']['entrytags']['entryid'].foreignkeys] == []
+    assert [fk.parenttable for fk in
+            tables['blog']['entrytags']['tagid'].foreignkeys] == ['tags']
+    # Names still used by other relations are kept
+    assert 'entrytitle' not in completer.all_completions
+    assert 'ordered_date' not in completer.all_completions
+    assert 'entryid' in completer.all_completions
+    assert 'datestamp' in completer.all_completions
+    assert table('entries') not in result_set(
+        completer, 'SELECT * FROM blog.')
+    assert table('orders') not in result_set(completer, 'SELECT * FROM ')
+
+    completer.extend_relations([('blog', 'entries')], kind='tables')
+    assert table('entries') in result_set(completer, 'SELECT * FROM blog.')
@@ -3,6 +3,7 @@ from metadata import (MetaData, alias, name_join, fk_join, join, keyword,
     schema, table, view, function, column, wildcard_expansion,
     get_result, result_set, qual, no_qual, parametrize)
 from prompt_toolkit.completion import Completion
+from mock import patch
 
 
 metadata = {
@@ -928,3 +929,33 @@ def test_set_schema(completer):
     result = result_set(completer, text)
     expected = set([schema(u"'public'")])
     assert result == expected
+
+
+def test_max_completions_keeps_best_matches():
+    completer = testdata.get_completer(settings={'max_completions': 2})
+    result = get_result(completer, 'SELECT * FROM u')
+    assert result == get_result(testdata.completer, 'SELECT * FROM u')[:2]
+
+
+@parametrize('completer', completers(aliasing=True))
+@parametrize('text', [
+    'SELECT * FROM ',
+    'SELECT * FROM users u JOIN ',
+    'SELECT u.',
+    'SELECT ',
+])
+def test_typing_narrows_previous_completions(completer, text):
+    for n in range(len('custom_func') + 1):
+        narrowed = get_result(completer, text + 'custom_func'[:n])
+        completer._completion_session = None
+        assert narrowed == get_result(completer, text + 'custom_func'[:n])
+
+
+def test_typing_reuses_suggestions():
+    completer = testdata.completer
+    get_result(completer, 'SELECT * FROM us')
+    with patch('pgcli.pgcompleter.suggest_type') as suggest_type:
+        result = get_result(completer, 'SELECT * FROM use')
+        get_result(completer, 'SELECT * FROM use WHERE')
+    assert suggest_type.call_count == 1
+    assert result[0] == table('users', -3)
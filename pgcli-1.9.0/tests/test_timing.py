@@ -0,0 +1,70 @@
+import functools
+import json
+from time import time
+
+from pgcli.main import format_output, OutputSettings
+from pgcli.timing import CommandTiming
+
+
+def test_statement_timing_separates_fetching_from_formatting():
+    timing = CommandTiming(conn=None)
+    timing.timer.server = 2.0
+    timing.timer.transfer = 1.0
+    statement = timing.add_statement('select 1')
+    assert (statement.server, statement.transfer) == (2.0, 1.0)
+
+    def lines():
+        # Rows read from a server-side cursor as the lines are produced
+        timing.timer.server += 0.5
+        timing.timer.transfer += 0.25
+        yield 'abc'
+        yield u'd\xe9f'
+
+    cur = type(str('Cursor'), (object,), {'rowcount': 2})()
+    assert list(timing.measure(statement, lines(), cur)) == ['abc', u'd\xe9f']
+    assert (statement.server, statement.transfer) == (2.5, 1.25)
+    assert statement.rows == 2
+    assert statement.bytes == 9
+    assert timing.lines()[0].startswith(
+        'Statement: server 2.500s, transfer 1.250s, format ')
+    assert timing.lines()[0].endswith(', 2 rows, 9 bytes')
+
+
+def test_format_time_includes_tabulating_the_rows():
+    timing = CommandTiming(conn=None)
+    statement = timing.add_statement('select * from t')
+    rows = [(n, 'row %d' % n) for n in range(2000)]
+    settings = OutputSettings(table_format='psql', dcmlfmt='d', floatfmt='g')
+    format_lines = functools.partial(
+        format_output, None, rows, ['id', 'name'], 'SELECT 2000', settings)
+
+    start = time()
+    lines = timing.measure_format(statement, format_lines, rows)
+    elapsed = time() - start
+    assert lines == list(format_lines())
+    # The table is formatted when format_output() is called, not as its
+    # lines are read
+    assert 0 < statement.format <= elapsed
+    assert statement.rows == 2000
+    assert statement.bytes == sum(len(line) + 1 for line in lines)
+
+
+def test_timings_logged_as_json_lines(tmpdir):
+    path = str(tmpdir.join('timings'))
+    timing = CommandTiming(conn=None)
+    timing.add_statement('create table t()')
+    timing.add_statement('drop table t')
+    timing.start_display()
+    timing.end_display()
+    assert [line.split(':')[0] for line in timing.lines()] == [
+        'Statement 1', 'Statement 2', 'Display']
+
+    timing.log(path, 'create table t(); drop table t')
+    timing.log(path, 'create table t(); drop table t')
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 2
+    assert records[0]['command'] == 'create table t(); drop table t'
+    assert [s['sql'] for s in records[0]['statements']] == [
+        'create table t()', 'drop table t']
+    assert records[0]['statements'][0]['rows'] is None
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Compare the speed of running the checks through Checker.run_check with
+the dispatch prepared by Checker.init_dispatch.
+
+Usage: python benchmark/dispatch.py [paths ...]
+
+Without paths, the testsuite, pycodestyle.py and a few large modules of the
+standard library are checked.
+"""
+from __future__ import print_function
+
+import inspect
+import os.path
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import pycodestyle  # noqa: E402
+
+
+class RunCheckChecker(pycodestyle.Checker):
+    """Run every check through init_checker_state and run_check, with one
+    getattr per argument."""
+
+    def init_dispatch(self, checks):
+        dispatch = []
+        for name, check, argument_names in checks:
+            def run(checker, name=name, check=check,
+                    argument_names=argument_names):
+                checker.init_checker_state(name, argument_names)
+                return checker.run_check(check, argument_names)
+            dispatch.append((name, check, run, _same, False, None))
+        return dispatch
+
+
+def _same(checker):
+    return checker
+
+
+def default_paths():
+    import argparse
+    import pydoc
+    import tokenize
+    paths = [os.path.join(ROOT_DIR, 'testsuite'),
+             os.path.join(ROOT_DIR, 'pycodestyle.py')]
+    paths.extend(inspect.getsourcefile(module)
+                 for module in (argparse, inspect, pydoc, tokenize))
+    return paths
+
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name)
+                         for name in sorted(os.listdir(path))
+                         if name.endswith('.py'))
+        else:
+            files.append(path)
+    return [(filename, pycodestyle.readlines(filename)) for filename in files]
+
+
+def best_time(checker_class, options, files, repeat=5):
+    best = None
+    for __ in range(repeat):
+        report = pycodestyle.BaseReport(options)
+        start = time.time()
+        for filename, lines in files:
+            checker_class(filename, lines=lines[:], options=options,
+                          report=report).check_all()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, report.total_errors
+
+
+def main(paths):
+    options = pycodestyle.StyleGuide().options
+    files = collect_files(paths or default_paths())
+    print('%d files, %d lines' % (len(files),
+                                  sum(len(lines) for __, lines in files)))
+    (run_check, run_check_errors) = best_time(RunCheckChecker, options, files)
+    (dispatch, dispatch_errors) = best_time(pycodestyle.Checker, options,
+                                            files)
+    assert run_check_errors == dispatch_errors
+    print('%-7.3f seconds with run_check' % run_check)
+    print('%-7.3f seconds with init_dispatch (%.2fx)' %
+          (dispatch, run_check / dispatch))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
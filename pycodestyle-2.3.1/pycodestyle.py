@@ -48,17 +48,23 @@ W warnings
 """
 from __future__ import with_statement
 
+import bisect
+import hashlib
 import inspect
+import json
 import keyword
 import os
 import re
 import sys
+import tempfile
 import time
 import tokenize
 import warnings
 
 from fnmatch import fnmatch
+from operator import attrgetter
 from optparse import OptionParser
+from timeit import default_timer
 
 try:
     from configparser import RawConfigParser
@@ -66,6 +72,11 @@ try:
 except ImportError:
     from ConfigParser import RawConfigParser
 
+try:
+    import multiprocessing
+except ImportError:     # not available on every platform
+    multiprocessing = None
+
 __version__ = '2.3.1'
 
 DEFAULT_EXCLUDE = '.svn,CVS,.bzr,.hg,.git,__pycache__,.tox'
@@ -1535,6 +1546,9 @@ class Checker(object):
         self.filename = filename
         # Dictionary where a checker can store its custom state.
         self._checker_states = {}
+        self._profile = getattr(options, 'check_profile', None)
+        self._physical_dispatch = self.init_dispatch(self._physical_checks)
+        self._logical_dispatch = self.init_dispatch(self._logical_checks)
         if filename is None:
             self.filename = 'stdin'
             self.lines = lines or []
@@ -1576,7 +1590,7 @@ class Checker(object):
 
     def readline(self):
         """Get the next line from the input buffer."""
-        if self.line_number >= self.total_lines:
+        if self.line_number >= self.last_row:
             return ''
         line = self.lines[self.line_number]
         self.line_number += 1
@@ -1584,6 +1598,27 @@ class Checker(object):
             self.indent_char = line[0]
         return line
 
+    def init_dispatch(self, checks):
+        """Prepare the checks to run them on every line.
+
+        Return a list of (name, check, run, get_arguments, many, state)
+        where run is the check itself, or the check timed by the profile,
+        get_arguments(self) returns the arguments of the check, as a tuple if
+        'many' is true, and 'state' is the custom state of the check or
+        None.
+        """
+        dispatch = []
+        for name, check, argument_names in checks:
+            run = check
+            if self._profile is not None:
+                run = self._profile.timed(argument_names[0], name, check)
+            state = None
+            if 'checker_state' in argument_names:
+                state = self._checker_states.setdefault(name, {})
+            dispatch.append((name, check, run, attrgetter(*argument_names),
+                             len(argument_names) > 1, state))
+        return dispatch
+
     def run_check(self, check, argument_names):
         """Run a check plugin."""
         arguments = []
@@ -1599,9 +1634,14 @@ class Checker(object):
     def check_physical(self, line):
         """Run all physical checks on a raw input line."""
         self.physical_line = line
-        for name, check, argument_names in self._physical_checks:
-            self.init_checker_state(name, argument_names)
-            result = self.run_check(check, argument_names)
+        for (name, check, run, get_arguments, many,
+             state) in self._physical_dispatch:
+            if state is not None:
+                self.checker_state = state
+            if many:
+                result = run(*get_arguments(self))
+            else:
+                result = run(get_arguments(self))
             if result is not None:
                 (offset, text) = result
                 self.report_error(self.line_number, offset, text, check)
@@ -1656,11 +1696,17 @@ class Checker(object):
             self.blank_before = self.blank_lines
         if self.verbose >= 2:
             print(self.logical_line[:80].rstrip())
-        for name, check, argument_names in self._logical_checks:
+        for (name, check, run, get_arguments, many,
+             state) in self._logical_dispatch:
             if self.verbose >= 4:
                 print('   ' + name)
-            self.init_checker_state(name, argument_names)
-            for offset, text in self.run_check(check, argument_names) or ():
+            if state is not None:
+                self.checker_state = state
+            if many:
+                results = run(*get_arguments(self))
+            else:
+                results = run(get_arguments(self))
+            for offset, text in results or ():
                 if not isinstance(offset, tuple):
                     for token_offset, pos in mapping:
                         if offset <= token_offset:
@@ -1682,8 +1728,12 @@ class Checker(object):
         except (ValueError, SyntaxError, TypeError):
             return self.report_invalid_syntax()
         for name, cls, __ in self._ast_checks:
-            checker = cls(tree, self.filename)
-            for lineno, offset, text, check in checker.run():
+            run_ast_check = _run_ast_check
+            if self._profile is not None:
+                run_ast_check = self._profile.timed('tree', name,
+                                                    _run_ast_check)
+            for lineno, offset, text, check in run_ast_check(
+                    cls, tree, self.filename):
                 if not self.lines or not noqa(self.lines[lineno - 1]):
                     self.report_error(lineno, offset, text, check)
 
@@ -1691,10 +1741,17 @@ class Checker(object):
         """Tokenize the file, run physical line checks and yield tokens."""
         if self._io_error:
             self.report_error(1, 0, 'E902 %s' % self._io_error, readlines)
+        # The tokenizer counts the rows from the start of the region
+        row_offset = self.line_number
         tokengen = tokenize.generate_tokens(self.readline)
         try:
             for token in tokengen:
-                if token[2][0] > self.total_lines:
+                if row_offset:
+                    (token_type, text, start, end, line) = token
+                    token = (token_type, text,
+                             (start[0] + row_offset, start[1]),
+                             (end[0] + row_offset, end[1]), line)
+                if token[2][0] > self.last_row:
                     return
                 self.noqa = token[4] and noqa(token[4])
                 self.maybe_check_physical(token)
@@ -1735,11 +1792,28 @@ class Checker(object):
     def check_all(self, expected=None, line_offset=0):
         """Run all checks on the input file."""
         self.report.init_file(self.filename, self.lines, expected, line_offset)
+        if self._profile is not None:
+            self._profile.init_file(self.filename)
         self.total_lines = len(self.lines)
         if self._ast_checks:
             self.check_ast()
-        self.line_number = 0
         self.indent_char = None
+        for first_row, last_row in self.get_regions():
+            self.check_region(first_row, last_row)
+        return self.report.get_file_results()
+
+    def get_regions(self):
+        """Return the (first_row, last_row) ranges of lines to check.
+
+        Every range has to start with a statement at the top level of the
+        module.
+        """
+        return [(1, self.total_lines)]
+
+    def check_region(self, first_row, last_row):
+        """Run the physical and logical checks on a range of lines."""
+        self.line_number = first_row - 1
+        self.last_row = last_row
         self.indent_level = self.previous_indent_level = 0
         self.previous_logical = ''
         self.previous_unindented_logical_line = ''
@@ -1781,9 +1855,153 @@ class Checker(object):
                         self.tokens = [tuple(token)]
                         self.check_logical()
         if self.tokens:
-            self.check_physical(self.lines[-1])
+            self.check_physical(self.lines[last_row - 1])
             self.check_logical()
-        return self.report.get_file_results()
+
+
+class DiffChecker(Checker):
+    """Load a Python source file, check only the changed statements.
+
+    The lines selected by --diff are checked with the top-level statements
+    around them, starting with the statement before, which is what
+    blank_lines looks back at.  The whole file is checked when its
+    statements cannot be found, when tabs and spaces are both used for
+    indentation, when a changed statement is an import, because
+    module_imports_on_top_of_file depends on everything above it, or when
+    another check keeps a custom state.
+    """
+
+    def __init__(self, filename=None, lines=None, options=None, report=None,
+                 **kwargs):
+        super(DiffChecker, self).__init__(filename, lines, options, report,
+                                          **kwargs)
+        selected_lines = getattr(options, 'selected_lines', None) or {}
+        self.selected_rows = selected_lines.get(filename)
+
+    def get_regions(self):
+        """Return the ranges of top-level statements with changed lines."""
+        everything = [(1, self.total_lines)]
+        if not self.selected_rows or not self.lines:
+            return everything
+        indent_chars = set(line[:1] for line in self.lines)
+        if ' ' in indent_chars and '\t' in indent_chars:
+            # The whole file is needed to know the indent_char
+            return everything
+        check_imports = False
+        for (name, __, __, __, __, state) in (self._physical_dispatch +
+                                              self._logical_dispatch):
+            if name == 'module_imports_on_top_of_file':
+                check_imports = True
+            elif state is not None:
+                return everything
+        try:
+            tree = compile(''.join(self.lines), '', 'exec', PyCF_ONLY_AST)
+        except (ValueError, SyntaxError, TypeError):
+            return everything
+        # The first row of every top-level statement, and if it is an import
+        starts = []
+        for node in tree.body:
+            decorators = getattr(node, 'decorator_list', None)
+            if decorators:
+                row = min([node.lineno] + [decorator.lineno
+                                           for decorator in decorators])
+            elif node.col_offset:
+                continue    # after a semicolon on a continuation line
+            else:
+                row = node.lineno
+            is_import = node.__class__.__name__ in ('Import', 'ImportFrom')
+            if starts and starts[-1][0] == row:
+                starts[-1][1] = starts[-1][1] or is_import
+            else:
+                starts.append([row, is_import])
+        if not starts:
+            return everything
+        # The blank lines and comments after a statement belong to it
+        bounds = [1] + [row for (row, __) in starts[1:]]
+        bounds.append(self.total_lines + 1)
+        changed = set()
+        for row in self.selected_rows:
+            index = bisect.bisect_right(bounds, row) - 1
+            if 0 <= index < len(starts):
+                changed.add(index)
+        ranges = []
+        for index in sorted(changed):
+            if check_imports and starts[index][1]:
+                return everything
+            first = max(index - 1, 0)
+            if ranges and first <= ranges[-1][1] + 1:
+                ranges[-1][1] = index
+            else:
+                ranges.append([first, index])
+        return [(bounds[first], bounds[last + 1] - 1)
+                for (first, last) in ranges]
+
+
+def _run_ast_check(cls, tree, filename):
+    return list(cls(tree, filename).run())
+
+
+class CheckProfile(object):
+    """Collect the time spent in each check, per file and in total."""
+
+    def __init__(self):
+        self.total = {}
+        self.files = {}
+        self._file = {}
+
+    def init_file(self, filename):
+        """Signal a new file."""
+        self._file = self.files.setdefault(filename, {})
+
+    def timed(self, kind, name, check):
+        """Return a function which runs the check and adds the time spent.
+
+        Logical line checks are run until they yield all their results.
+        """
+        key = (kind, name)
+        total = self.total.setdefault(key, [0, 0.0])
+
+        def timed_check(*arguments):
+            start = default_timer()
+            result = check(*arguments)
+            if kind == 'logical_line' and result is not None:
+                result = list(result)
+            elapsed = default_timer() - start
+            total[0] += 1
+            total[1] += elapsed
+            per_file = self._file.get(key)
+            if per_file is None:
+                per_file = self._file[key] = [0, 0.0]
+            per_file[0] += 1
+            per_file[1] += elapsed
+            return result
+        return timed_check
+
+    def get_statistics(self):
+        """Return (seconds, calls, kind, name) for each check, the most
+        expensive checks first."""
+        return sorted(((seconds, calls, kind, name)
+                       for ((kind, name), (calls, seconds))
+                       in self.total.items()), reverse=True)
+
+    def print_table(self):
+        """Print the time spent in each check."""
+        print('%-9s %-9s %-9s %-13s %s' %
+              ('seconds', 'calls', 'usec/call', 'kind', 'check'))
+        for seconds, calls, kind, name in self.get_statistics():
+            print('%-9.4f %-9d %-9.2f %-13s %s' %
+                  (seconds, calls, seconds * 1e6 / (calls or 1), kind, name))
+
+    def as_dict(self):
+        """Return the profile as a dictionary for JSON."""
+        def checks(times):
+            return [{'kind': kind, 'check': name,
+                     'calls': calls, 'seconds': seconds}
+                    for ((kind, name), (calls, seconds))
+                    in sorted(times.items())]
+        return {'total': checks(self.total),
+                'files': dict((filename, checks(times))
+                              for (filename, times) in self.files.items())}
 
 
 class BaseReport(object):
@@ -1889,6 +2107,7 @@ class StandardReport(BaseReport):
         super(StandardReport, self).__init__(options)
         self._fmt = REPORT_FORMAT.get(options.format.lower(),
                                       options.format)
+        self._json = options.format.lower() == 'json'
         self._repeat = options.repeat
         self._show_source = options.show_source
         self._show_pep8 = options.show_pep8
@@ -1908,31 +2127,46 @@ class StandardReport(BaseReport):
                 (line_number, offset, code, text[5:], check.__doc__))
         return code
 
+    def format_error(self, line_number, offset, code, text, doc):
+        """Return the lines to print for an error."""
+        error = {
+            'path': self.filename,
+            'row': self.line_offset + line_number, 'col': offset + 1,
+            'code': code, 'text': text,
+        }
+        if self._show_source:
+            if line_number > len(self.lines):
+                line = ''
+            else:
+                line = self.lines[line_number - 1]
+        if self._json:
+            if self._show_source:
+                error['source'] = line.rstrip()
+            if self._show_pep8 and doc:
+                error['pep8'] = doc.strip()
+            return [json.dumps(error, sort_keys=True)]
+        lines = [self._fmt % error]
+        if self._show_source:
+            lines.append(line.rstrip())
+            lines.append(re.sub(r'\S', ' ', line[:offset]) + '^')
+        if self._show_pep8 and doc:
+            lines.append('    ' + doc.strip())
+        return lines
+
     def get_file_results(self):
         """Print the result and return the overall count for this file."""
         self._deferred_print.sort()
+        output = []
         for line_number, offset, code, text, doc in self._deferred_print:
-            print(self._fmt % {
-                'path': self.filename,
-                'row': self.line_offset + line_number, 'col': offset + 1,
-                'code': code, 'text': text,
-            })
-            if self._show_source:
-                if line_number > len(self.lines):
-                    line = ''
-                else:
-                    line = self.lines[line_number - 1]
-                print(line.rstrip())
-                print(re.sub(r'\S', ' ', line[:offset]) + '^')
-            if self._show_pep8 and doc:
-                print('    ' + doc.strip())
-
+            output.extend(self.format_error(line_number, offset, code, text,
+                                            doc))
+        if output:
             # stdout is block buffered when not stdout.isatty().
-            # line can be broken where buffer boundary since other processes
-            # write to same file.
-            # flush() after print() to avoid buffer boundary.
-            # Typical buffer size is 8192. line written safely when
-            # len(line) < 8192.
+            # Other processes may write to the same file: write all the
+            # results of the file at once, and flush(), so that they are
+            # not mixed with the output of the others.
+            output.append('')
+            sys.stdout.write('\n'.join(output))
             sys.stdout.flush()
         return self.file_errors
 
@@ -1950,6 +2184,116 @@ class DiffReport(StandardReport):
         return super(DiffReport, self).error(line_number, offset, text, check)
 
 
+class RecordingReport(BaseReport):
+    """Record the errors of a file, to report them later.
+
+    The errors are recorded as they come from the checks, before any
+    filtering, with the name of the check instead of the check itself.
+    """
+
+    def init_file(self, filename, lines, expected, line_offset):
+        """Signal a new file."""
+        self.errors = []
+        return super(RecordingReport, self).init_file(
+            filename, lines, expected, line_offset)
+
+    def error(self, line_number, offset, text, check):
+        """Record an error."""
+        self.errors.append((line_number, offset, text, check.__name__))
+
+    def get_file_results(self):
+        """Return the lines, the count of logical lines and the errors."""
+        return (self.lines, self.counters['logical lines'], self.errors)
+
+
+class ResultCache(object):
+    """Keep the errors recorded for files on disk.
+
+    An entry is used only for the same file name and content, checked with
+    the same version of pycodestyle, the same options and the same
+    registered checks.  Changes in the code of plugins are not noticed:
+    clear the cache directory after updating them.
+    """
+
+    def __init__(self, directory, options):
+        self.directory = directory
+        checks = [(kind, name, getattr(check, '__module__', None))
+                  for kind in ('physical_checks', 'logical_checks',
+                               'ast_checks')
+                  for (name, check, __) in getattr(options, kind)]
+        self._options_key = repr((
+            __version__, sys.version_info[:2], sorted(options.select),
+            sorted(options.ignore), options.max_line_length,
+            bool(options.hang_closing), checks))
+        # With --diff, only the changed lines of a file are checked
+        self._selected_lines = getattr(options, 'selected_lines', None)
+
+    def key(self, filename, lines):
+        """Return the key of the entry for a file with these lines."""
+        content = ''.join(lines)
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8', 'replace')
+        digest = hashlib.sha1(self._options_key.encode('utf-8'))
+        digest.update(repr(filename).encode('utf-8'))
+        if self._selected_lines is not None:
+            rows = sorted(self._selected_lines.get(filename, ()))
+            digest.update(repr(rows).encode('utf-8'))
+        digest.update(content)
+        return digest.hexdigest()
+
+    def load(self, key):
+        """Return the count of logical lines and the errors, or None."""
+        try:
+            with open(os.path.join(self.directory, key)) as entry:
+                (logical_lines, errors) = json.load(entry)
+        except (IOError, OSError, ValueError):
+            return None
+        return logical_lines, [tuple(error) for error in errors]
+
+    def store(self, key, logical_lines, errors):
+        """Keep the count of logical lines and the errors."""
+        entry_path = os.path.join(self.directory, key)
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            (fd, path) = tempfile.mkstemp(dir=self.directory)
+        except (IOError, OSError):
+            return      # the file is checked again next time
+        try:
+            with os.fdopen(fd, 'w') as entry:
+                json.dump([logical_lines, errors], entry)
+            try:
+                os.rename(path, entry_path)
+            except OSError:
+                # os.rename() does not replace files on Windows
+                os.remove(entry_path)
+                os.rename(path, entry_path)
+        except (IOError, OSError):
+            # the file is checked again next time
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _unknown_check():
+    # Stands in for the checks which are not registered, when reporting
+    # recorded errors.
+    pass
+
+
+_worker_style_guide = None
+
+
+def _init_worker(style_guide):
+    """Keep the style guide of the parent process in a worker process."""
+    global _worker_style_guide
+    _worker_style_guide = style_guide
+
+
+def _check_in_worker(filename):
+    """Run all checks on a file in a worker process."""
+    return _worker_style_guide.record_file(filename)
+
+
 class StyleGuide(object):
     """Initialize a PEP-8 instance with few options."""
 
@@ -1971,9 +2315,13 @@ class StyleGuide(object):
 
         self.runner = self.input_file
         self.options = options
+        self.result_cache = None
 
         if not options.reporter:
             options.reporter = BaseReport if options.quiet else StandardReport
+        if self.checker_class is Checker and getattr(options, 'diff', False):
+            # Check only the statements around the changed lines
+            self.checker_class = DiffChecker
 
         options.select = tuple(options.select or ())
         if not (options.select or options.ignore or
@@ -1988,6 +2336,12 @@ class StyleGuide(object):
         options.physical_checks = self.get_checks('physical_line')
         options.logical_checks = self.get_checks('logical_line')
         options.ast_checks = self.get_checks('tree')
+        options.check_profile = None
+        if (getattr(options, 'profile', False) or
+                getattr(options, 'profile_json', None)):
+            options.check_profile = CheckProfile()
+        if getattr(options, 'cache_dir', None):
+            self.result_cache = ResultCache(options.cache_dir, options)
         self.init_report()
 
     def init_report(self, reporter=None):
@@ -2001,26 +2355,124 @@ class StyleGuide(object):
             paths = self.paths
         report = self.options.report
         runner = self.runner
+        jobs = self._get_jobs()
+        filenames = []
+        if jobs > 1:
+            # Collect the files first, and check them in worker processes.
+            self.runner = filenames.append
         report.start()
         try:
-            for path in paths:
-                if os.path.isdir(path):
-                    self.input_dir(path)
-                elif not self.excluded(path):
-                    runner(path)
+            try:
+                for path in paths:
+                    if os.path.isdir(path):
+                        self.input_dir(path)
+                    elif not self.excluded(path):
+                        self.runner(path)
+            finally:
+                self.runner = runner
+            if filenames:
+                self.check_files_in_parallel(filenames, jobs)
         except KeyboardInterrupt:
             print('... stopped')
         report.stop()
         return report
 
+    def _get_jobs(self):
+        """Return the number of processes to check the files in."""
+        jobs = getattr(self.options, 'jobs', 1) or 1
+        if (jobs < 2 or multiprocessing is None or
+                self.runner != self.input_file or self.options.check_profile):
+            # Custom runners and profiles are always run in this process.
+            return 1
+        if not hasattr(multiprocessing, 'get_context'):
+            return jobs if hasattr(os, 'fork') else 1
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return 1
+        return jobs
+
+    def check_files_in_parallel(self, filenames, jobs):
+        """Run all checks on the files in 'jobs' worker processes.
+
+        The results are reported in the order of 'filenames', as if the
+        files had been checked in this process.
+        """
+        if hasattr(multiprocessing, 'get_context'):
+            context = multiprocessing.get_context('fork')
+        else:
+            context = multiprocessing
+        jobs = min(jobs, len(filenames))
+        chunksize = max(1, min(16, len(filenames) // (jobs * 4)))
+        pool = context.Pool(jobs, _init_worker, (self,))
+        try:
+            results = pool.imap(_check_in_worker, filenames, chunksize)
+            for filename, result in zip(filenames, results):
+                if self.options.verbose:
+                    print('checking %s' % filename)
+                self.report_recorded(filename, *result)
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    def report_recorded(self, filename, lines, logical_lines, errors,
+                        expected=None, line_offset=0):
+        """Report the errors recorded by a RecordingReport for a file."""
+        report = self.options.report
+        checks = dict((name, check) for (name, check, __) in
+                      self.options.physical_checks +
+                      self.options.logical_checks +
+                      self.options.ast_checks)
+        checks.update(readlines=readlines,
+                      report_invalid_syntax=Checker.report_invalid_syntax)
+        report.init_file(filename, lines, expected, line_offset)
+        for __ in range(logical_lines):
+            report.increment_logical_line()
+        for line_number, offset, text, name in errors:
+            report.error(line_number, offset, text,
+                         checks.get(name, _unknown_check))
+        return report.get_file_results()
+
     def input_file(self, filename, lines=None, expected=None, line_offset=0):
         """Run all checks on a Python source file."""
         if self.options.verbose:
             print('checking %s' % filename)
+        if self.result_cache is not None:
+            return self.report_recorded(filename, *self.record_file(
+                filename, lines), expected=expected, line_offset=line_offset)
         fchecker = self.checker_class(
             filename, lines=lines, options=self.options)
         return fchecker.check_all(expected=expected, line_offset=line_offset)
 
+    def record_file(self, filename, lines=None):
+        """Run all checks on a file and return what a RecordingReport
+        recorded.
+
+        With a result cache, the checks are only run if the file changed.
+        """
+        cache = self.result_cache
+        key = None
+        if cache is not None and filename not in (None, '-'):
+            if lines is None:
+                try:
+                    lines = readlines(filename)
+                except IOError:
+                    pass    # reported by the checker
+            if lines is not None:
+                key = cache.key(filename, lines)
+                recorded = cache.load(key)
+                if recorded is not None:
+                    return (lines,) + recorded
+        report = RecordingReport(self.options)
+        checker = self.checker_class(
+            filename, lines=lines, options=self.options, report=report)
+        (lines, logical_lines, errors) = checker.check_all()
+        if key is not None:
+            cache.store(key, logical_lines, errors)
+        return lines, logical_lines, errors
+
     def input_dir(self, dirname):
         """Check all files in this directory and all subdirectories."""
         dirname = dirname.rstrip('/')
@@ -2092,7 +2544,7 @@ def get_parser(prog='pycodestyle', version=__version__):
     parser.config_options = [
         'exclude', 'filename', 'select', 'ignore', 'max-line-length',
         'hang-closing', 'count', 'format', 'quiet', 'show-pep8',
-        'show-source', 'statistics', 'verbose']
+        'show-source', 'statistics', 'verbose', 'jobs', 'cache-dir']
     parser.add_option('-v', '--verbose', default=0, action='count',
                       help="print status messages, or debug with -vv")
     parser.add_option('-q', '--quiet', default=0, action='count',
@@ -2132,10 +2584,15 @@ def get_parser(prog='pycodestyle', version=__version__):
                       help="hang closing bracket instead of matching "
                            "indentation of opening bracket's line")
     parser.add_option('--format', metavar='format', default='default',
-                      help="set the error format [default|pylint|<custom>]")
+                      help="set the error format "
+                           "[default|pylint|json|<custom>]")
     parser.add_option('--diff', action='store_true',
                       help="report changes only within line number ranges in "
                            "the unified diff received on STDIN")
+    parser.add_option('-j', '--jobs', type='int', metavar='n', default=1,
+                      help="check files in n processes (default: %default)")
+    parser.add_option('--cache-dir', metavar='path',
+                      help="keep the results of unchanged files in path")
     group = parser.add_option_group("Testing Options")
     if os.path.exists(TESTSUITE_PATH):
         group.add_option('--testsuite', metavar='dir',
@@ -2144,6 +2601,11 @@ def get_parser(prog='pycodestyle', version=__version__):
                          help="run doctest on myself")
     group.add_option('--benchmark', action='store_true',
                      help="measure processing speed")
+    group.add_option('--profile', action='store_true',
+                     help="measure the time spent in each check")
+    group.add_option('--profile-json', metavar='path',
+                     help="write the time spent in each check, per file and "
+                          "in total, as JSON to path")
     return parser
 
 
@@ -2314,6 +2776,14 @@ def _main():
     if options.benchmark:
         report.print_benchmark()
 
+    if options.profile:
+        options.check_profile.print_table()
+
+    if options.profile_json:
+        with open(options.profile_json, 'w') as profile_file:
+            json.dump(options.check_profile.as_dict(), profile_file,
+                      indent=2, sort_keys=True)
+
     if options.testsuite and not options.quiet:
         report.print_results()
 
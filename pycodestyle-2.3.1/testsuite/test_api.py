@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
+import json
 import os.path
 import shlex
+import shutil
 import sys
+import tempfile
 import unittest
 
 import pycodestyle
@@ -318,6 +321,136 @@ class APITestCase(unittest.TestCase):
         # < 3.3 raises TypeError; >= 3.3 raises AttributeError
         self.assertRaises(Exception, pep8style.check_files, [42])
 
+    def test_styleguide_check_files_jobs(self):
+        testsuite = os.path.join(ROOT_DIR, 'testsuite')
+        pep8style = pycodestyle.StyleGuide(paths=[testsuite], jobs=1)
+        report = pep8style.check_files()
+        stdout = sys.stdout.getvalue()
+        self.reset()
+
+        pep8style = pycodestyle.StyleGuide(paths=[testsuite], jobs=3)
+        parallel_report = pep8style.check_files()
+        self.assertEqual(sys.stdout.getvalue(), stdout)
+        self.assertEqual(parallel_report.total_errors, report.total_errors)
+        self.assertEqual(parallel_report.counters, report.counters)
+        self.assertEqual(parallel_report.get_statistics(),
+                         report.get_statistics())
+
+    def test_styleguide_result_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            pep8style = pycodestyle.StyleGuide(paths=[E11])
+            report = pep8style.check_files()
+            stdout = sys.stdout.getvalue()
+            self.reset()
+
+            pep8style = pycodestyle.StyleGuide(paths=[E11],
+                                               cache_dir=cache_dir)
+            self.assertEqual(pep8style.check_files().counters,
+                             report.counters)
+            self.assertEqual(sys.stdout.getvalue(), stdout)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.reset()
+
+            # Unchanged files are not checked again
+            pep8style = pycodestyle.StyleGuide(paths=[E11],
+                                               cache_dir=cache_dir)
+            pep8style.checker_class = None
+            cached_report = pep8style.check_files()
+            self.assertEqual(sys.stdout.getvalue(), stdout)
+            self.assertEqual(cached_report.total_errors, report.total_errors)
+            self.assertEqual(cached_report.counters, report.counters)
+
+            # Storing an entry again replaces it, without temporary files
+            cache = pep8style.result_cache
+            key = cache.key(E11, pycodestyle.readlines(E11))
+            cache.store(key, 1, [])
+            self.assertEqual(os.listdir(cache_dir), [key])
+            self.assertEqual(cache.load(key), (1, []))
+
+            # Other options do not use the same results
+            pep8style = pycodestyle.StyleGuide(paths=[E11], select=['E112'],
+                                               cache_dir=cache_dir)
+            self.assertEqual(pep8style.check_files().total_errors, 1)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_styleguide_check_profile(self):
+        pep8style = pycodestyle.StyleGuide(paths=[E11], profile=True)
+        report = pep8style.check_files()
+        self.assertEqual(report.total_errors, 17)
+
+        profile = pep8style.options.check_profile
+        logical_lines = report.counters['logical lines']
+        self.assertEqual(
+            profile.total[('logical_line', 'continued_indentation')][0],
+            logical_lines)
+        self.assertTrue(('physical_line', 'tabs_obsolete') in profile.total)
+        self.assertEqual(list(profile.files), [E11])
+        self.assertEqual(len(profile.get_statistics()), len(profile.total))
+
+        profile_dict = profile.as_dict()
+        self.assertEqual(len(profile_dict['total']), len(profile.total))
+        self.assertEqual(list(profile_dict['files']), [E11])
+
+    def test_styleguide_diff_checker(self):
+        lines = [
+            'import os\n',
+            '\n',
+            '\n',
+            'def foo():\n',
+            '    pass\n',
+            'def bar():\n',
+            '    x=1\n',
+            '\n',
+            '\n',
+            '\n',
+            'y  = 2\n',
+            'import sys\n',
+        ]
+
+        pep8style = pycodestyle.StyleGuide(
+            diff=True, reporter=pycodestyle.DiffReport,
+            selected_lines={'stdin': set([7, 11])})
+        self.assertEqual(pep8style.checker_class, pycodestyle.DiffChecker)
+        count_errors = pep8style.input_file('stdin', lines=lines)
+        self.assertEqual(count_errors, 3)
+        self.assertEqual(sys.stdout.getvalue().splitlines(), [
+            'stdin:7:6: E225 missing whitespace around operator',
+            'stdin:11:1: E303 too many blank lines (3)',
+            'stdin:11:2: E221 multiple spaces before operator',
+        ])
+        # Only the functions and the assignment were checked
+        report = pep8style.options.report
+        self.assertEqual(report.counters['logical lines'], 5)
+        self.reset()
+
+        # A changed import is checked with the whole file
+        pep8style = pycodestyle.StyleGuide(
+            diff=True, reporter=pycodestyle.DiffReport,
+            selected_lines={'stdin': set([12])})
+        count_errors = pep8style.input_file('stdin', lines=lines)
+        self.assertEqual(count_errors, 1)
+        self.assertEqual(sys.stdout.getvalue(), 'stdin:12:1: E402 module '
+                         'level import not at top of file\n')
+        report = pep8style.options.report
+        self.assertEqual(report.counters['logical lines'], 7)
+
+    def test_styleguide_report_json(self):
+        pep8style = pycodestyle.StyleGuide(paths=[E11], format='json')
+        report = pep8style.check_files()
+
+        # The results of a file are written at once
+        self.assertEqual(len(sys.stdout), 1)
+        errors = [json.loads(line)
+                  for line in sys.stdout.getvalue().splitlines()]
+        self.assertEqual(len(errors), report.total_errors)
+        self.assertEqual(errors[0], {
+            'path': E11, 'row': 3, 'col': 3, 'code': 'E111',
+            'text': 'indentation is not a multiple of four',
+        })
+
     def test_check_unicode(self):
         # Do not crash if lines are Unicode (Python 2.x)
         pycodestyle.register_check(DummyChecker, ['Z701'])
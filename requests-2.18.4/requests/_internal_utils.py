@@ -8,8 +8,20 @@ Provides utility functions that are consumed internally by Requests
 which depend on extremely few external helpers (such as compat)
 """
 
+import platform
+import time
+
 from .compat import is_py2, builtin_str, str
 
+# Preferred clock, based on which one is more accurate on a given system.
+if platform.system() == 'Windows':
+    try:  # Python 3.3+
+        preferred_clock = time.perf_counter
+    except AttributeError:  # Earlier than Python 3.
+        preferred_clock = time.clock
+else:
+    preferred_clock = time.time
+
 
 def to_native_string(string, encoding='ascii'):
     """Given a string object, regardless of type, returns a representation of
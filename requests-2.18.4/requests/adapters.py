@@ -36,6 +36,8 @@ from .cookies import extract_cookies_to_jar
 from .exceptions import (ConnectionError, ConnectTimeout, ReadTimeout, SSLError,
                          ProxyError, RetryError, InvalidSchema)
 from .auth import _basic_auth_str
+from .timing import (RequestTimings, pool_classes_by_scheme, start_recording,
+                     stop_recording)
 
 try:
     from urllib3.contrib.socks import SOCKSProxyManager
@@ -96,6 +98,10 @@ class HTTPAdapter(BaseAdapter):
         which we retry a request, import urllib3's ``Retry`` class and pass
         that instead.
     :param pool_block: Whether the connection pool should block for connections.
+    :param record_timings: Whether to record a :class:`RequestTimings
+        <requests.timing.RequestTimings>` breakdown (DNS, connect, TLS,
+        time to first byte, body transfer and connection reuse) on each
+        response's ``timings`` attribute.
 
     Usage::
 
@@ -105,17 +111,18 @@ class HTTPAdapter(BaseAdapter):
       >>> s.mount('http://', a)
     """
     __attrs__ = ['max_retries', 'config', '_pool_connections', '_pool_maxsize',
-                 '_pool_block']
+                 '_pool_block', 'record_timings']
 
     def __init__(self, pool_connections=DEFAULT_POOLSIZE,
                  pool_maxsize=DEFAULT_POOLSIZE, max_retries=DEFAULT_RETRIES,
-                 pool_block=DEFAULT_POOLBLOCK):
+                 pool_block=DEFAULT_POOLBLOCK, record_timings=False):
         if max_retries == DEFAULT_RETRIES:
             self.max_retries = Retry(0, read=False)
         else:
             self.max_retries = Retry.from_int(max_retries)
         self.config = {}
         self.proxy_manager = {}
+        self.record_timings = record_timings
 
         super(HTTPAdapter, self).__init__()
 
@@ -134,6 +141,8 @@ class HTTPAdapter(BaseAdapter):
         # self.poolmanager uses a lambda function, which isn't pickleable.
         self.proxy_manager = {}
         self.config = {}
+        # Adapters pickled by older versions don't record timings.
+        self.record_timings = False
 
         for attr, value in state.items():
             setattr(self, attr, value)
@@ -160,6 +169,8 @@ class HTTPAdapter(BaseAdapter):
 
         self.poolmanager = PoolManager(num_pools=connections, maxsize=maxsize,
                                        block=block, strict=True, **pool_kwargs)
+        if self.record_timings:
+            self.poolmanager.pool_classes_by_scheme = pool_classes_by_scheme
 
     def proxy_manager_for(self, proxy, **proxy_kwargs):
         """Return urllib3 ProxyManager for the given proxy.
@@ -195,6 +206,8 @@ class HTTPAdapter(BaseAdapter):
                 maxsize=self._pool_maxsize,
                 block=self._pool_block,
                 **proxy_kwargs)
+            if self.record_timings:
+                manager.pool_classes_by_scheme = pool_classes_by_scheme
 
         return manager
 
@@ -401,6 +414,7 @@ class HTTPAdapter(BaseAdapter):
         :param proxies: (optional) The proxies dictionary to apply to the request.
         :rtype: requests.Response
         """
+        timings = RequestTimings() if self.record_timings else None
 
         conn = self.get_connection(request.url, proxies)
 
@@ -425,6 +439,7 @@ class HTTPAdapter(BaseAdapter):
         else:
             timeout = TimeoutSauce(connect=timeout, read=timeout)
 
+        start_recording(timings)
         try:
             if not chunked:
                 resp = conn.urlopen(
@@ -522,4 +537,13 @@ class HTTPAdapter(BaseAdapter):
             else:
                 raise
 
-        return self.build_response(request, resp)
+        finally:
+            stop_recording()
+
+        response = self.build_response(request, resp)
+        if timings is not None:
+            if timings._headers_received is None:
+                timings._mark_headers_received()
+            response.timings = timings
+
+        return response
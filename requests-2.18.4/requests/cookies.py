@@ -15,7 +15,7 @@ import calendar
 import collections
 
 from ._internal_utils import to_native_string
-from .compat import cookielib, urlparse, urlunparse, Morsel
+from .compat import cookielib, urlparse, urlunparse, Morsel, is_py2
 
 try:
     import threading
@@ -38,13 +38,14 @@ class MockRequest(object):
     def __init__(self, request):
         self._r = request
         self._new_headers = {}
-        self.type = urlparse(self._r.url).scheme
+        self._parsed = urlparse(self._r.url)
+        self.type = self._parsed.scheme
 
     def get_type(self):
         return self.type
 
     def get_host(self):
-        return urlparse(self._r.url).netloc
+        return self._parsed.netloc
 
     def get_origin_req_host(self):
         return self.get_host()
@@ -56,7 +57,7 @@ class MockRequest(object):
             return self._r.url
         # If they did set it, retrieve it and reconstruct the expected domain
         host = to_native_string(self._r.headers['Host'], encoding='utf-8')
-        parsed = urlparse(self._r.url)
+        parsed = self._parsed
         # Reconstruct the URL as we expect it
         return urlunparse([
             parsed.scheme, host, parsed.path, parsed.params, parsed.query,
@@ -419,6 +420,207 @@ class RequestsCookieJar(cookielib.CookieJar, collections.MutableMapping):
         return new_cj
 
 
+class IndexedCookieJar(RequestsCookieJar):
+    """A :class:`RequestsCookieJar` that keeps its cookies indexed by name and
+    looks up candidate domains directly when building a Cookie header.
+
+    Cookies are stored exactly as in any ``cookielib.CookieJar`` (by domain,
+    then path, then name); on top of that the jar maintains a name index and
+    the earliest expiry time in the jar, so that:
+
+    * ``get``, ``__getitem__``, ``__delitem__`` and ``set(name, None)`` only
+      touch the cookies carrying the requested name;
+    * building the Cookie header for a request only visits the domains that
+      can match the request host, instead of every domain in the jar;
+    * the expiry sweep run after every request is skipped until a cookie can
+      actually have expired.
+
+    All cookie policy decisions are still made by the jar's policy, so this
+    class is a drop-in replacement for :class:`RequestsCookieJar`, e.g.::
+
+      >>> s = requests.Session()
+      >>> s.cookies = requests.cookies.IndexedCookieJar()
+    """
+
+    def __init__(self, policy=None):
+        super(IndexedCookieJar, self).__init__(policy)
+        self._name_index = {}
+        self._domain_order = {}
+        self._domain_count = 0
+        self._next_expiry = None
+
+    def set(self, name, value, **kwargs):
+        """Dict-like set() that also supports optional domain and path args in
+        order to resolve naming collisions from using one cookie jar over
+        multiple domains.
+        """
+        if value is None:
+            for cookie in self._cookies_named(name, kwargs.get('domain'), kwargs.get('path')):
+                self.clear(cookie.domain, cookie.path, cookie.name)
+            return
+        return super(IndexedCookieJar, self).set(name, value, **kwargs)
+
+    def __delitem__(self, name):
+        """Deletes a cookie given a name."""
+        for cookie in self._cookies_named(name):
+            self.clear(cookie.domain, cookie.path, cookie.name)
+
+    def set_cookie(self, cookie, *args, **kwargs):
+        with self._cookies_lock:
+            if cookie.domain not in self._cookies:
+                self._domain_order[cookie.domain] = self._domain_count
+                self._domain_count += 1
+            super(IndexedCookieJar, self).set_cookie(cookie, *args, **kwargs)
+            self._name_index.setdefault(cookie.name, set()).add((cookie.domain, cookie.path))
+            if cookie.expires is not None and (
+                    self._next_expiry is None or cookie.expires < self._next_expiry):
+                self._next_expiry = cookie.expires
+
+    def clear(self, domain=None, path=None, name=None):
+        with self._cookies_lock:
+            if domain is None and path is None and name is None:
+                super(IndexedCookieJar, self).clear()
+                self._name_index = {}
+                self._domain_order = {}
+                self._next_expiry = None
+                return
+
+            if name is not None:
+                removed = [(path, name)]
+            elif path is not None:
+                removed = [(path, n) for n in self._cookies.get(domain, {}).get(path, ())]
+            else:
+                removed = [(p, n) for p, names in self._cookies.get(domain, {}).items() for n in names]
+
+            super(IndexedCookieJar, self).clear(domain, path, name)
+            if path is None:
+                self._domain_order.pop(domain, None)
+
+            for cookie_path, cookie_name in removed:
+                locations = self._name_index.get(cookie_name)
+                if locations is not None:
+                    locations.discard((domain, cookie_path))
+                    if not locations:
+                        del self._name_index[cookie_name]
+
+    def clear_expired_cookies(self):
+        """Discard all expired cookies.
+
+        The full sweep only runs once the earliest known expiry time has
+        passed.
+        """
+        with self._cookies_lock:
+            if self._next_expiry is None or time.time() < self._next_expiry:
+                return
+            super(IndexedCookieJar, self).clear_expired_cookies()
+            expiries = [cookie.expires for cookie in iter(self) if cookie.expires is not None]
+            self._next_expiry = min(expiries) if expiries else None
+
+    def _cookies_named(self, name, domain=None, path=None):
+        """Return the cookies called ``name`` in iteration order, optionally
+        restricted to ``domain`` and ``path``.
+
+        :rtype: list
+        """
+        locations = [
+            (cookie_domain, cookie_path)
+            for cookie_domain, cookie_path in self._name_index.get(name, ())
+            if (domain is None or cookie_domain == domain) and
+            (path is None or cookie_path == path)]
+        if len(locations) > 1:
+            locations.sort(key=self._iteration_key)
+        return [self._cookies[cookie_domain][cookie_path][name]
+                for cookie_domain, cookie_path in locations]
+
+    def _iteration_key(self, location):
+        """Return a key sorting ``(domain, path)`` locations in the order the
+        jar iterates them in: sorted on Python 2, and in insertion order on
+        Python 3.
+        """
+        if is_py2:
+            return location
+        domain, path = location
+        return self._domain_order[domain], list(self._cookies[domain]).index(path)
+
+    def _find(self, name, domain=None, path=None):
+        """Requests uses this method internally to get cookie values.
+
+        If there are conflicting cookies, _find arbitrarily chooses one.
+
+        :return: cookie.value
+        """
+        for cookie in self._cookies_named(name, domain, path):
+            return cookie.value
+
+        raise KeyError('name=%r, domain=%r, path=%r' % (name, domain, path))
+
+    def _find_no_duplicates(self, name, domain=None, path=None):
+        """Both ``__get_item__`` and ``get`` call this function.
+
+        :raises KeyError: if cookie is not found
+        :raises CookieConflictError: if there are multiple cookies
+            that match name and optionally domain and path
+        :return: cookie.value
+        """
+        cookies = self._cookies_named(name, domain, path)
+        if len(cookies) > 1:
+            raise CookieConflictError('There are multiple cookies with name, %r' % (name))
+
+        if cookies and cookies[0].value:
+            return cookies[0].value
+        raise KeyError('name=%r, domain=%r, path=%r' % (name, domain, path))
+
+    def _cookies_for_request(self, request):
+        """Return a list of cookies to be returned to server.
+
+        With the default policy a cookie can only be returned if its domain is
+        empty or, ignoring a leading dot, is a suffix of the effective request
+        host, so only those domains are looked at, in the order a full scan
+        would visit them.
+        """
+        if type(self._policy) is not cookielib.DefaultCookiePolicy:
+            return super(IndexedCookieJar, self)._cookies_for_request(request)
+
+        domains = [d for d in _candidate_domains(request) if d in self._cookies]
+        domains.sort(key=self._domain_order.get)
+        cookies = []
+        for domain in domains:
+            cookies.extend(self._cookies_for_domain(domain, request))
+        return cookies
+
+    def copy(self):
+        """Return a copy of this IndexedCookieJar."""
+        new_cj = self.__class__(self._policy)
+        with self._cookies_lock:
+            for domain, paths in self._cookies.items():
+                new_cj._cookies[domain] = dict(
+                    (path, dict((name, copy.copy(cookie)) for name, cookie in names.items()))
+                    for path, names in paths.items()
+                )
+            new_cj._name_index = dict(
+                (name, set(locations)) for name, locations in self._name_index.items())
+            new_cj._domain_order = self._domain_order.copy()
+            new_cj._domain_count = self._domain_count
+            new_cj._next_expiry = self._next_expiry
+        return new_cj
+
+
+def _candidate_domains(request):
+    """Return the jar domains that may hold cookies for ``request``: the empty
+    domain plus every label-aligned suffix of the effective request host, both
+    with and without a leading dot.
+    """
+    erhn = cookielib.eff_request_host(request)[1]
+    domains = ['']
+    labels = erhn.split('.')
+    for i in range(len(labels)):
+        suffix = '.'.join(labels[i:])
+        for domain in (suffix, '.' + suffix):
+            if domain not in domains:
+                domains.append(domain)
+    return domains
+
+
 def _copy_cookie_jar(jar):
     if jar is None:
         return None
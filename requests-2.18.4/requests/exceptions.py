@@ -104,6 +104,10 @@ class RetryError(RequestException):
 class UnrewindableBodyError(RequestException):
     """Requests encountered an error when trying to rewind a body"""
 
+
+class LineTooLongError(RequestException, ValueError):
+    """A line of the response body exceeded the maximum line length"""
+
 # Warnings
 
 
@@ -10,15 +10,17 @@ Available hooks:
 
 ``response``:
     The response generated from a Request.
+
+``timings``:
+    A response whose ``timings`` breakdown is complete, once its body has been
+    read. Only dispatched by adapters that record timings.
 """
-HOOKS = ['response']
+HOOKS = ['response', 'timings']
 
 
 def default_hooks():
     return dict((event, []) for event in HOOKS)
 
-# TODO: response is the only one
-
 
 def dispatch_hook(key, hooks, hook_data, **kwargs):
     """Dispatches a hook dictionary on a given piece of data."""
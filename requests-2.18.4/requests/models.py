@@ -23,7 +23,7 @@ from urllib3.exceptions import (
     DecodeError, ReadTimeoutError, ProtocolError, LocationParseError)
 
 from io import UnsupportedOperation
-from .hooks import default_hooks
+from .hooks import default_hooks, dispatch_hook
 from .structures import CaseInsensitiveDict
 
 from .auth import HTTPBasicAuth
@@ -35,7 +35,8 @@ from ._internal_utils import to_native_string, unicode_is_ascii
 from .utils import (
     guess_filename, get_auth_from_url, requote_uri,
     stream_decode_response_unicode, to_key_val_list, parse_header_links,
-    iter_slices, guess_json_utf, super_len, check_header_validity)
+    iter_slices, guess_json_utf, super_len, check_header_validity,
+    iter_stream_lines)
 from .compat import (
     cookielib, urlunparse, urlsplit, urlencode, str, bytes,
     is_py2, chardet, builtin_str, basestring)
@@ -582,7 +583,7 @@ class Response(object):
 
     __attrs__ = [
         '_content', 'status_code', 'headers', 'url', 'history',
-        'encoding', 'reason', 'cookies', 'elapsed', 'request'
+        'encoding', 'reason', 'cookies', 'elapsed', 'request', 'timings'
     ]
 
     def __init__(self):
@@ -628,6 +629,11 @@ class Response(object):
         #: value of the ``stream`` keyword argument.
         self.elapsed = datetime.timedelta(0)
 
+        #: The :class:`RequestTimings <requests.timing.RequestTimings>`
+        #: breakdown of this exchange, if the adapter that sent it records
+        #: timings. Otherwise ``None``.
+        self.timings = None
+
         #: The :class:`PreparedRequest <PreparedRequest>` object to which this
         #: is a response.
         self.request = None
@@ -650,6 +656,9 @@ class Response(object):
         )
 
     def __setstate__(self, state):
+        # Responses pickled by older versions have no timings.
+        self.timings = None
+
         for name, value in state.items():
             setattr(self, name, value)
 
@@ -760,6 +769,10 @@ class Response(object):
 
             self._content_consumed = True
 
+            if self.timings is not None:
+                self.timings._mark_body_read()
+                dispatch_hook('timings', self.request.hooks, self)
+
         if self._content_consumed and isinstance(self._content, bool):
             raise StreamConsumedError()
         elif chunk_size is not None and not isinstance(chunk_size, int):
@@ -776,36 +789,45 @@ class Response(object):
 
         return chunks
 
-    def iter_lines(self, chunk_size=ITER_CHUNK_SIZE, decode_unicode=None, delimiter=None):
+    def iter_lines(self, chunk_size=ITER_CHUNK_SIZE, decode_unicode=None, delimiter=None,
+                   max_line_length=None):
         """Iterates over the response data, one line at a time.  When
         stream=True is set on the request, this avoids reading the
         content at once into memory for large responses.
 
+        :param delimiter: (optional) string separating lines. By default,
+            lines are split like ``str.splitlines()`` does.
+        :param max_line_length: (optional) maximum length of a line. Raises
+            :class:`LineTooLongError <requests.exceptions.LineTooLongError>`
+            as soon as a line grows past it, which bounds the memory held
+            for a single line.
+
         .. note:: This method is not reentrant safe.
         """
+        chunks = self.iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode)
+        for line in iter_stream_lines(chunks, delimiter=delimiter, max_line_length=max_line_length):
+            yield line
+
+    def iter_json(self, chunk_size=ITER_CHUNK_SIZE, delimiter=None, max_line_length=None,
+                  **kwargs):
+        r"""Iterates over a newline-delimited JSON (NDJSON) response,
+        yielding one decoded document per line. Blank lines are skipped.
+
+        :param delimiter: (optional) string separating documents.
+        :param max_line_length: (optional) maximum length of a line, see
+            :meth:`iter_lines`.
+        :param \*\*kwargs: Optional arguments that ``json.loads`` takes.
+        :raises ValueError: If a line does not contain valid json.
 
-        pending = None
-
-        for chunk in self.iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode):
-
-            if pending is not None:
-                chunk = pending + chunk
-
-            if delimiter:
-                lines = chunk.split(delimiter)
-            else:
-                lines = chunk.splitlines()
-
-            if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
-                pending = lines.pop()
-            else:
-                pending = None
-
-            for line in lines:
-                yield line
-
-        if pending is not None:
-            yield pending
+        .. note:: This method is not reentrant safe.
+        """
+        encoding = self.encoding or 'utf-8'
+        lines = self.iter_lines(chunk_size=chunk_size, delimiter=delimiter,
+                                max_line_length=max_line_length)
+        for line in lines:
+            if not line.strip():
+                continue
+            yield complexjson.loads(line.decode(encoding), **kwargs)
 
     @property
     def content(self):
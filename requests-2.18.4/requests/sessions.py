@@ -8,18 +8,17 @@ This module provides a Session object to manage and persist settings across
 requests (cookies, auth, proxies).
 """
 import os
-import platform
-import time
 from collections import Mapping
 from datetime import timedelta
 
 from .auth import _basic_auth_str
 from .compat import cookielib, is_py3, OrderedDict, urljoin, urlparse
 from .cookies import (
-    cookiejar_from_dict, extract_cookies_to_jar, RequestsCookieJar, merge_cookies)
+    cookiejar_from_dict, extract_cookies_to_jar, RequestsCookieJar,
+    IndexedCookieJar, merge_cookies)
 from .models import Request, PreparedRequest, DEFAULT_REDIRECT_LIMIT
 from .hooks import default_hooks, dispatch_hook
-from ._internal_utils import to_native_string
+from ._internal_utils import to_native_string, preferred_clock
 from .utils import to_key_val_list, default_headers
 from .exceptions import (
     TooManyRedirects, InvalidSchema, ChunkedEncodingError, ContentDecodingError)
@@ -37,14 +36,9 @@ from .status_codes import codes
 # formerly defined here, reexposed here for backward compatibility
 from .models import REDIRECT_STATI
 
-# Preferred clock, based on which one is more accurate on a given system.
-if platform.system() == 'Windows':
-    try:  # Python 3.3+
-        preferred_clock = time.perf_counter
-    except AttributeError:  # Earlier than Python 3.
-        preferred_clock = time.clock
-else:
-    preferred_clock = time.time
+from urllib3._collections import RecentlyUsedContainer
+
+REDIRECT_CACHE_SIZE = 1000
 
 
 def merge_setting(request_setting, session_setting, dict_class=OrderedDict):
@@ -82,15 +76,20 @@ def merge_hooks(request_hooks, session_hooks, dict_class=OrderedDict):
     """Properly merges both requests and session hooks.
 
     This is necessary because when request_hooks == {'response': []}, the
-    merge breaks Session hooks entirely.
+    merge breaks Session hooks entirely. Hooks are merged per event, so that
+    an event without request hooks keeps the Session hooks for it.
     """
-    if session_hooks is None or session_hooks.get('response') == []:
+    if session_hooks is None or not any(session_hooks.values()):
         return request_hooks
 
-    if request_hooks is None or request_hooks.get('response') == []:
+    if request_hooks is None or not any(request_hooks.values()):
         return session_hooks
 
-    return merge_setting(request_hooks, session_hooks, dict_class)
+    merged_hooks = dict_class(to_key_val_list(session_hooks))
+    for event, hooks in to_key_val_list(request_hooks):
+        if hooks:
+            merged_hooks[event] = hooks
+    return merged_hooks
 
 
 class SessionRedirectMixin(object):
@@ -163,6 +162,16 @@ class SessionRedirectMixin(object):
 
             self.rebuild_method(prepared_request, resp)
 
+            # Cache the redirect, unless it changed the method: the cached
+            # entry is only ever applied to requests with the same method.
+            # Classes using this mixin other than Session may have no cache.
+            redirect_cache = getattr(self, 'redirect_cache', None)
+            if (redirect_cache is not None and resp.is_permanent_redirect and
+                    req.url != prepared_request.url and
+                    prepared_request.method == req.method):
+                redirect_cache[(req.method, req.url)] = (
+                    prepared_request.url, resp.status_code)
+
             # https://github.com/requests/requests/issues/1084
             if resp.status_code not in (codes.temporary_redirect, codes.permanent_redirect):
                 # https://github.com/requests/requests/issues/3490
@@ -229,13 +238,16 @@ class SessionRedirectMixin(object):
         request to avoid leaking credentials. This method intelligently removes
         and reapplies authentication where possible to avoid credential loss.
         """
+        self._rebuild_auth_from(prepared_request, response.request.url)
+
+    def _rebuild_auth_from(self, prepared_request, original_url):
         headers = prepared_request.headers
         url = prepared_request.url
 
         if 'Authorization' in headers:
             # If we get redirected to a new host, we should strip out any
             # authentication headers.
-            original_parsed = urlparse(response.request.url)
+            original_parsed = urlparse(original_url)
             redirect_parsed = urlparse(url)
 
             if (original_parsed.hostname != redirect_parsed.hostname):
@@ -246,7 +258,49 @@ class SessionRedirectMixin(object):
         if new_auth is not None:
             prepared_request.prepare_auth(new_auth)
 
-        return
+    def resolve_cached_redirects(self, prepared_request, proxies):
+        """Rewrites a request to the final target of the permanent redirects
+        cached for it, so that it is sent there straight away. Cookies, auth
+        and proxies are rebuilt for the new URL just as when following the
+        redirects over the network.
+
+        :rtype: tuple(PreparedRequest, dict)
+        """
+        redirect_cache = getattr(self, 'redirect_cache', None)
+        if redirect_cache is None:
+            return prepared_request, proxies
+
+        url = prepared_request.url
+        has_body = prepared_request.body is not None
+        checked_urls = set()
+        while True:
+            cached = redirect_cache.get((prepared_request.method, url))
+            if cached is None:
+                break
+            target, status_code = cached
+            # A 301 drops the body of the request, which a cached
+            # redirect cannot do; only 308 keeps it.
+            if has_body and status_code != codes.permanent_redirect:
+                break
+            if target in checked_urls:
+                break
+            checked_urls.add(url)
+            url = target
+
+        if url == prepared_request.url:
+            return prepared_request, proxies
+
+        request = prepared_request.copy()
+        request.url = url
+
+        request.headers.pop('Cookie', None)
+        if request._cookies is not None:
+            request.prepare_cookies(request._cookies)
+
+        proxies = self.rebuild_proxies(request, proxies)
+        self._rebuild_auth_from(request, prepared_request.url)
+
+        return request, proxies
 
     def rebuild_proxies(self, prepared_request, proxies):
         """This method re-evaluates the proxy configuration by considering the
@@ -334,7 +388,7 @@ class Session(SessionRedirectMixin):
     __attrs__ = [
         'headers', 'cookies', 'auth', 'proxies', 'hooks', 'params', 'verify',
         'cert', 'prefetch', 'adapters', 'stream', 'trust_env',
-        'max_redirects',
+        'max_redirects', 'redirect_cache',
     ]
 
     def __init__(self):
@@ -387,6 +441,12 @@ class Session(SessionRedirectMixin):
         #: may be any other ``cookielib.CookieJar`` compatible object.
         self.cookies = cookiejar_from_dict({})
 
+        #: Permanent (301 and 308) redirects followed by this session, keyed
+        #: by ``(method, url)``, so that later requests skip the round-trip.
+        #: Holds the :data:`REDIRECT_CACHE_SIZE` most recently used entries;
+        #: call ``redirect_cache.clear()`` to forget them.
+        self.redirect_cache = RecentlyUsedContainer(REDIRECT_CACHE_SIZE)
+
         # Default connection adapters.
         self.adapters = OrderedDict()
         self.mount('https://', HTTPAdapter())
@@ -415,8 +475,7 @@ class Session(SessionRedirectMixin):
             cookies = cookiejar_from_dict(cookies)
 
         # Merge with session cookies
-        merged_cookies = merge_cookies(
-            merge_cookies(RequestsCookieJar(), self.cookies), cookies)
+        merged_cookies = self._merge_cookies(cookies)
 
         # Set environment's basic authentication if not explicitly set.
         auth = request.auth
@@ -438,10 +497,36 @@ class Session(SessionRedirectMixin):
         )
         return p
 
+    def _merge_cookies(self, cookies):
+        """Returns a new CookieJar holding this session's cookies, updated
+        with ``cookies``.
+        """
+        if isinstance(self.cookies, IndexedCookieJar):
+            session_cookies = self.cookies.copy()
+        else:
+            session_cookies = merge_cookies(RequestsCookieJar(), self.cookies)
+        return merge_cookies(session_cookies, cookies)
+
+    def prepare_template(self, request):
+        """Constructs a :class:`RequestTemplate <RequestTemplate>` from a
+        :class:`Request <Request>`, for sending many requests that only differ
+        in their body.
+
+        The method, URL, headers, auth and hooks are merged with this
+        session's settings once, here; cookies are merged each time a request
+        is stamped out of the template, so that it sees the session's current
+        cookies.
+
+        :param request: :class:`Request` instance to use as the template.
+        :rtype: requests.sessions.RequestTemplate
+        """
+        return RequestTemplate(self, request)
+
     def request(self, method, url,
             params=None, data=None, headers=None, cookies=None, files=None,
             auth=None, timeout=None, allow_redirects=True, proxies=None,
-            hooks=None, stream=None, verify=None, cert=None, json=None):
+            hooks=None, stream=None, verify=None, cert=None, json=None,
+            use_redirect_cache=True):
         """Constructs a :class:`Request <Request>`, prepares it and sends it.
         Returns :class:`Response <Response>` object.
 
@@ -476,6 +561,9 @@ class Session(SessionRedirectMixin):
             to a CA bundle to use. Defaults to ``True``.
         :param cert: (optional) if String, path to ssl client cert file (.pem).
             If Tuple, ('cert', 'key') pair.
+        :param use_redirect_cache: (optional) Whether to skip permanent
+            redirects already followed by this session. Defaults to ``True``.
+        :type use_redirect_cache: bool
         :rtype: requests.Response
         """
         # Create the Request.
@@ -503,6 +591,7 @@ class Session(SessionRedirectMixin):
         send_kwargs = {
             'timeout': timeout,
             'allow_redirects': allow_redirects,
+            'use_redirect_cache': use_redirect_cache,
         }
         send_kwargs.update(settings)
         resp = self.send(prep, **send_kwargs)
@@ -605,9 +694,15 @@ class Session(SessionRedirectMixin):
 
         # Set up variables needed for resolve_redirects and dispatching of hooks
         allow_redirects = kwargs.pop('allow_redirects', True)
+        use_redirect_cache = kwargs.pop('use_redirect_cache', True)
         stream = kwargs.get('stream')
         hooks = request.hooks
 
+        # Skip permanent redirects we already know about.
+        if allow_redirects and use_redirect_cache:
+            request, kwargs['proxies'] = self.resolve_cached_redirects(
+                request, kwargs['proxies'])
+
         # Get the appropriate adapter to use
         adapter = self.get_adapter(url=request.url)
 
@@ -720,12 +815,107 @@ class Session(SessionRedirectMixin):
 
     def __getstate__(self):
         state = dict((attr, getattr(self, attr, None)) for attr in self.__attrs__)
+        state['redirect_cache'] = dict(self.redirect_cache)
         return state
 
     def __setstate__(self, state):
+        redirect_cache = state.pop('redirect_cache', {})
         for attr, value in state.items():
             setattr(self, attr, value)
 
+        self.redirect_cache = RecentlyUsedContainer(REDIRECT_CACHE_SIZE)
+        for redirect, to in redirect_cache.items():
+            self.redirect_cache[redirect] = to
+
+
+class RequestTemplate(object):
+    """A :class:`Request <Request>` merged with a :class:`Session`'s settings
+    once, from which :class:`PreparedRequest <PreparedRequest>` objects are
+    stamped out cheaply.
+
+    Preparing a request from a template skips merging the session settings
+    and parsing, IDNA-encoding and requoting the URL; only the cookies, the
+    body, auth and hooks are prepared for each request. Later changes to the
+    session's headers, params, auth or hooks are not picked up by an existing
+    template, changes to its cookies are.
+
+    Usage::
+
+      >>> import requests
+      >>> s = requests.Session()
+      >>> req = requests.Request('POST', 'http://httpbin.org/post')
+      >>> template = s.prepare_template(req)
+      >>> template.send(json={'id': 1})
+      <Response [200]>
+    """
+
+    def __init__(self, session, request):
+        #: The :class:`Session` the template was prepared with.
+        self.session = session
+
+        base = PreparedRequest()
+        base.prepare_method(request.method)
+        base.prepare_url(request.url, merge_setting(request.params, session.params))
+        base.prepare_headers(merge_setting(request.headers, session.headers,
+                                           dict_class=CaseInsensitiveDict))
+        self._base = base
+
+        cookies = request.cookies or {}
+        if not isinstance(cookies, cookielib.CookieJar):
+            cookies = cookiejar_from_dict(cookies)
+        self._cookies = cookies
+
+        auth = request.auth
+        if session.trust_env and not auth and not session.auth:
+            auth = get_netrc_auth(request.url)
+        auth = merge_setting(auth, session.auth)
+        if auth is None:
+            # Resolve auth from the URL now, rather than on every request.
+            url_auth = get_auth_from_url(base.url)
+            auth = url_auth if any(url_auth) else None
+        self._auth = auth
+
+        self._hooks = merge_hooks(request.hooks, session.hooks)
+        self._body = (request.data, request.files, request.json)
+        self._settings = session.merge_environment_settings(
+            base.url, {}, None, None, None)
+
+    def __repr__(self):
+        return '<RequestTemplate [%s %s]>' % (self._base.method, self._base.url)
+
+    def prepare(self, data=None, files=None, json=None):
+        """Stamps out a :class:`PreparedRequest <PreparedRequest>` from this
+        template. If no body is given, the body of the template's
+        :class:`Request <Request>` is used.
+
+        :rtype: requests.PreparedRequest
+        """
+        if data is None and files is None and json is None:
+            data, files, json = self._body
+
+        p = PreparedRequest()
+        p.method = self._base.method
+        p.url = self._base.url
+        p.headers = self._base.headers.copy()
+        p.prepare_cookies(self.session._merge_cookies(self._cookies))
+        p.prepare_body(data, files, json)
+        if self._auth:
+            p.prepare_auth(self._auth, p.url)
+        p.prepare_hooks(self._hooks)
+        return p
+
+    def send(self, data=None, files=None, json=None, **kwargs):
+        r"""Stamps out a request from this template and sends it with the
+        template's session.
+
+        :param \*\*kwargs: Optional arguments that ``Session.send`` takes,
+            overriding the environment settings resolved for the template.
+        :rtype: requests.Response
+        """
+        send_kwargs = dict(self._settings)
+        send_kwargs.update(kwargs)
+        return self.session.send(self.prepare(data, files, json), **send_kwargs)
+
 
 def session():
     """
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""
+requests.timing
+~~~~~~~~~~~~~~~
+
+This module contains the per-request timing breakdown recorded by the
+:class:`HTTPAdapter <requests.adapters.HTTPAdapter>` when it is created with
+``record_timings=True``, together with the instrumented urllib3 connection
+pools that feed it.
+"""
+
+import socket
+import threading
+from socket import error as SocketError, timeout as SocketTimeout
+
+from urllib3.connection import DummyConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family, _set_socket_options
+
+from ._internal_utils import preferred_clock
+
+_state = threading.local()
+
+
+class RequestTimings(object):
+    """The timing breakdown of a single request/response exchange.
+
+    All durations are in seconds. Phases that did not take place, such as
+    DNS resolution on a connection reused from the pool, or the body transfer
+    of a streamed response that has not been read yet, are ``None``.
+    """
+
+    __attrs__ = [
+        'dns', 'connect', 'tls', 'send', 'ttfb', 'transfer', 'total', 'reused'
+    ]
+
+    def __init__(self):
+        #: Time spent resolving the host name.
+        self.dns = None
+
+        #: Time spent establishing the TCP connection.
+        self.connect = None
+
+        #: Time spent on the TLS handshake (and proxy tunnel, if any).
+        self.tls = None
+
+        #: Time spent writing the request line, headers and body.
+        self.send = None
+
+        #: Time from the request being sent until the response headers
+        #: were received.
+        self.ttfb = None
+
+        #: Time spent reading the response body.
+        self.transfer = None
+
+        #: Time from the adapter starting the request until the body was
+        #: read (or until the headers were received, if it has not been).
+        self.total = None
+
+        #: Whether the request was sent over a connection reused from the
+        #: pool, or ``None`` if that is not known.
+        self.reused = None
+
+        self._start = preferred_clock()
+        self._connected = None
+        self._send_start = None
+        self._sent = None
+        self._headers_received = None
+
+    def __repr__(self):
+        return '<RequestTimings total=%r reused=%r>' % (self.total, self.reused)
+
+    def as_dict(self):
+        """Returns the recorded phases as a plain dict, e.g. for logging.
+
+        :rtype: dict
+        """
+        return dict((attr, getattr(self, attr)) for attr in self.__attrs__)
+
+    def _mark_headers_received(self):
+        self._headers_received = preferred_clock()
+        if self._sent is not None:
+            self.ttfb = self._headers_received - self._sent
+        self.total = self._headers_received - self._start
+
+    def _mark_body_read(self):
+        now = preferred_clock()
+        if self._headers_received is not None:
+            self.transfer = now - self._headers_received
+        self.total = now - self._start
+
+
+def start_recording(timings):
+    """Makes ``timings`` collect the connection-level phases of the request
+    about to be sent from the current thread.
+    """
+    _state.timings = timings
+
+
+def stop_recording():
+    """Stops collecting connection-level phases in the current thread."""
+    _state.timings = None
+
+
+def _current_timings():
+    return getattr(_state, 'timings', None)
+
+
+class _TimedConnectionMixin(object):
+    """Records DNS, connect, send and time-to-first-byte phases into the
+    :class:`RequestTimings` being recorded in the current thread, if any.
+    """
+
+    def _new_conn(self):
+        timings = _current_timings()
+        if timings is None:
+            return super(_TimedConnectionMixin, self)._new_conn()
+
+        timings.reused = False
+        try:
+            return self._timed_create_connection(timings)
+
+        except SocketTimeout:
+            raise ConnectTimeoutError(
+                self, "Connection to %s timed out. (connect timeout=%s)" %
+                (self.host, self.timeout))
+
+        except SocketError as e:
+            raise NewConnectionError(
+                self, "Failed to establish a new connection: %s" % e)
+
+    def _timed_create_connection(self, timings):
+        # Same as urllib3.util.connection.create_connection, with the name
+        # lookup and the connection attempts timed separately.
+        host = self.host
+        if host.startswith('['):
+            host = host.strip('[]')
+
+        start = preferred_clock()
+        addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        resolved = preferred_clock()
+        timings.dns = resolved - start
+
+        err = None
+        for af, socktype, proto, canonname, sa in addresses:
+            sock = None
+            try:
+                sock = socket.socket(af, socktype, proto)
+                _set_socket_options(sock, self.socket_options)
+                if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(self.timeout)
+                if self.source_address:
+                    sock.bind(self.source_address)
+                sock.connect(sa)
+            except SocketError as e:
+                err = e
+                if sock is not None:
+                    sock.close()
+                continue
+
+            timings._connected = preferred_clock()
+            timings.connect = timings._connected - resolved
+            return sock
+
+        if err is not None:
+            raise err
+        raise SocketError("getaddrinfo returns an empty list")
+
+    def send(self, data):
+        timings = _current_timings()
+        if timings is None:
+            return super(_TimedConnectionMixin, self).send(data)
+
+        if timings._send_start is None:
+            if self.sock is None and self.auto_open:
+                self.connect()
+            if timings.reused is None:
+                timings.reused = True
+            timings._send_start = preferred_clock()
+
+        super(_TimedConnectionMixin, self).send(data)
+        timings._sent = preferred_clock()
+        timings.send = timings._sent - timings._send_start
+
+    def getresponse(self, *args, **kwargs):
+        response = super(_TimedConnectionMixin, self).getresponse(*args, **kwargs)
+        timings = _current_timings()
+        if timings is not None:
+            timings._mark_headers_received()
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnectionPool.ConnectionCls):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+#: The urllib3 connection pool classes used by adapters recording timings.
+pool_classes_by_scheme = {'http': TimedHTTPConnectionPool}
+
+if HTTPSConnectionPool.ConnectionCls is not DummyConnection:
+
+    class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnectionPool.ConnectionCls):
+
+        def connect(self):
+            super(TimedHTTPSConnection, self).connect()
+            timings = _current_timings()
+            if timings is not None and timings._connected is not None:
+                timings.tls = preferred_clock() - timings._connected
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    pool_classes_by_scheme['https'] = TimedHTTPSConnectionPool
@@ -32,7 +32,8 @@ from .compat import (
 from .cookies import cookiejar_from_dict
 from .structures import CaseInsensitiveDict
 from .exceptions import (
-    InvalidURL, InvalidHeader, FileModeWarning, UnrewindableBodyError)
+    InvalidURL, InvalidHeader, FileModeWarning, UnrewindableBodyError,
+    LineTooLongError)
 
 NETRC_FILES = ('.netrc', '_netrc')
 
@@ -456,6 +457,109 @@ def iter_slices(string, slice_length):
         pos += slice_length
 
 
+# The line boundaries recognised by bytes.splitlines() and str.splitlines().
+_BYTES_LINE_BREAK_RE = re.compile(b'\r\n|[\r\n]')
+_STR_LINE_BREAK_RE = re.compile(u'\r\n|[\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def iter_stream_lines(iterator, delimiter=None, max_line_length=None):
+    r"""Split an iterator of bytes or unicode chunks into lines.
+
+    Each chunk is scanned once: the unfinished line is kept as a list of
+    pieces and only joined when its delimiter arrives, so a line spread over
+    many chunks costs time linear in its length.
+
+    :param iterator: iterable of chunks, all bytes or all unicode.
+    :param delimiter: (optional) string separating lines. By default, lines
+        are split on the same boundaries as ``splitlines()``, including a
+        ``\r\n`` that straddles two chunks.
+    :param max_line_length: (optional) maximum length of a line, excluding
+        its delimiter.
+    :raises LineTooLongError: if a line grows past ``max_line_length``.
+    """
+    pieces = []
+    pending_length = 0
+    # The end of the pending line, long enough to hold all but the last
+    # character of a multi-character delimiter.
+    tail = None
+    skip_lf = False
+
+    def too_long(length):
+        return max_line_length is not None and length > max_line_length
+
+    for chunk in iterator:
+        if not chunk:
+            continue
+
+        start = 0
+        if skip_lf:
+            skip_lf = False
+            if chunk[:1] in (b'\n', u'\n'):
+                start = 1
+
+        if delimiter and pieces and len(delimiter) > 1:
+            # Look for a delimiter that starts in the pending line and ends
+            # in this chunk.
+            index = (tail + chunk[:len(delimiter) - 1]).find(delimiter)
+            if index != -1:
+                line = chunk[:0].join(pieces)[:pending_length - len(tail) + index]
+                pieces = []
+                pending_length = 0
+                start = index + len(delimiter) - len(tail)
+                if too_long(len(line)):
+                    raise LineTooLongError(
+                        'Line exceeds %d characters' % max_line_length)
+                yield line
+
+        if delimiter:
+            line_break_re = None
+        elif isinstance(chunk, bytes):
+            line_break_re = _BYTES_LINE_BREAK_RE
+        else:
+            line_break_re = _STR_LINE_BREAK_RE
+
+        while True:
+            if line_break_re is None:
+                index = chunk.find(delimiter, start)
+                if index == -1:
+                    break
+                end = index + len(delimiter)
+            else:
+                match = line_break_re.search(chunk, start)
+                if match is None:
+                    break
+                index, end = match.span()
+
+            line = chunk[start:index]
+            if pieces:
+                pieces.append(line)
+                line = line[:0].join(pieces)
+                pieces = []
+                pending_length = 0
+            if too_long(len(line)):
+                raise LineTooLongError(
+                    'Line exceeds %d characters' % max_line_length)
+            yield line
+            start = end
+
+        if start < len(chunk):
+            rest = chunk[start:]
+            pieces.append(rest)
+            pending_length += len(rest)
+            if delimiter and len(delimiter) > 1:
+                keep = len(delimiter) - 1
+                tail = ((tail if len(pieces) > 1 else rest[:0]) + rest[-keep:])[-keep:]
+            if too_long(pending_length):
+                raise LineTooLongError(
+                    'Line exceeds %d characters' % max_line_length)
+        elif line_break_re is not None and chunk[-1:] in (b'\r', u'\r'):
+            # The matching \n, if any, arrives with the next chunk.
+            skip_lf = True
+
+    if pieces:
+        yield pieces[0][:0].join(pieces)
+
+
 def get_unicode_from_response(r):
     """Returns the requested content back in unicode.
 
@@ -20,4 +20,4 @@ def test_hooks(hooks_list, result):
 
 
 def test_default_hooks():
-    assert hooks.default_hooks() == {'response': []}
+    assert hooks.default_hooks() == {'response': [], 'timings': []}
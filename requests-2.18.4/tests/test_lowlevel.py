@@ -24,6 +24,35 @@ def test_chunked_upload():
     assert r.request.headers['Transfer-Encoding'] == 'chunked'
 
 
+def test_timings_record_connection_reuse():
+    """Only the first request on a kept-alive connection connects."""
+    text_200 = (b'HTTP/1.1 200 OK\r\n'
+                b'Content-Length: 2\r\n\r\nok')
+
+    def keep_alive_handler(sock):
+        for _ in range(2):
+            consume_socket_content(sock, timeout=0.5)
+            sock.send(text_200)
+
+    close_server = threading.Event()
+    server = Server(keep_alive_handler, wait_to_close_event=close_server)
+
+    with server as (host, port):
+        url = 'http://{0}:{1}/'.format(host, port)
+        s = requests.Session()
+        s.mount('http://', requests.adapters.HTTPAdapter(record_timings=True))
+        first = s.get(url)
+        second = s.get(url)
+        close_server.set()
+
+    assert first.timings.reused is False
+    assert first.timings.connect >= 0
+    assert second.timings.reused is True
+    assert second.timings.dns is None
+    assert second.timings.connect is None
+    assert second.timings.ttfb >= 0
+
+
 def test_digestauth_401_count_reset_on_redirect():
     """Ensure we correctly reset num_401_calls after a successful digest auth,
     followed by a 302 redirect to another digest auth prompt.
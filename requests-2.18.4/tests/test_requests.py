@@ -19,7 +19,8 @@ from requests.compat import (
     Morsel, cookielib, getproxies, str, urlparse,
     builtin_str, OrderedDict)
 from requests.cookies import (
-    cookiejar_from_dict, morsel_to_cookie)
+    cookiejar_from_dict, morsel_to_cookie, get_cookie_header,
+    IndexedCookieJar, RequestsCookieJar, CookieConflictError)
 from requests.exceptions import (
     ConnectionError, ConnectTimeout, InvalidSchema, InvalidURL,
     MissingSchema, ReadTimeout, Timeout, RetryError, TooManyRedirects,
@@ -1679,6 +1680,24 @@ class TestRequests:
         next(it)
         assert len(list(it)) == 3
 
+    def test_response_iter_lines_crlf_across_chunks(self):
+        r = requests.Response()
+        r.raw = io.BytesIO(b'first\r\nsecond\r\n')
+        assert list(r.iter_lines(chunk_size=6)) == [b'first', b'second']
+
+    def test_response_iter_json(self):
+        r = requests.Response()
+        r.raw = io.BytesIO(b'{"a": 1}\n\n[2, 3]\r\n"\xc3\xa9"\n')
+        assert list(r.iter_json(chunk_size=3)) == [{'a': 1}, [2, 3], u'\xe9']
+
+    def test_response_iter_json_invalid_line(self):
+        r = requests.Response()
+        r.raw = io.BytesIO(b'{"a": 1}\n{"a"\n')
+        documents = r.iter_json()
+        assert next(documents) == {'a': 1}
+        with pytest.raises(ValueError):
+            next(documents)
+
     def test_response_context_manager(self, httpbin):
         with requests.get(httpbin('stream/4'), stream=True) as response:
             assert isinstance(response, requests.Response)
@@ -2019,6 +2038,88 @@ class TestMorselToCookieMaxAge:
             morsel_to_cookie(morsel)
 
 
+class TestIndexedCookieJar:
+
+    @staticmethod
+    def _fill(jar):
+        jar.set('a', '1', domain='example.com')
+        jar.set('a', '2', domain='.example.com', path='/api')
+        jar.set('b', '3', domain='sub.example.com')
+        jar.set('c', '4', domain='other.org')
+        jar.set('d', '5', domain='.example.com', secure=True)
+        jar.set('e', '6')
+        return jar
+
+    @pytest.mark.parametrize(
+        'url', (
+            'http://example.com/',
+            'http://example.com/api/v1',
+            'https://sub.example.com/api',
+            'http://other.org/',
+            'http://unrelated.net/',
+            'http://localhost/',
+        ))
+    def test_cookie_header_matches_requests_cookie_jar(self, url):
+        request = requests.Request('GET', url).prepare()
+        expected = get_cookie_header(self._fill(RequestsCookieJar()), request)
+        assert get_cookie_header(self._fill(IndexedCookieJar()), request) == expected
+
+    def test_get_and_conflicts(self):
+        jar = self._fill(IndexedCookieJar())
+        assert jar['b'] == '3'
+        assert jar.get('a', domain='example.com') == '1'
+        assert jar.get('a', path='/api') == '2'
+        assert jar.get('missing', 'default') == 'default'
+        assert jar._find('a') == RequestsCookieJar._find(jar, 'a')
+        expected = [cookie.value for cookie in self._fill(RequestsCookieJar())
+                    if cookie.name == 'a']
+        assert [cookie.value for cookie in jar._cookies_named('a')] == expected
+        with pytest.raises(CookieConflictError):
+            jar['a']
+        with pytest.raises(KeyError):
+            jar['missing']
+
+    def test_delete_and_clear_keep_index_in_sync(self):
+        jar = self._fill(IndexedCookieJar())
+        del jar['a']
+        assert 'a' not in jar
+        jar.set('b', None)
+        assert 'b' not in jar
+        jar.clear('other.org')
+        assert 'c' not in jar
+        assert set(jar.keys()) == set(['d', 'e'])
+        jar.clear()
+        assert len(jar) == 0
+        assert jar.get('e') is None
+
+    def test_expired_cookies_are_cleared(self):
+        jar = IndexedCookieJar()
+        jar.set('fresh', 'yes')
+        jar.set('stale', 'no', expires=1)
+        request = requests.Request('GET', 'http://example.com/').prepare()
+        assert get_cookie_header(jar, request) == 'fresh=yes'
+        assert 'stale' not in jar
+        assert jar._next_expiry is None
+
+    def test_copy_and_pickle(self):
+        jar = self._fill(IndexedCookieJar())
+        for other in (jar.copy(), pickle.loads(pickle.dumps(jar))):
+            assert isinstance(other, IndexedCookieJar)
+            assert sorted(other.items()) == sorted(jar.items())
+            other.set('f', '7')
+            assert 'f' not in jar
+            assert other['f'] == '7'
+
+    def test_session_with_indexed_jar(self, httpbin):
+        s = requests.Session()
+        s.cookies = IndexedCookieJar()
+        s.get(httpbin('cookies/set?foo=bar'))
+        assert s.cookies['foo'] == 'bar'
+        r = s.get(httpbin('cookies'), cookies={'baz': 'qux'})
+        assert r.json()['cookies'] == {'foo': 'bar', 'baz': 'qux'}
+        assert 'baz' not in s.cookies
+
+
 class TestTimeout:
 
     def test_stream_timeout(self, httpbin):
@@ -2165,6 +2266,15 @@ def test_requests_are_updated_each_time(httpbin):
         assert session.calls[-1] == send_call
 
 
+def test_redirect_mixin_without_redirect_cache(httpbin):
+    session = RedirectSession([301])
+    prep = requests.Request('GET', httpbin('get')).prepare()
+    assert session.resolve_cached_redirects(prep, {}) == (prep, {})
+    r0 = session.send(prep)
+    responses = list(session.resolve_redirects(r0, prep))
+    assert [r.status_code for r in responses] == [200]
+
+
 @pytest.mark.parametrize("var,url,proxy", [
     ('http_proxy', 'http://example.com', 'socks5://proxy.com:9876'),
     ('https_proxy', 'https://example.com', 'socks5://proxy.com:9876'),
@@ -2257,6 +2367,204 @@ def test_urllib3_pool_connection_closed(httpbin):
         assert u"Pool is closed." in str(e)
 
 
+class TestRequestTimings:
+
+    def test_no_timings_by_default(self, httpbin):
+        r = requests.get(httpbin('get'))
+        assert r.timings is None
+
+    def test_timings_recorded(self, httpbin):
+        s = requests.Session()
+        s.mount('http://', HTTPAdapter(record_timings=True))
+        r = s.get(httpbin('bytes/1024'))
+
+        assert r.timings.reused is False
+        for phase in ('dns', 'connect', 'send', 'ttfb', 'transfer', 'total'):
+            assert getattr(r.timings, phase) >= 0
+        assert r.timings.tls is None
+        assert set(r.timings.as_dict()) == set(r.timings.__attrs__)
+
+    def test_timings_hook_waits_for_body(self, httpbin):
+        seen = []
+        s = requests.Session()
+        s.mount('http://', HTTPAdapter(record_timings=True))
+        s.hooks['timings'].append(lambda r, *args, **kwargs: seen.append(r))
+
+        r = s.get(httpbin('stream/4'), stream=True)
+        assert seen == []
+        assert r.timings.transfer is None
+        r.content
+        assert seen == [r]
+        assert r.timings.transfer >= 0
+        assert r.timings.total >= r.timings.ttfb
+
+    def test_session_and_request_hooks_merge_per_event(self, httpbin):
+        hook = lambda r, *args, **kwargs: r
+        s = requests.Session()
+        s.hooks['timings'].append(hook)
+        r = requests.Request('GET', httpbin(), hooks={'response': [hook]})
+        prep = s.prepare_request(r)
+        assert prep.hooks['response'] == [hook]
+        assert prep.hooks['timings'] == [hook]
+
+    def test_adapter_with_timings_pickles(self, httpbin):
+        s = requests.Session()
+        s.mount('http://', HTTPAdapter(record_timings=True))
+        s = pickle.loads(pickle.dumps(s))
+        r = s.get(httpbin('get'))
+        assert r.timings.total >= 0
+        assert pickle.loads(pickle.dumps(r)).timings.as_dict() == r.timings.as_dict()
+
+    def test_unpickle_state_without_timings(self):
+        # As pickled before timings were recorded
+        state = HTTPAdapter().__getstate__()
+        del state['record_timings']
+        adapter = HTTPAdapter.__new__(HTTPAdapter)
+        adapter.__setstate__(state)
+        assert adapter.record_timings is False
+
+        state = requests.Response().__getstate__()
+        del state['timings']
+        response = requests.Response.__new__(requests.Response)
+        response.__setstate__(state)
+        assert response.timings is None
+
+
+class TestRequestTemplate:
+
+    def test_matches_prepare_request(self, httpbin):
+        s = requests.Session()
+        s.headers['X-Session'] = 'yes'
+        s.params = {'session': 'param'}
+        s.cookies['session_cookie'] = 'sc'
+        req = requests.Request('POST', httpbin('post'), headers={'X-Req': 'yes'},
+                               params={'q': u'ü'}, auth=('user', 'pass'),
+                               cookies={'req_cookie': 'rc'})
+        expected = s.prepare_request(
+            requests.Request('POST', req.url, headers=req.headers, params=req.params,
+                             auth=req.auth, cookies=req.cookies, json={'id': 1}))
+
+        template = s.prepare_template(req)
+        p = template.prepare(json={'id': 1})
+
+        assert p.method == expected.method
+        assert p.url == expected.url
+        assert p.headers == expected.headers
+        assert p.body == expected.body
+
+    def test_cookies_are_read_per_request(self, httpbin):
+        s = requests.Session()
+        template = s.prepare_template(requests.Request('GET', httpbin('cookies')))
+        assert 'Cookie' not in template.prepare().headers
+
+        s.cookies['foo'] = 'bar'
+        assert template.prepare().headers['Cookie'] == 'foo=bar'
+        assert template.send().json()['cookies'] == {'foo': 'bar'}
+
+    def test_requests_do_not_share_state(self, httpbin):
+        hook = lambda r, *args, **kwargs: r
+        s = requests.Session()
+        s.hooks['response'].append(hook)
+        template = s.prepare_template(
+            requests.Request('POST', httpbin('post'), data={'default': 'body'}))
+
+        first = template.prepare(json={'a': 1})
+        first.headers['X-Changed'] = 'yes'
+        second = template.prepare()
+
+        assert 'X-Changed' not in second.headers
+        assert second.body == 'default=body'
+        assert second.headers['Content-Type'] == 'application/x-www-form-urlencoded'
+        assert second.hooks['response'] == [hook]
+        assert first.hooks['response'] is not second.hooks['response']
+
+    def test_auth_from_url(self, httpbin):
+        url = httpbin('basic-auth', 'user', 'pass').replace('http://', 'http://user:pass@')
+        s = requests.Session()
+        template = s.prepare_template(requests.Request('GET', url))
+        assert template.send().status_code == 200
+        assert template.send().status_code == 200
+
+    def test_send(self, httpbin):
+        s = requests.Session()
+        template = s.prepare_template(requests.Request('POST', httpbin('post')))
+        for i in range(3):
+            r = template.send(json={'id': i}, timeout=10)
+            assert r.json()['json'] == {'id': i}
+
+
+class TestRedirectCache:
+
+    @staticmethod
+    def redirect(httpbin, target, status_code):
+        return httpbin('redirect-to') + '?' + urlencode(
+            {'url': target, 'status_code': status_code})
+
+    def test_permanent_redirect_is_cached(self, httpbin):
+        s = requests.Session()
+        url = self.redirect(httpbin, httpbin('get'), 301)
+        assert len(s.get(url).history) == 1
+        assert s.redirect_cache[('GET', url)] == (httpbin('get'), 301)
+
+        r = s.get(url)
+        assert r.history == []
+        assert r.url == httpbin('get')
+
+    def test_temporary_redirect_is_not_cached(self, httpbin):
+        s = requests.Session()
+        url = self.redirect(httpbin, httpbin('get'), 302)
+        s.get(url)
+        assert len(s.redirect_cache) == 0
+        assert len(s.get(url).history) == 1
+
+    def test_opt_out(self, httpbin):
+        s = requests.Session()
+        url = self.redirect(httpbin, httpbin('get'), 301)
+        s.get(url)
+        assert len(s.get(url, use_redirect_cache=False).history) == 1
+        assert len(s.get(url, allow_redirects=False).history) == 0
+        assert s.get(url, allow_redirects=False).status_code == 301
+
+    def test_rewritten_method_is_not_cached(self, httpbin):
+        s = requests.Session()
+        url = self.redirect(httpbin, httpbin('get'), 301)
+        r = s.post(url, data='body')
+        assert r.request.method == 'GET'
+        assert len(s.redirect_cache) == 0
+
+    def test_body_is_kept_for_308(self, httpbin):
+        s = requests.Session()
+        url = self.redirect(httpbin, httpbin('post'), 308)
+        s.post(url, data='first')
+        r = s.post(url, data='second')
+        assert r.history == []
+        assert r.json()['data'] == 'second'
+
+    def test_cookies_and_auth_are_rebuilt(self, httpbin):
+        s = requests.Session()
+        target = httpbin('headers').replace('127.0.0.1', 'localhost')
+        url = self.redirect(httpbin, target, 301)
+        s.get(url)
+
+        s.cookies.set('foo', 'bar', domain='127.0.0.1')
+        r = s.get(url, auth=('user', 'pass'))
+        assert r.history == []
+        assert 'Cookie' not in r.json()['headers']
+        assert 'Authorization' not in r.json()['headers']
+
+    def test_clear_and_pickle(self, httpbin):
+        s = requests.Session()
+        url = self.redirect(httpbin, httpbin('get'), 301)
+        s.get(url)
+
+        s = pickle.loads(pickle.dumps(s))
+        assert s.redirect_cache[('GET', url)] == (httpbin('get'), 301)
+        assert s.get(url).history == []
+
+        s.redirect_cache.clear()
+        assert len(s.get(url).history) == 1
+
+
 class TestPreparingURLs(object):
     @pytest.mark.parametrize(
         'url,expected',
@@ -13,13 +13,14 @@ from requests.utils import (
     get_auth_from_url, get_encoding_from_headers,
     get_encodings_from_content, get_environ_proxies,
     guess_filename, guess_json_utf, is_ipv4_address,
-    is_valid_cidr, iter_slices, parse_dict_header,
+    is_valid_cidr, iter_slices, iter_stream_lines, parse_dict_header,
     parse_header_links, prepend_scheme_if_needed,
     requote_uri, select_proxy, should_bypass_proxies, super_len,
     to_key_val_list, to_native_string,
     unquote_header_value, unquote_unreserved,
     urldefragauth, add_dict_to_cookiejar, set_environ)
 from requests._internal_utils import unicode_is_ascii
+from requests.exceptions import LineTooLongError
 
 from .compat import StringIO, cStringIO
 
@@ -477,6 +478,55 @@ def test_iter_slices(value, length):
         assert len(list(iter_slices(value, 1))) == length
 
 
+class TestIterStreamLines:
+
+    @pytest.mark.parametrize(
+        'content', (
+            b'',
+            b'one line',
+            b'a\nb\r\nc\rd\n\ne\n',
+            b'\r\n\r\n\r\r\n',
+            u'a\u2028b\x0cc\r\nd',
+        ))
+    @pytest.mark.parametrize('chunk_size', (1, 2, 3, 1024))
+    def test_matches_splitlines(self, content, chunk_size):
+        chunks = iter_slices(content, chunk_size)
+        assert list(iter_stream_lines(chunks)) == content.splitlines()
+
+    @pytest.mark.parametrize(
+        'content, delimiter', (
+            (b'a,b,,c,', b','),
+            (b'a<>b<<>>c<>', b'<>'),
+            (u'a\r\n\r\nb', u'\r\n'),
+            (b'xyzxyxyzzxyz', b'xyz'),
+        ))
+    @pytest.mark.parametrize('chunk_size', (1, 2, 3, 1024))
+    def test_delimiter(self, content, delimiter, chunk_size):
+        chunks = iter_slices(content, chunk_size)
+        expected = content.split(delimiter)
+        if not expected[-1]:
+            expected.pop()
+        assert list(iter_stream_lines(chunks, delimiter=delimiter)) == expected
+
+    def test_long_line_is_joined_once(self):
+        chunks = [b'x'] * 10000 + [b'\nend']
+        assert list(iter_stream_lines(chunks)) == [b'x' * 10000, b'end']
+
+    @pytest.mark.parametrize(
+        'chunks', (
+            [b'12345\n', b'123456\n'],
+            [b'123', b'456', b'7'],
+        ))
+    def test_max_line_length(self, chunks):
+        lines = iter_stream_lines(chunks, max_line_length=5)
+        with pytest.raises(LineTooLongError):
+            list(lines)
+
+    def test_max_line_length_allows_exact_length(self):
+        lines = iter_stream_lines([b'123', b'45\n678'], max_line_length=5)
+        assert list(lines) == [b'12345', b'678']
+
+
 @pytest.mark.parametrize(
     'value, expected', (
         (
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Compares search_diff() and myers_diff() with diff(), which combines them,
+on the cases of test_diff.py and on larger edits.
+
+Run it from the repository root:
+
+    python benchmark/bench_diff.py
+
+For each case it prints the median time of each, in milliseconds, and
+whether diff() produced the same edit commands as search_diff().
+"""
+
+from __future__ import print_function
+
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pythonx', 'UltiSnips'))
+sys.path.insert(0, os.path.join(ROOT, 'pythonx'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+if 'vim' not in sys.modules:
+    # The diffs don't talk to Vim, but importing UltiSnips does.
+    import mock_vim  # pylint:disable=import-error
+    mock_vim.install()
+
+import test_diff  # pylint:disable=import-error,wrong-import-position
+from UltiSnips._diff import diff, search_diff, myers_diff  # pylint:disable=wrong-import-position
+
+
+def test_diff_cases():
+    """Yields the (name, a, b) cases of test_diff.py."""
+    for name in sorted(dir(test_diff)):
+        case = getattr(test_diff, name)
+        if (isinstance(case, type) and issubclass(case, test_diff._Base) and
+                hasattr(case, 'a')):
+            yield name, case.a, case.b
+
+
+def large_cases():
+    """Yields (name, a, b) cases of edits in large snippets."""
+    rng = random.Random(0)
+    words = 'def return self if else for in while class import'.split()
+    for num_lines, num_edits in ((10, 3), (40, 10), (100, 20)):
+        lines = [' '.join(rng.choice(words) for _ in range(6))
+                 for _ in range(num_lines)]
+        a = '\n'.join(lines)
+        b = list(a)
+        for _ in range(num_edits):
+            position = rng.randrange(len(b))
+            b[position:position + rng.randrange(3)] = rng.choice(words)
+        yield '%i lines, %i edits' % (num_lines, num_edits), a, ''.join(b)
+
+
+def median_ms(function, a, b):
+    timer = timeit.Timer(lambda: function(a, b))
+    number, _ = timer.autorange() if hasattr(timer, 'autorange') else (1, 0)
+    runs = sorted(timer.repeat(5, number))
+    return runs[len(runs) // 2] / number * 1000
+
+
+def main():
+    print('%-34s %12s %12s %12s  %s' % (
+        'case', 'search ms', 'myers ms', 'diff ms', 'same'))
+    for name, a, b in list(test_diff_cases()) + list(large_cases()):
+        same = diff(a, b) == search_diff(a, b)
+        print('%-34s %12.3f %12.3f %12.3f  %s' % (
+            name, median_ms(search_diff, a, b), median_ms(myers_diff, a, b),
+            median_ms(diff, a, b), 'yes' if same else 'no'))
+
+if __name__ == '__main__':
+    main()
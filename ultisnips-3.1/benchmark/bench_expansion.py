@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Measures the latency of what UltiSnips does while the user types, without
+a running Vim.
+
+The SnippetManager is driven against the buffer of mock_vim.py. Every timed
+operation is one call that Vim would make into UltiSnips:
+
+    lookup             finding the snippets for the text before the cursor in
+                       a large snippet collection
+    lookup_autotrigger the same for autotrigger snippets, which happens on
+                       every keystroke
+    expand_nested      expanding a snippet inside the tabstop of another one,
+                       many levels deep
+    jump               jumping through the tabstops of a deeply nested snippet
+    keystroke_mirror   updating a snippet with many mirrors after a keystroke
+    keystroke_transform
+                       the same for transformations
+    diff_large         _diff.diff() on large edits
+
+Run it from the repository root:
+
+    python benchmark/bench_expansion.py
+
+It prints the 50th, 90th and 99th percentile and the maximum of each
+operation in milliseconds. To catch regressions, keep the results of a good
+run with --save and check later runs against them with --compare; that exits
+with 1 if the median of an operation got slower than --tolerance times the
+kept one.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'pythonx'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import mock_vim  # pylint:disable=import-error,wrong-import-position
+
+VIM = mock_vim.install()
+
+# pylint:disable=wrong-import-position
+from UltiSnips import UltiSnips_Manager
+from UltiSnips._diff import diff
+# pylint:enable=wrong-import-position
+
+WORDS = 'def return self if else for in while class import'.split()
+
+NESTED_DEPTH = 8
+MIRRORS = 20
+
+
+def percentile(samples, fraction):
+    """The nearest-rank percentile of the sorted 'samples'."""
+    index = int(round(fraction * (len(samples) - 1)))
+    return samples[index]
+
+
+class Timings(object):
+
+    """Latencies in seconds by operation."""
+
+    def __init__(self):
+        self._samples = {}
+
+    def time(self, operation, function, *args):
+        """Calls 'function' with 'args' and records how long it took."""
+        start = timeit.default_timer()
+        rv = function(*args)
+        self._samples.setdefault(operation, []).append(
+            timeit.default_timer() - start)
+        VIM.assert_no_error()
+        return rv
+
+    def summary(self):
+        """Returns {operation: {'n', 'p50', 'p90', 'p99', 'max'}} in
+        milliseconds."""
+        rv = {}
+        for operation, samples in self._samples.items():
+            samples = sorted(samples)
+            rv[operation] = {'n': len(samples)}
+            for name, fraction in (('p50', .5), ('p90', .9), ('p99', .99),
+                                   ('max', 1.)):
+                rv[operation][name] = percentile(samples, fraction) * 1000
+        return rv
+
+
+class Session(object):
+
+    """Types into the mock buffer the way Vim would, calling into the
+    SnippetManager where Vim's mappings and autocommands do."""
+
+    def __init__(self, manager, timings):
+        self._manager = manager
+        self._timings = timings
+        self._selection = None
+
+    def reset(self):
+        """Leaves all snippets and starts over with an empty buffer."""
+        self._manager._leaving_buffer()  # pylint:disable=protected-access
+        self._selection = None
+        VIM.mode = 'i'
+        VIM.set_text([''], (0, 0))
+
+    def text(self):
+        """The content of the buffer."""
+        return '\n'.join(VIM.buffer)
+
+    def expand(self, operation=None):
+        """Presses the expand trigger."""
+        self._call(operation, self._manager.expand)
+
+    def jump(self, operation=None):
+        """Presses the jump forward trigger."""
+        self._call(operation, self._manager.jump_forwards)
+
+    def type(self, text, operation=None):
+        """Types 'text' one character at a time."""
+        for char in text:
+            line, col = VIM.get_cursor()
+            if self._selection is not None:
+                # Typing over a selected tabstop replaces it.
+                start, end = self._selection
+                self._selection = None
+                lines = list(VIM.buffer)
+                before = lines[start.line][:start.col]
+                after = lines[end.line][end.col:]
+                VIM.buffer[start.line:end.line + 1] = [before + after]
+                line, col = start.line, start.col
+            current = VIM.buffer[line]
+            if char == '\n':
+                VIM.buffer[line:line + 1] = [current[:col], current[col:]]
+                line, col = line + 1, 0
+            else:
+                VIM.buffer[line] = current[:col] + char + current[col:]
+                col += 1
+            VIM.set_cursor(line, col)
+            self._cursor_moved(operation)
+
+    def _cursor_moved(self, operation=None):
+        # pylint:disable=protected-access
+        if operation is None:
+            self._manager._cursor_moved()
+        else:
+            self._timings.time(operation, self._manager._cursor_moved)
+        VIM.assert_no_error()
+
+    def _call(self, operation, function):
+        tabstop = self._manager._ctab  # pylint:disable=protected-access
+        if operation is None:
+            function()
+        else:
+            self._timings.time(operation, function)
+        VIM.assert_no_error()
+        if self._manager._ctab is tabstop:  # pylint:disable=protected-access
+            return
+        # UltiSnips selected the next tabstop; Vim leaves insert mode for
+        # that, which moves the cursor once.
+        tabstop = self._manager._ctab  # pylint:disable=protected-access
+        if tabstop is not None:
+            VIM.set_cursor(tabstop.start.line, tabstop.start.col)
+            if tabstop.start != tabstop.end:
+                self._selection = (tabstop.start, tabstop.end)
+        VIM.mode = 'n'
+        self._cursor_moved()
+        VIM.mode = 'i'
+
+
+def write_snippets(directory, count):
+    """Writes a snippet file with 'count' generated snippets and the ones the
+    other benchmarks expand into 'directory'/UltiSnips/all.snippets."""
+    rng = random.Random(0)
+    snippets = []
+    for index in range(count):
+        options = rng.choice(['', '', '', 'b', 'w', 'i', 'A', 'r'])
+        trigger = '%s%04i' % (rng.choice(WORDS), index)
+        if options == 'r':
+            trigger = '"%s(\\d+)"' % trigger
+        snippets.append('snippet %s "Snippet %i" %s\n%s ${1:%s} $0\n'
+                        'endsnippet\n' % (trigger, index, options,
+                                          rng.choice(WORDS), trigger))
+
+    nested = 'x'
+    for number in range(NESTED_DEPTH, 0, -1):
+        nested = '${%i:level %i (%s)}' % (number, number, nested)
+    snippets.append('snippet deep "Nested tabstops"\n%s $0\nendsnippet\n' %
+                    nested)
+    snippets.append('snippet nest "Expands into itself"\n'
+                    '${1:nest} ${2:tail}\nendsnippet\n')
+    snippets.append('snippet mirror "Many mirrors"\n${1:name}\n%s\n'
+                    'endsnippet\n' %
+                    '\n'.join('mirror %i: $1' % index
+                              for index in range(MIRRORS)))
+    snippets.append('snippet trans "Many transformations"\n${1:name}\n%s\n'
+                    'endsnippet\n' %
+                    '\n'.join('transform %i: ${1/(\\w+)/\\u$1/g}' % index
+                              for index in range(MIRRORS)))
+
+    snippet_dir = os.path.join(directory, 'UltiSnips')
+    os.makedirs(snippet_dir)
+    with open(os.path.join(snippet_dir, 'all.snippets'), 'w') as snippet_file:
+        snippet_file.write('\n'.join(snippets))
+
+
+def bench_lookup(manager, timings, count, runs):
+    rng = random.Random(1)
+    befores = []
+    for _ in range(runs):
+        trigger = '%s%04i' % (rng.choice(WORDS), rng.randrange(count))
+        befores.append(rng.choice([
+            trigger,
+            '    ' + trigger,
+            'some code before ' + trigger,
+            'code' + trigger,
+            'no snippet here',
+            '',
+        ]))
+    for before in befores:
+        # pylint:disable=protected-access
+        timings.time('lookup', manager._snips, before, False)
+        timings.time('lookup_autotrigger', manager._snips, before, False,
+                     True)
+
+
+def bench_expand_nested(session, runs):
+    for _ in range(runs):
+        session.reset()
+        session.type('nest')
+        for _ in range(NESTED_DEPTH):
+            session.expand('expand_nested')
+            session.type('nest')
+        session.expand('expand_nested')
+    expected = 'nest' + ' tail' * (NESTED_DEPTH + 1)
+    assert session.text() == expected, session.text()
+
+
+def bench_jump(session, runs):
+    for _ in range(runs):
+        session.reset()
+        session.type('deep')
+        session.expand()
+        for _ in range(NESTED_DEPTH):
+            session.jump('jump')
+    assert session.text().startswith('level 1 (level 2'), session.text()
+
+
+def bench_keystrokes(session, runs):
+    for trigger, operation, wanted in (
+            ('mirror', 'keystroke_mirror', 'mirror 0: hello world'),
+            ('trans', 'keystroke_transform', 'transform 0: Hello World')):
+        for _ in range(runs):
+            session.reset()
+            session.type(trigger)
+            session.expand()
+            session.type('hello world', operation)
+        lines = session.text().split('\n')
+        assert lines[1] == wanted, lines
+
+
+def bench_diff(timings, runs):
+    rng = random.Random(2)
+    lines = [' '.join(rng.choice(WORDS) for _ in range(8))
+             for _ in range(200)]
+    a = '\n'.join(lines)
+    for _ in range(runs):
+        b = list(a)
+        for _ in range(20):
+            position = rng.randrange(len(b))
+            b[position:position + rng.randrange(5)] = rng.choice(WORDS)
+        timings.time('diff_large', diff, a, ''.join(b))
+
+
+def run(count, runs):
+    """Runs all benchmarks and returns the Timings."""
+    directory = tempfile.mkdtemp()
+    try:
+        write_snippets(directory, count)
+        VIM.options['runtimepath'] = directory
+        manager = UltiSnips_Manager
+        timings = Timings()
+        session = Session(manager, timings)
+        # Parse the snippet file before anything is timed.
+        manager._snips('', False)  # pylint:disable=protected-access
+
+        bench_lookup(manager, timings, count, runs * 10)
+        bench_expand_nested(session, runs)
+        bench_jump(session, runs)
+        bench_keystrokes(session, runs)
+        bench_diff(timings, runs)
+        session.reset()
+        return timings
+    finally:
+        shutil.rmtree(directory)
+
+
+def compare(summary, baseline, tolerance):
+    """Returns the operations whose median is more than 'tolerance' times
+    the one in 'baseline'."""
+    slower = []
+    for operation, kept in sorted(baseline.items()):
+        if operation in summary and (
+                summary[operation]['p50'] > kept['p50'] * tolerance):
+            slower.append(operation)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split('\n')[0])
+    parser.add_argument('--snippets', type=int, default=5000,
+                        help='Number of snippets to look up in.')
+    parser.add_argument('--runs', type=int, default=20,
+                        help='How often each benchmark is repeated.')
+    parser.add_argument('--save', metavar='FILE',
+                        help='Keep the results as JSON in FILE.')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare the medians with the results kept '
+                        'in FILE.')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='How much slower an operation may get than '
+                        'the kept results.')
+    args = parser.parse_args()
+
+    summary = run(args.snippets, args.runs).summary()
+
+    print('%-22s %6s %10s %10s %10s %10s' % (
+        'operation', 'n', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms'))
+    for operation, stats in sorted(summary.items()):
+        print('%-22s %6i %10.3f %10.3f %10.3f %10.3f' % (
+            operation, stats['n'], stats['p50'], stats['p90'], stats['p99'],
+            stats['max']))
+
+    if args.save:
+        with open(args.save, 'w') as results:
+            json.dump(summary, results, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as results:
+            slower = compare(summary, json.load(results), args.tolerance)
+        if slower:
+            print('Slower than %s: %s' % (args.compare, ', '.join(slower)))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""A stand-in for Vim's 'vim' Python module, so that UltiSnips can be driven
+without a running Vim.
+
+It keeps one buffer, one window with a cursor, the mode and a few options and
+variables. vim.eval() understands only the expressions UltiSnips evaluates
+while looking up, expanding and updating snippets; anything else raises
+vim.error, so that the benchmarks notice when UltiSnips starts asking Vim for
+something new.
+
+Call install() before anything from UltiSnips is imported.
+"""
+
+import re
+import sys
+import types
+
+
+class error(Exception):  # pylint:disable=invalid-name
+
+    """See module docstring."""
+
+
+class MockBuffer(object):
+
+    """A list of lines that counts changes like b:changedtick."""
+
+    def __init__(self, number, lines=None):
+        self.number = number
+        self.changedtick = 1
+        self._lines = list(lines or [''])
+
+    def __getitem__(self, idx):
+        return self._lines[idx]
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            value = list(value)
+            if not value and idx.start in (None, 0) and idx.stop is None:
+                value = ['']
+        self._lines[idx] = value
+        if not self._lines:
+            self._lines.append('')
+        self.changedtick += 1
+
+    def __delitem__(self, idx):
+        del self._lines[idx]
+        if not self._lines:
+            self._lines.append('')
+        self.changedtick += 1
+
+    # Python 2 calls these for simple slices. Slice syntax would call them
+    # again, so the slice objects are passed on explicitly.
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(max(0, i), max(0, j)))
+
+    def __setslice__(self, i, j, value):
+        self.__setitem__(slice(max(0, i), max(0, j)), value)
+
+    def __delslice__(self, i, j):
+        self.__delitem__(slice(max(0, i), max(0, j)))
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    def append(self, lines, nr=None):
+        """Like vim.Buffer.append()."""
+        if not isinstance(lines, list):
+            lines = [lines]
+        if nr is None:
+            nr = len(self._lines)
+        self[nr:nr] = lines
+
+
+class MockWindow(object):
+
+    """A window showing the current buffer, with a (1 based line, 0 based
+    byte) cursor like vim.Window.cursor."""
+
+    def __init__(self, current):
+        self._current = current
+        self.cursor = (1, 0)
+
+    @property
+    def buffer(self):
+        """The buffer shown in this window."""
+        return self._current.buffer
+
+
+class MockCurrent(object):
+
+    """What vim.current gives access to."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.window = MockWindow(self)
+
+    @property
+    def line(self):
+        """The line under the cursor."""
+        return self.buffer[self.window.cursor[0] - 1]
+
+
+def _unescape(text):
+    """Reverts the escaping of '"' and '\\' in a Vim string literal."""
+    return re.sub(r'\\(.)', r'\1', text)
+
+
+def _is_keyword(char):
+    return bool(char) and (char.isalnum() or char == '_')
+
+
+class MockVim(object):
+
+    """The state behind the module returned by install()."""
+
+    def __init__(self):
+        self.mode = 'i'
+        self.options = {
+            'encoding': 'utf-8',
+            'runtimepath': '',
+            'selection': 'inclusive',
+            'shiftwidth': '4',
+            'tabstop': '8',
+            'expandtab': '0',
+            've': '',
+        }
+        self.variables = {
+            'g:UltiSnipsExpandTrigger': '<tab>',
+            'g:UltiSnipsJumpForwardTrigger': '<c-j>',
+            'g:UltiSnipsJumpBackwardTrigger': '<c-k>',
+            'g:UltiSnipsEnableSnipMate': '0',
+            'g:UltiSnipsSnippetDirectories': ['UltiSnips'],
+            'g:UltiSnipsSnippetCacheDir': '',
+            'g:UltiSnipsRemoveSelectModeMappings': '0',
+            'g:UltiSnipsMappingsToIgnore': [],
+            'v:char': '',
+        }
+        self.commands = 0
+        self.buffer = MockBuffer(1)
+        self.current = MockCurrent(self.buffer)
+        self._evaluators = [
+            (re.compile(r"^mode\(\)$"), lambda m: self.mode),
+            (re.compile(r'^b:changedtick$'),
+             lambda m: str(self.current.buffer.changedtick)),
+            (re.compile(r'^&(\w+)$'), lambda m: self.options[m.group(1)]),
+            (re.compile(r"^exists\('\*shiftwidth'\) \? shiftwidth\(\) : "
+                        r'&shiftwidth$'),
+             lambda m: self.options['shiftwidth']),
+            (re.compile(r"^exists\('([gb]:\w+)'\)$"),
+             lambda m: '1' if m.group(1) in self.variables else '0'),
+            (re.compile(r"^exists\('.*'\)$"), lambda m: '0'),
+            (re.compile(r'^[gbv]:\w+$'),
+             lambda m: self.variables[m.group(0)]),
+            (re.compile(r'^virtcol\(\[(\d+), (\d+)\]\)$'),
+             lambda m: str(int(m.group(2)) + 1)),
+            (re.compile(r'^getpos\(".*"\)$'), lambda m: ['0', '0', '0', '0']),
+            (re.compile(r'^setpos\(".*", .*\)$'), lambda m: '0'),
+            (re.compile(r'^@" != \'.*\'$', re.DOTALL), lambda m: '0'),
+            (re.compile(r'^(?:visualmode\(\)|expand\("%.*"\))$'),
+             lambda m: ''),
+            (re.compile(r'^fnamemodify\("(.*)", ":~:\."\)$'),
+             lambda m: _unescape(m.group(1))),
+            (re.compile(r'^"(.*)" =~# "\\\\v\.<\."$', re.DOTALL),
+             self._word_boundary),
+            (re.compile(r'^substitute\("(.*)", "\\\\v\^\.\+<\(\.\+\)", '
+                        r'"\\\\1", ""\)$', re.DOTALL),
+             self._last_word),
+        ]
+
+    @staticmethod
+    def _word_boundary(match):
+        chars = _unescape(match.group(1))
+        starts_word = (len(chars) == 2 and not _is_keyword(chars[0]) and
+                       _is_keyword(chars[1]))
+        return '1' if starts_word else '0'
+
+    @staticmethod
+    def _last_word(match):
+        words = _unescape(match.group(1))
+        match = re.match(r'^.+(?<!\w)(?=\w)(.+)$', words, re.UNICODE)
+        return match.group(1) if match else words
+
+    def eval(self, expression):
+        """See vim.eval()."""
+        for regex, evaluate in self._evaluators:
+            match = regex.match(expression)
+            if match:
+                try:
+                    return evaluate(match)
+                except KeyError:
+                    break
+        raise error('E121: Undefined expression: %s' % expression)
+
+    def command(self, cmd):
+        """See vim.command().
+
+        Only ':set' and opening a new window do anything. The latter is how
+        UltiSnips shows its errors, so it gets a fresh buffer that
+        assert_no_error() complains about.
+
+        """
+        self.commands += 1
+        match = re.match(r'^set (\w+)=(.*)$', cmd)
+        if match:
+            self.options[match.group(1)] = match.group(2)
+        elif cmd == 'botright new':
+            self.current.buffer = MockBuffer(self.buffer.number + 1)
+
+    def assert_no_error(self):
+        """Raises the error UltiSnips showed in a scratch buffer, if any."""
+        if self.current.buffer is not self.buffer:
+            text = '\n'.join(self.current.buffer)
+            self.current.buffer = self.buffer
+            raise error(text)
+
+    def set_text(self, lines, cursor):
+        """Replaces the buffer with 'lines' and puts the cursor to the 0 based
+        (line, col)."""
+        self.buffer[:] = lines
+        self.set_cursor(*cursor)
+
+    def set_cursor(self, line, col):
+        """Puts the cursor to the 0 based (line, col)."""
+        text = self.buffer[line]
+        nbyte = len(text[:col].encode(self.options['encoding']))
+        self.current.window.cursor = (line + 1, nbyte)
+
+    def get_cursor(self):
+        """Returns the 0 based (line, col) of the cursor."""
+        line, nbyte = self.current.window.cursor
+        text = self.buffer[line - 1].encode(self.options['encoding'])
+        return line - 1, len(text[:nbyte].decode(self.options['encoding']))
+
+
+def install():
+    """Makes 'import vim' return a module backed by a new MockVim and returns
+    that MockVim."""
+    state = MockVim()
+    module = types.ModuleType('vim')
+    module.error = error
+    module.eval = state.eval
+    module.command = state.command
+    module.current = state.current
+    sys.modules['vim'] = module
+    return state
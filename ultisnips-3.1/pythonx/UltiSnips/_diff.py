@@ -10,6 +10,14 @@ import sys
 from UltiSnips import _vim
 from UltiSnips.position import Position
 
+# Texts longer than this together are first compared line by line, since the
+# cost of search_diff() grows quickly with their length and the number of
+# changes. Only the regions between matching lines are then given to
+# search_diff(), as long as they are not longer than this themselves and the
+# search stays below SEARCH_MAX_COST.
+MYERS_THRESHOLD = 256
+SEARCH_MAX_COST = 2000
+
 
 def is_complete_edit(initial_line, original, wanted, cmds):
     """Returns true if 'original' is changed to 'wanted' with the edit commands
@@ -138,6 +146,20 @@ def guess_edit(initial_line, last_text, current_text, vim_state):
 
 
 def diff(a, b, sline=0):
+    """Return a list of deletions and insertions that will turn 'a' into 'b'.
+
+    Short texts are compared by search_diff(), which finds the edits users
+    most likely made. Longer ones are compared line by line like in
+    myers_diff() first, and search_diff() only looks at the text between the
+    lines that match (see MYERS_THRESHOLD and SEARCH_MAX_COST).
+
+    """
+    if len(a) + len(b) > MYERS_THRESHOLD:
+        return _line_diff(a, b, sline, _EditScript.search)
+    return search_diff(a, b, sline)
+
+
+def search_diff(a, b, sline=0, scol=0, max_cost=None):
     """
     Return a list of deletions and insertions that will turn 'a' into 'b'. This
     is done by traversing an implicit edit graph and searching for the shortest
@@ -155,15 +177,20 @@ def diff(a, b, sline=0):
         "D" w , "D" rld, "I" a, "I" lsa
     [2] This is that "hello\n\n" -> "hello\n\n\n" will insert a newline after
         hello and not after \n
+
+    'sline' and 'scol' are the line and column where 'a' starts. Returns None
+    if the edits cost more than 'max_cost'.
     """
     d = defaultdict(list)  # pylint:disable=invalid-name
     seen = defaultdict(lambda: sys.maxsize)
 
-    d[0] = [(0, 0, sline, 0, ())]
+    d[0] = [(0, 0, sline, scol, ())]
     cost = 0
     deletion_cost = len(a) + len(b)
     insertion_cost = len(a) + len(b)
     while True:
+        if max_cost is not None and cost > max_cost:
+            return None
         while len(d[cost]):
             x, y, line, col, what = d[cost].pop()
 
@@ -182,6 +209,10 @@ def diff(a, b, sline=0):
                     # Matching directly after a deletion should be as costly as
                     # DELETE + INSERT + a bit
                     lcost = (deletion_cost + insertion_cost) * 1.5
+                elif a[x] != '\n' and _replaced_before(what, line, col):
+                    # And so should matching directly after the insertion
+                    # that replaced a deletion, wherever it happens [1].
+                    lcost = cost + (deletion_cost + insertion_cost) * 1.5
                 if seen[x + 1, y + 1] > lcost:
                     d[lcost].append((x + 1, y + 1, nline, ncol, what))
                     seen[x + 1, y + 1] = lcost
@@ -224,3 +255,235 @@ def diff(a, b, sline=0):
                                                     (('D', line, col, a[x]),))
                                                    )
         cost += 1
+
+
+def _replaced_before(what, line, col):
+    """Returns true if the edit commands 'what' end with a deletion followed
+    by an insertion at the same place, which ends at line, col."""
+    if len(what) < 2 or what[-1][0] != 'I':
+        return False
+    _, iline, icol, text = what[-1]
+    return (iline == line and icol + len(text) == col and
+            what[-2][:3] == ('D', iline, icol))
+
+
+def _middle_snake(a, alo, ahi, b, blo, bhi):
+    """Returns the start and end of the middle snake of an edit script from
+    a[alo:ahi] to b[blo:bhi], relative to alo and blo, as (x0, y0, x1, y1).
+
+    This is from Myers, "An O(ND) Difference Algorithm and Its Variations",
+    searching forwards from the start and backwards from the end until the
+    paths overlap.
+
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta % 2
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if (odd and delta - (d - 1) <= k <= delta + (d - 1) and
+                    x + backward[offset + delta - k] >= n):
+                return x0, y0, x, y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while (x < n and y < m and
+                   a[ahi - 1 - x] == b[bhi - 1 - y]):
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if (not odd and -d <= delta - k <= d and
+                    x + forward[offset + delta - k] >= n):
+                return n - x, m - y, n - x0, m - y0
+
+
+def _matching_blocks(a, b):
+    """Returns the (i, j, size) blocks where a[i:i + size] == b[j:j + size]
+    of a longest common subsequence of 'a' and 'b', in order.
+
+    Uses Myers' linear space refinement: the middle snake splits the
+    problem in two, which are solved the same way.
+
+    """
+    blocks = []
+    todo = [(0, len(a), 0, len(b))]
+    while todo:
+        item = todo.pop()
+        if len(item) == 3:
+            blocks.append(item)
+            continue
+        alo, ahi, blo, bhi = item
+        prefix = 0
+        while (alo + prefix < ahi and blo + prefix < bhi and
+               a[alo + prefix] == b[blo + prefix]):
+            prefix += 1
+        suffix = 0
+        while (alo + prefix < ahi - suffix and blo + prefix < bhi - suffix and
+               a[ahi - 1 - suffix] == b[bhi - 1 - suffix]):
+            suffix += 1
+        # Pushed in reverse, so that the blocks come out in order.
+        if suffix:
+            todo.append((ahi - suffix, bhi - suffix, suffix))
+        alo_, ahi_ = alo + prefix, ahi - suffix
+        blo_, bhi_ = blo + prefix, bhi - suffix
+        if alo_ < ahi_ and blo_ < bhi_:
+            x0, y0, x1, y1 = _middle_snake(a, alo_, ahi_, b, blo_, bhi_)
+            todo.append((alo_ + x1, ahi_, blo_ + y1, bhi_))
+            if x1 > x0:
+                todo.append((alo_ + x0, blo_ + y0, x1 - x0))
+            todo.append((alo_, alo_ + x0, blo_, blo_ + y0))
+        if prefix:
+            todo.append((alo, blo, prefix))
+    return blocks
+
+
+class _EditScript(object):
+
+    """Builds the edit commands of diff() while moving over the text."""
+
+    def __init__(self, sline):
+        self.line = sline
+        self.col = 0
+        self.cmds = []
+
+    def match(self, text):
+        newlines = text.count('\n')
+        if newlines:
+            self.line += newlines
+            self.col = len(text) - text.rfind('\n') - 1
+        else:
+            self.col += len(text)
+
+    def delete(self, text):
+        for part in _split_newlines(text):
+            last = self.cmds[-1] if self.cmds else None
+            if (part != '\n' and last and last[0] == 'D' and
+                    last[1] == self.line and last[2] == self.col and
+                    last[3] != '\n'):
+                self.cmds[-1] = ('D', self.line, self.col, last[3] + part)
+            else:
+                self.cmds.append(('D', self.line, self.col, part))
+
+    def insert(self, text):
+        for part in _split_newlines(text):
+            last = self.cmds[-1] if self.cmds else None
+            if (part != '\n' and last and last[0] == 'I' and
+                    last[1] == self.line and
+                    last[2] + len(last[3]) == self.col and last[3] != '\n'):
+                self.cmds[-1] = ('I', last[1], last[2], last[3] + part)
+            else:
+                self.cmds.append(('I', self.line, self.col, part))
+            if part == '\n':
+                self.line += 1
+                self.col = 0
+            else:
+                self.col += len(part)
+
+    def replace(self, old, new):
+        """Diffs 'old' with 'new' character by character."""
+        x = y = 0
+        for i, j, size in _matching_blocks(old, new) + [(len(old), len(new), 0)]:
+            if i > x:
+                self.delete(old[x:i])
+            if j > y:
+                self.insert(new[y:j])
+            self.match(old[i:i + size])
+            x, y = i + size, j + size
+
+    def search(self, old, new):
+        """Diffs 'old' with 'new' using search_diff(), unless they are too
+        long for it."""
+        cmds = None
+        if len(old) + len(new) <= MYERS_THRESHOLD:
+            cmds = search_diff(old, new, self.line, self.col, SEARCH_MAX_COST)
+        if cmds is None:
+            self.replace(old, new)
+            return
+        self.cmds.extend(cmds)
+        self.match(new)
+
+
+def _split_newlines(text):
+    """Splits 'text' into lines and the newlines between them."""
+    parts = []
+    for index, line in enumerate(text.split('\n')):
+        if index:
+            parts.append('\n')
+        if line:
+            parts.append(line)
+    return parts
+
+
+def myers_diff(a, b, sline=0):
+    """Return a list of deletions and insertions that will turn 'a' into 'b',
+    like diff(), in time proportional to the size of the texts times the
+    number of differences.
+
+    The lines are compared first, by their hash, and only the text between
+    the lines that match is compared character by character.
+
+    """
+    return _line_diff(a, b, sline, _EditScript.replace)
+
+
+def _line_diff(a, b, sline, compare):
+    """Compares the lines of 'a' and 'b' by their hash and calls
+    compare(script, old, new) for the text between the lines that match.
+
+    The lines that match at the end are taken first, so that a line added
+    to or removed from a run of equal lines is found at its start, like
+    search_diff() does.
+
+    """
+    a_lines = a.split('\n')
+    b_lines = b.split('\n')
+    hashes = {}
+    a_hashes = [hashes.setdefault(line, len(hashes)) for line in a_lines]
+    b_hashes = [hashes.setdefault(line, len(hashes)) for line in b_lines]
+
+    a_starts = [0]
+    for line in a_lines:
+        a_starts.append(a_starts[-1] + len(line) + 1)
+    b_starts = [0]
+    for line in b_lines:
+        b_starts.append(b_starts[-1] + len(line) + 1)
+
+    suffix = 0
+    while (suffix < min(len(a_hashes), len(b_hashes)) and
+           a_hashes[-1 - suffix] == b_hashes[-1 - suffix]):
+        suffix += 1
+    a_end, b_end = len(a_hashes) - suffix, len(b_hashes) - suffix
+    blocks = _matching_blocks(a_hashes[:a_end], b_hashes[:b_end])
+    if suffix:
+        blocks.append((a_end, b_end, suffix))
+
+    script = _EditScript(sline)
+    x = y = 0  # Where the text still to compare starts in a and b.
+    for i, j, size in blocks:
+        start, end = a_starts[i], a_starts[i + size] - 1
+        compare(script, a[x:start], b[y:b_starts[j]])
+        script.match(a[start:end])
+        x, y = end, b_starts[j + size] - 1
+    compare(script, a[x:], b[y:])
+    return tuple(script.cmds)
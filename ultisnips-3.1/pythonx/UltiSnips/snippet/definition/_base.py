@@ -14,7 +14,8 @@ from UltiSnips.indent_util import IndentUtil
 from UltiSnips.position import Position
 from UltiSnips.text import escape
 from UltiSnips.text_objects import SnippetInstance
-from UltiSnips.text_objects._python_code import SnippetUtilCursor, SnippetUtilForAction
+from UltiSnips.text_objects._python_code import SnippetUtilCursor, SnippetUtilForAction, \
+    compile_code
 
 __WHITESPACE_SPLIT = re.compile(r"\s")
 def split_at_whitespace(string):
@@ -55,6 +56,8 @@ class SnippetDefinition(object):
         self._value = as_unicode(value)
         self._description = as_unicode(description)
         self._opts = options
+        self._trigger_re = re.compile(self._trigger) if 'r' in options \
+            else None
         self._matched = ''
         self._last_re = None
         self._globals = globals
@@ -67,6 +70,17 @@ class SnippetDefinition(object):
         # immediately expanded.
         self.matches(self._trigger)
 
+    def __getstate__(self):
+        # Snippets are pickled in the cache of parsed snippet files, without
+        # the state of their last match.
+        state = self.__dict__.copy()
+        state.update(_matched='', _last_re=None, _context=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.matches(self._trigger)
+
     def __repr__(self):
         return '_SnippetDefinition(%r,%s,%s,%s)' % (
             self._priority, self._trigger, self._description, self._opts)
@@ -77,7 +91,7 @@ class SnippetDefinition(object):
         If so, set _last_re and _matched.
 
         """
-        for match in re.finditer(self._trigger, trigger):
+        for match in self._trigger_re.finditer(trigger):
             if match.end() != len(trigger):
                 continue
             else:
@@ -118,7 +132,7 @@ class SnippetDefinition(object):
         snip = SnippetUtilForAction(locals)
 
         try:
-            exec(code, {'snip': snip})
+            exec(compile_code(code), {'snip': snip})
         except Exception as e:
             e.snippet_info = textwrap.dedent("""
                 Defined in: {}
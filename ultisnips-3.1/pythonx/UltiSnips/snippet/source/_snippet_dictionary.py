@@ -3,6 +3,55 @@
 
 """Implements a container for parsed snippets."""
 
+from collections import defaultdict
+
+from UltiSnips.snippet.definition._base import split_at_whitespace, \
+    _words_for_line
+
+
+class _TriggerIndex(object):
+
+    """Finds the snippets whose trigger can match the text before the cursor
+    without trying every snippet.
+
+    Snippets are referred to by their position in the dictionary, so that
+    candidates are returned in the order the snippets were added.
+
+    """
+
+    def __init__(self):
+        # Plain triggers by their number of words, then by trigger.
+        self._words = defaultdict(lambda: defaultdict(list))
+        # 'i' and 'w' triggers, which match at the end of the text, by their
+        # length, then by trigger.
+        self._suffixes = defaultdict(lambda: defaultdict(list))
+        # Regular expression and empty triggers, which are always tried.
+        self._others = []
+
+    def add(self, position, snippet):
+        """Add the snippet at 'position' to the index."""
+        trigger = snippet.trigger
+        if snippet.has_option('r') or not trigger:
+            self._others.append(position)
+        elif snippet.has_option('w') or snippet.has_option('i'):
+            self._suffixes[len(trigger)][trigger].append(position)
+        else:
+            num_words = len(split_at_whitespace(trigger))
+            self._words[num_words][trigger].append(position)
+
+    def candidates(self, before):
+        """Returns the sorted positions of the snippets that can match
+        'before'."""
+        positions = list(self._others)
+        for num_words, triggers in self._words.items():
+            words = _words_for_line('', before, num_words)
+            positions.extend(triggers.get(words, ()))
+        stripped = before.rstrip()
+        for length, triggers in self._suffixes.items():
+            positions.extend(triggers.get(stripped[-length:], ()))
+        return sorted(positions)
+
+
 class SnippetDictionary(object):
 
     """See module docstring."""
@@ -11,10 +60,18 @@ class SnippetDictionary(object):
         self._snippets = []
         self._cleared = {}
         self._clear_priority = float("-inf")
+        self._index = _TriggerIndex()
+        self._autotrigger_index = _TriggerIndex()
+        self._autotrigger = []
 
     def add_snippet(self, snippet):
         """Add 'snippet' to this dictionary."""
+        position = len(self._snippets)
         self._snippets.append(snippet)
+        self._index.add(position, snippet)
+        if snippet.has_option('A'):
+            self._autotrigger_index.add(position, snippet)
+            self._autotrigger.append(snippet)
 
     def get_matching_snippets(self, trigger, potentially, autotrigger_only):
         """Returns all snippets matching the given trigger.
@@ -28,15 +85,20 @@ class SnippetDictionary(object):
         which can be very slow, because function will be called on each change
         made in insert mode.
 
-        """
-        all_snippets = self._snippets
-        if autotrigger_only:
-            all_snippets = [s for s in all_snippets if s.has_option('A')]
+        Full matches are only tried on the snippets which the trigger index
+        finds for 'trigger'.
 
+        """
         if not potentially:
-            return [s for s in all_snippets if s.matches(trigger)]
-        else:
-            return [s for s in all_snippets if s.could_match(trigger)]
+            index = self._autotrigger_index if autotrigger_only else \
+                self._index
+            candidates = (self._snippets[position]
+                          for position in index.candidates(trigger))
+            return [s for s in candidates if s.matches(trigger)]
+
+        all_snippets = self._autotrigger if autotrigger_only else \
+            self._snippets
+        return [s for s in all_snippets if s.could_match(trigger)]
 
     def clear_snippets(self, priority, triggers):
         """Clear the snippets by mark them as cleared.
@@ -6,10 +6,13 @@
 from collections import defaultdict
 import hashlib
 import os
+import time
 
 from UltiSnips import _vim
 from UltiSnips import compatibility
 from UltiSnips.snippet.source._base import SnippetSource
+from UltiSnips.snippet.source.file._cache import ParsedFileCache, \
+    cache_directory
 
 
 def _hash_file(path):
@@ -19,6 +22,16 @@ def _hash_file(path):
     return hashlib.sha1(open(path, 'rb').read()).hexdigest()
 
 
+def _stat_file(path):
+    """Returns the modification time, size and inode of 'path', which change
+    along with its content, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size, stat.st_ino
+
+
 class SnippetSyntaxError(RuntimeError):
 
     """Thrown when a syntax error is found in a file."""
@@ -32,10 +45,17 @@ class SnippetFileSource(SnippetSource):
 
     """Base class that abstracts away 'extends' info and file hashes."""
 
+    # Seconds during which the snippet files found for a filetype are reused
+    # instead of searching the snippet directories again.
+    listing_interval = 2.0
+
     def __init__(self):
         SnippetSource.__init__(self)
         self._files_for_ft = defaultdict(set)
         self._file_hashes = defaultdict(lambda: None)
+        self._file_stats = {}
+        self._listings = {}
+        self._parsed_cache = None
         self._ensure_cached = False
 
     def ensure(self, filetypes, cached):
@@ -56,17 +76,48 @@ class SnippetFileSource(SnippetSource):
         """Parses 'filedata' as a snippet file and yields events."""
         raise NotImplementedError()
 
+    def _listing_key(self, ft):
+        """Returns what the snippet files for 'ft' depend on besides the
+        snippet directories' content."""
+        return ft
+
+    def _list_snippet_files_for(self, ft, force=False):
+        """Returns the snippet files for 'ft', searching for them at most
+        once every 'listing_interval' seconds unless 'force' is true."""
+        key = self._listing_key(ft)
+        now = time.time()
+        if not force and key in self._listings:
+            listed_at, files = self._listings[key]
+            if 0 <= now - listed_at < self.listing_interval:
+                return files
+        files = self._get_all_snippet_files_for(ft)
+        self._listings[key] = now, files
+        return files
+
     def _needs_update(self, ft):
         """Returns true if any files for 'ft' have changed and must be
-        reloaded."""
-        existing_files = self._get_all_snippet_files_for(ft)
+        reloaded.
+
+        Files are only hashed again when their modification time, size or
+        inode changed.
+
+        """
+        existing_files = self._list_snippet_files_for(ft)
         if existing_files != self._files_for_ft[ft]:
             self._files_for_ft[ft] = existing_files
             return True
 
         for filename in self._files_for_ft[ft]:
-            if _hash_file(filename) != self._file_hashes[filename]:
+            stat = _stat_file(filename)
+            if stat is None:
+                # Removed since the files were listed.
+                self._files_for_ft[ft] = self._list_snippet_files_for(
+                    ft, force=True)
                 return True
+            if stat != self._file_stats.get(filename):
+                self._file_stats[filename] = stat
+                if _hash_file(filename) != self._file_hashes[filename]:
+                    return True
 
         return False
 
@@ -86,12 +137,37 @@ class SnippetFileSource(SnippetSource):
             if parent_ft != ft and self._needs_update(parent_ft):
                 self._load_snippets_for(parent_ft)
 
+    def _get_parsed_cache(self):
+        """Returns the cache of parsed snippet files, or None if parsed files
+        are not kept."""
+        if self._parsed_cache is None:
+            directory = cache_directory()
+            self._parsed_cache = ParsedFileCache(
+                directory, type(self).__name__) if directory else False
+        return self._parsed_cache or None
+
+    def _parse_events(self, filename):
+        """Returns the events in 'filename', from the cache of parsed files
+        if it did not change."""
+        file_hash = self._file_hashes[filename]
+        cache = self._get_parsed_cache()
+        if cache is not None:
+            events = cache.load(filename, file_hash)
+            if events is not None:
+                return events
+        file_data = compatibility.open_ascii_file(filename, 'r').read()
+        events = list(self._parse_snippet_file(file_data, filename))
+        if cache is not None and all(
+                event != 'error' for event, _ in events):
+            cache.store(filename, file_hash, events)
+        return events
+
     def _parse_snippets(self, ft, filename):
         """Parse the 'filename' for the given 'ft' and watch it for changes in
         the future."""
+        self._file_stats[filename] = _stat_file(filename)
         self._file_hashes[filename] = _hash_file(filename)
-        file_data = compatibility.open_ascii_file(filename, 'r').read()
-        for event, data in self._parse_snippet_file(file_data, filename):
+        for event, data in self._parse_events(filename):
             if event == 'error':
                 msg, line_index = data
                 filename = _vim.eval("""fnamemodify(%s, ":~:.")""" %
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""Keeps the events parsed from snippet files on disk, so that files which
+did not change are not parsed again in later Vim sessions."""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+from UltiSnips import _vim
+
+# Has to change whenever the parsed events or the snippet definitions they
+# contain change.
+CACHE_VERSION = '3.1-1'
+
+
+def cache_directory():
+    """Returns the directory to keep parsed snippet files in, or None if they
+    should not be kept."""
+    if _vim.eval("exists('g:UltiSnipsSnippetCacheDir')") == '1':
+        directory = _vim.eval('g:UltiSnipsSnippetCacheDir')
+        return os.path.expanduser(directory) if directory else None
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        '~', '.cache')
+    return os.path.expanduser(os.path.join(cache_home, 'UltiSnips'))
+
+
+class ParsedFileCache(object):
+
+    """The events parsed from the snippet files of one kind, by file name.
+
+    Each file gets an entry, which is only used if the file's content hash,
+    the cache version, the Python version and Vim's encoding all match those
+    it was stored with.
+
+    """
+
+    def __init__(self, directory, kind):
+        self._directory = directory
+        self._kind = kind
+
+    def _entry_path(self, filename):
+        # On Python 2, file names are byte strings, which can't be encoded
+        # again if they are not ASCII.
+        if not isinstance(filename, bytes):
+            filename = filename.encode('utf-8')
+        name = hashlib.sha1(
+            self._kind.encode('utf-8') + b':' + filename).hexdigest()
+        return os.path.join(self._directory, name)
+
+    def _key(self, file_hash):
+        return (CACHE_VERSION, sys.version_info[0], _vim.eval('&encoding'),
+                file_hash)
+
+    def load(self, filename, file_hash):
+        """Returns the events parsed from 'filename' when its content had
+        'file_hash', or None."""
+        try:
+            with open(self._entry_path(filename), 'rb') as entry:
+                key, events = pickle.load(entry)
+        except Exception:  # pylint:disable=broad-except
+            # Missing, unreadable or incompatible entries are parsed again.
+            return None
+        if key != self._key(file_hash):
+            return None
+        return events
+
+    def store(self, filename, file_hash, events):
+        """Keeps the 'events' parsed from 'filename' with 'file_hash'."""
+        path = self._entry_path(filename)
+        try:
+            if not os.path.isdir(self._directory):
+                os.makedirs(self._directory)
+            fd, tmp_path = tempfile.mkstemp(dir=self._directory)
+        except (IOError, OSError):
+            return
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                pickle.dump((self._key(file_hash), events), entry, 2)
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # os.rename does not replace files on Windows.
+                os.remove(path)
+                os.rename(tmp_path, path)
+        except Exception:  # pylint:disable=broad-except
+            # The file will be parsed again next time.
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
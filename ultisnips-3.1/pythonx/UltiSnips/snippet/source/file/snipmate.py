@@ -118,6 +118,9 @@ class SnipMateFileSource(SnippetFileSource):
     def _get_all_snippet_files_for(self, ft):
         return snipmate_files_for(ft)
 
+    def _listing_key(self, ft):
+        return ft, _vim.eval('&runtimepath')
+
     def _parse_snippet_file(self, filedata, filename):
         if filename.lower().endswith('snippet'):
             for event, data in _parse_snippet_file(filedata, filename):
@@ -26,13 +26,17 @@ def find_snippet_files(ft, directory):
     return ret
 
 
+def _snippet_directories():
+    """Returns the snippet directories set for the current buffer."""
+    if _vim.eval("exists('b:UltiSnipsSnippetDirectories')") == '1':
+        return _vim.eval('b:UltiSnipsSnippetDirectories')
+    return _vim.eval('g:UltiSnipsSnippetDirectories')
+
+
 def find_all_snippet_files(ft):
     """Returns all snippet files matching 'ft' in the given runtime path
     directory."""
-    if _vim.eval("exists('b:UltiSnipsSnippetDirectories')") == '1':
-        snippet_dirs = _vim.eval('b:UltiSnipsSnippetDirectories')
-    else:
-        snippet_dirs = _vim.eval('g:UltiSnipsSnippetDirectories')
+    snippet_dirs = _snippet_directories()
     if len(snippet_dirs) == 1 and os.path.isabs(snippet_dirs[0]):
         check_dirs = ['']
     else:
@@ -176,6 +180,10 @@ class UltiSnipsFileSource(SnippetFileSource):
     def _get_all_snippet_files_for(self, ft):
         return find_all_snippet_files(ft)
 
+    def _listing_key(self, ft):
+        return (ft, tuple(_snippet_directories()),
+                _vim.eval('&runtimepath'))
+
     def _parse_snippet_file(self, filedata, filename):
         for event, data in _parse_snippets_file(filedata, filename):
             yield event, data
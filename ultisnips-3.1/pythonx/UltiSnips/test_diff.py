@@ -5,7 +5,7 @@
 
 import unittest
 
-from _diff import diff, guess_edit
+from _diff import diff, guess_edit, myers_diff
 from position import Position
 
 
@@ -194,6 +194,15 @@ class MatchIsTooCheap(_Base, unittest.TestCase):
     )
 
 
+class TestReplaceWord(_Base, unittest.TestCase):
+    a = 'hello world'
+    b = 'hello aolsa'
+    wanted = (
+        ('D', 0, 6, 'world'),
+        ('I', 0, 6, 'aolsa'),
+    )
+
+
 class MultiLine(_Base, unittest.TestCase):
     a = 'hi first line\nsecond line first line\nsecond line world'
     b = 'hi first line\nsecond line k world'
@@ -206,6 +215,99 @@ class MultiLine(_Base, unittest.TestCase):
     )
 
 
+
+class _MyersBase(object):
+
+    def runTest(self):
+        es = myers_diff(self.a, self.b)
+        tr = transform(self.a, es)
+        self.assertEqual(self.b, tr)
+        if hasattr(self, 'wanted'):
+            self.assertEqual(self.wanted, es)
+
+
+class TestMyersAllMatch(_MyersBase, unittest.TestCase):
+    a, b = 'abcdef\nghi', 'abcdef\nghi'
+    wanted = ()
+
+
+class TestMyersLotsaNewlines(_MyersBase, unittest.TestCase):
+    a, b = 'Hello', 'Hello\nWorld\nWorld\nWorld'
+    wanted = (
+        ('I', 0, 5, '\n'),
+        ('I', 1, 0, 'World'),
+        ('I', 1, 5, '\n'),
+        ('I', 2, 0, 'World'),
+        ('I', 2, 5, '\n'),
+        ('I', 3, 0, 'World'),
+    )
+
+
+class TestMyersDeleteLines(_MyersBase, unittest.TestCase):
+    a, b = 'one\ntwo\nthree\nfour', 'one\nfour'
+    wanted = (
+        ('D', 1, 0, 'two'),
+        ('D', 1, 0, '\n'),
+        ('D', 1, 0, 'three'),
+        ('D', 1, 0, '\n'),
+    )
+
+
+class TestMyersCrash(_MyersBase, unittest.TestCase):
+    a = TestCrash.a
+    b = TestCrash.b
+
+
+class TestMyersWithNewline(_MyersBase, unittest.TestCase):
+    a = TestWithNewline.a
+    b = TestWithNewline.b
+
+
+class TestMyersMultiLine(_MyersBase, unittest.TestCase):
+    a = MultiLine.a
+    b = MultiLine.b
+
+
+class TestMyersLongText(_MyersBase, unittest.TestCase):
+    a = '\n'.join('line %i of a long snippet' % i for i in range(200))
+    b = a.replace('line 50 ', 'the line 50 ').replace(
+        'line 120 of a long snippet\n', '')
+
+
+class TestDiffLongText(_Base, unittest.TestCase):
+    a = TestMyersLongText.a
+    b = TestMyersLongText.b
+    wanted = (
+        ('I', 50, 0, 'the '),
+        ('D', 119, 26, '\n'),
+        ('D', 119, 26, 'line 120 of a long snippet'),
+    )
+
+
+class TestDiffLongTextReplaceWord(_Base, unittest.TestCase):
+    a = 'padding line\n' * 30 + 'hello world'
+    b = 'padding line\n' * 30 + 'hello aolsa'
+    wanted = (
+        ('D', 30, 6, 'world'),
+        ('I', 30, 6, 'aolsa'),
+    )
+
+
+class TestDiffLongTextInsertNewline(_Base, unittest.TestCase):
+    a = 'padding line\n' * 30 + 'hello\n\n'
+    b = 'padding line\n' * 30 + 'hello\n\n\n'
+    wanted = (
+        ('I', 30, 5, '\n'),
+    )
+
+
+class TestDiffLongLineUsesMyers(unittest.TestCase):
+
+    def runTest(self):
+        a = 'x' * 300 + 'hello world'
+        b = 'x' * 300 + 'hello aolsa'
+        self.assertEqual(diff(a, b, 3), myers_diff(a, b, 3))
+
 if __name__ == '__main__':
     unittest.main()
     # k = TestEditScript()
@@ -30,6 +30,22 @@ class _Tabs(object):
 
 _VisualContent = namedtuple('_VisualContent', ['mode', 'text'])
 
+# Code objects by their source, so that snippet code is only compiled once.
+_compiled_code = {}
+_MAX_COMPILED_CODE = 1000
+
+
+def compile_code(code):
+    """Returns 'code' compiled for exec()."""
+    try:
+        return _compiled_code[code]
+    except KeyError:
+        if len(_compiled_code) >= _MAX_COMPILED_CODE:
+            _compiled_code.clear()
+        compiled = compile(code, '<string>', 'exec')
+        _compiled_code[code] = compiled
+        return compiled
+
 
 class SnippetUtilForAction(dict):
     def __init__(self, *args, **kwargs):
@@ -245,6 +261,7 @@ class PythonCode(NoneditableTextObject):
             except AttributeError:
                 snippet = snippet._parent  # pylint:disable=protected-access
         self._snip = SnippetUtil(token.indent, mode, text, context)
+        self._snippet = snippet
 
         self._codes = ((
             'import re, os, vim, string, random',
@@ -266,12 +283,16 @@ class PythonCode(NoneditableTextObject):
         })
         self._snip._reset(ct)  # pylint:disable=protected-access
 
-        for code in self._codes:
+        # The imports and global code only need to run once per snippet.
+        start = 2 if self._snippet.python_globals_done else 0
+        for index, code in enumerate(self._codes[start:], start):
             try:
-                exec(code, self._locals)  # pylint:disable=exec-used
+                exec(compile_code(code), self._locals)  # pylint:disable=exec-used
             except Exception as e:
                 e.snippet_code = code
                 raise
+            if index == 1:
+                self._snippet.python_globals_done = True
 
         rv = as_unicode(
             self._snip.rv if self._snip._rv_changed  # pylint:disable=protected-access
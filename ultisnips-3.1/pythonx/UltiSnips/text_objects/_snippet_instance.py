@@ -33,6 +33,8 @@ class SnippetInstance(EditableTextObject):
         self.context = context
         self.locals = {'match': last_re, 'context': context}
         self.globals = globals
+        # Whether the global python code was run in locals.
+        self.python_globals_done = False
         self.visual_content = visual_content
 
         EditableTextObject.__init__(self, parent, start, end, initial_text)
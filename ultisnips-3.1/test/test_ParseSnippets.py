@@ -241,6 +241,20 @@ endsnippet
     wanted = 'x first a bob b y'
 
 
+class ParseSnippets_Global_Python_RunOncePerSnippet(_VimTest):
+    files = { 'us/all.snippets': r"""
+global !p
+runs = globals().get('runs', 0) + 1
+endglobal
+
+snippet ab
+$1 `!p snip.rv = runs`
+endsnippet
+        """}
+    keys = 'ab' + EX + 'hello\nab' + EX + 'hi'
+    wanted = 'hello 1\nhi 1'
+
+
 class ParseSnippets_PrintPythonStacktrace(_VimTest):
     files = { 'us/all.snippets': r"""
         snippet test
@@ -314,3 +328,27 @@ class ParseSnippets_PrintErroneousSnippetLocation(_VimTest):
     keys = 'test' + EX
     wanted = keys
     expected_error = "Defined in: .*/all.snippets"
+
+class ParseSnippets_LoadedFromCache(_VimTest):
+    files = { 'us/all.snippets': r"""
+        snippet "te(st)" "Test Snippet" r
+        ${1:cached} `!p snip.rv = match.group(1)`
+        endsnippet
+        """}
+    keys = 'test' + EX + JF + 'done'
+    wanted = 'cached stdone'
+
+    def _before_test(self):
+        # Load the snippet file, then load it again into a source which
+        # can't parse it: its snippets have to come from the cache.
+        py = ':%s ' % ('py3' if PYTHON3 else 'py')
+        for command in (
+                'UltiSnips_Manager._snips("", False)',
+                'from UltiSnips.snippet.source import UltiSnipsFileSource',
+                'UltiSnips_Manager.unregister_snippet_source('
+                '"ultisnips_files")',
+                'source = UltiSnipsFileSource()',
+                'source._parse_snippet_file = None',
+                'UltiSnips_Manager.register_snippet_source('
+                '"ultisnips_files", source)'):
+            self.vim.send_to_vim(py + command + '\n')
@@ -107,6 +107,47 @@ class SnippetOptions_ExpandWordSnippets_ExpandSuffix3(
     wanted = '[[Expand me!'
 
 
+class _SnippetOptions_MixedTriggers(_VimTest):
+    snippets = (
+        ('test', 'plain', '', ''),
+        ('two words', 'two', '', ''),
+        ('ins', 'inword', '', 'i'),
+        ('ord', 'word', '', 'w'),
+        ('t[0-9]+', 'regex', '', 'r'),
+    )
+
+
+class SnippetOptions_MixedTriggers_Plain(_SnippetOptions_MixedTriggers):
+    keys = 'a test' + EX
+    wanted = 'a plain'
+
+
+class SnippetOptions_MixedTriggers_TwoWords(_SnippetOptions_MixedTriggers):
+    keys = 'a two words' + EX
+    wanted = 'a two'
+
+
+class SnippetOptions_MixedTriggers_Inword(_SnippetOptions_MixedTriggers):
+    keys = 'fins' + EX
+    wanted = 'finword'
+
+
+class SnippetOptions_MixedTriggers_Word(_SnippetOptions_MixedTriggers):
+    keys = 'a.ord' + EX
+    wanted = 'a.word'
+
+
+class SnippetOptions_MixedTriggers_NoWordBoundary(
+        _SnippetOptions_MixedTriggers):
+    keys = 'word' + EX
+    wanted = 'word' + EX
+
+
+class SnippetOptions_MixedTriggers_Regex(_SnippetOptions_MixedTriggers):
+    keys = 'at123' + EX
+    wanted = 'aregex'
+
+
 class _No_Tab_Expand(_VimTest):
     snippets = ('test', '\t\tExpand\tme!\t', '', 't')
 
@@ -138,6 +138,8 @@ class VimTestCase(unittest.TestCase, TempFileManager):
             'let g:UltiSnipsUsePythonVersion="%i"' %
             (3 if PYTHON3 else 2))
         vim_config.append('let g:UltiSnipsSnippetDirectories=["us"]')
+        vim_config.append('let g:UltiSnipsSnippetCacheDir="%s"' %
+                          os.path.join(self._temp_dir, 'cache'))
         if self.python_host_prog:
             vim_config.append('let g:python_host_prog="%s"' % self.python_host_prog)
         if self.python3_host_prog:
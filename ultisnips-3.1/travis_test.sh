@@ -37,3 +37,5 @@ $PYTHON_CMD ./test_all.py \
    --vim $VIM \
    $INTERFACE \
    --expected-python-version $PYTHON_VERSION
+
+$PYTHON_CMD ./benchmark/bench_expansion.py --runs 3